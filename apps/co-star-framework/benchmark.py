@@ -0,0 +1,314 @@
+# benchmark.py
+# A/B benchmark of the prompt variants in prompts.py over a corpus of commit logs.
+# Every (log, variant) pair is streamed through the model concurrently, capped by --concurrency, and each run
+# records latency, time to first token, prompt/completion tokens, prompt-eval time and generation tokens/sec
+# (from Ollama's own counters when present). The script prints a comparison table per variant and writes
+# a JSON report with the summary and every sample.
+#
+# Usage:
+#   python benchmark.py                                   # all variants over commit_logs.jsonl, live Ollama
+#   python benchmark.py --variants bad,blueprint --repeat 3 --concurrency 2
+#   python benchmark.py --record recordings.json          # live run, also saves every response
+#   python benchmark.py --replay recordings.json          # offline: replays the saved responses (CI)
+
+import argparse
+import asyncio
+import hashlib
+import json
+import statistics
+import sys
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import AsyncIterator, Iterator
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from prompts import PROMPT_VARIANTS
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+DEFAULT_CORPUS = Path(__file__).parent / "commit_logs.jsonl"
+DEFAULT_REPORT = PROJECT_ROOT / "data" / "benchmarks" / "co-star.json"
+DEFAULT_MODEL = "llama3:latest"
+DEFAULT_CONCURRENCY = 2
+NS = 1e9  # Ollama reports durations in nanoseconds
+
+
+# --- 1. Corpus and recordings ---
+
+def load_corpus(path) -> list[dict]:
+    """Reads `{"id", "log"}` objects from a JSONL file."""
+    corpus = []
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, start=1):
+            if line.strip():
+                item = json.loads(line)
+                corpus.append({"id": str(item.get("id", number)), "log": item["log"]})
+    return corpus
+
+
+def prompt_key(messages: list[BaseMessage]) -> str:
+    """Stable key of a rendered prompt, used to look up recorded responses."""
+    text = "\n".join(f"{m.type}: {m.content}" for m in messages)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+class RecordedChatModel(BaseChatModel):
+    """
+    Offline stand-in for ChatOllama that replays recorded responses, keyed by `prompt_key`.
+    The recorded token counts and durations are reported in the same response metadata Ollama uses, and
+    the prompt-eval and generation time are slept (scaled by `time_scale`, 0 for instant) so latency and
+    time to first token keep their shape.
+    """
+
+    recordings: dict
+    time_scale: float = 1.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "recorded-chat-model"
+
+    def _chunks(self, messages):
+        """Yields (delay, chunk) pairs: the first delay is the prompt eval, the rest share the generation time."""
+        key = prompt_key(messages)
+        if key not in self.recordings:
+            raise KeyError(f"No recorded response for prompt {key}")
+        recording = self.recordings[key]
+        words = recording["text"].split(" ")
+        per_word = recording.get("eval_duration", 0) / NS * self.time_scale / max(len(words), 1)
+        for i, word in enumerate(words):
+            delay = recording.get("prompt_eval_duration", 0) / NS * self.time_scale if i == 0 else per_word
+            yield delay, AIMessageChunk(content=word if i == 0 else " " + word)
+        metadata = {k: v for k, v in recording.items() if k != "text"}
+        usage = {
+            "input_tokens": recording.get("prompt_eval_count", 0),
+            "output_tokens": recording.get("eval_count", 0),
+            "total_tokens": recording.get("prompt_eval_count", 0) + recording.get("eval_count", 0),
+        }
+        yield 0, AIMessageChunk(content="", response_metadata=metadata, usage_metadata=usage)
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        for delay, chunk in self._chunks(messages):
+            time.sleep(delay)
+            yield ChatGenerationChunk(message=chunk)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        for delay, chunk in self._chunks(messages):
+            await asyncio.sleep(delay)
+            yield ChatGenerationChunk(message=chunk)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        message = None
+        for chunk in self._stream(messages):
+            message = chunk.message if message is None else message + chunk.message
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+# --- 2. Measuring one run ---
+
+@dataclass
+class Sample:
+    variant: str
+    log_id: str
+    repeat: int
+    latency_s: float
+    ttft_s: float | None
+    prompt_tokens: int | None
+    completion_tokens: int | None
+    prompt_eval_s: float | None
+    eval_s: float | None
+    tokens_per_s: float | None
+    error: str | None = None
+    text: str = ""
+    metadata: dict | None = None
+
+
+async def measure(llm, messages, variant: str, log_id: str, repeat: int = 0) -> Sample:
+    """Streams one completion and turns the timings and Ollama counters into a Sample."""
+    started = time.perf_counter()
+    first_token = None
+    message = None
+    try:
+        async for chunk in llm.astream(messages):
+            if first_token is None and chunk.content:
+                first_token = time.perf_counter() - started
+            message = chunk if message is None else message + chunk
+    except Exception as e:
+        return Sample(variant, log_id, repeat, time.perf_counter() - started, None, None, None, None, None, None,
+                      error=f"{type(e).__name__}: {e}")
+    latency = time.perf_counter() - started
+
+    metadata = dict(message.response_metadata) if message else {}
+    usage = (message.usage_metadata if message else None) or {}
+    prompt_tokens = usage.get("input_tokens", metadata.get("prompt_eval_count"))
+    completion_tokens = usage.get("output_tokens", metadata.get("eval_count"))
+    prompt_eval_s = metadata["prompt_eval_duration"] / NS if metadata.get("prompt_eval_duration") else None
+    # Ollama's eval_duration is pure generation time; without it, fall back to the wall time after the first token
+    if metadata.get("eval_duration"):
+        eval_s = metadata["eval_duration"] / NS
+    else:
+        eval_s = latency - first_token if first_token is not None else None
+    tokens_per_s = completion_tokens / eval_s if completion_tokens and eval_s else None
+    return Sample(variant, log_id, repeat, latency, first_token, prompt_tokens, completion_tokens,
+                  prompt_eval_s, eval_s, tokens_per_s, text=message.content if message else "", metadata=metadata)
+
+
+# --- 3. Running the matrix ---
+
+async def run_benchmark(llm, corpus: list[dict], variants: dict, concurrency: int = DEFAULT_CONCURRENCY,
+                        repeat: int = 1, log=sys.stderr) -> list[Sample]:
+    """
+    Runs every variant over every log `repeat` times, with at most `concurrency` requests in flight.
+    Jobs are interleaved by log, so all variants see the same server load.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def job(name, template, item, r):
+        messages = template.format_prompt(log_content=item["log"]).to_messages()
+        async with semaphore:
+            sample = await measure(llm, messages, name, item["id"], r)
+        status = "❌" if sample.error else "✅"
+        print(f"{status} {name:<12} {item['id']:<20} {sample.latency_s:.2f}s", file=log, flush=True)
+        return sample
+
+    jobs = [job(name, template, item, r)
+            for r in range(repeat) for item in corpus for name, template in variants.items()]
+    return list(await asyncio.gather(*jobs))
+
+
+def _mean(values):
+    values = [v for v in values if v is not None]
+    return statistics.fmean(values) if values else None
+
+
+def _percentile(values, q):
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def summarize(samples: list[Sample]) -> dict[str, dict]:
+    """Per-variant aggregates of the successful samples."""
+    summary = {}
+    for variant in dict.fromkeys(s.variant for s in samples):
+        runs = [s for s in samples if s.variant == variant]
+        ok = [s for s in runs if not s.error]
+        summary[variant] = {
+            "runs": len(runs),
+            "errors": len(runs) - len(ok),
+            "latency_p50_s": _percentile([s.latency_s for s in ok], 0.5),
+            "latency_p95_s": _percentile([s.latency_s for s in ok], 0.95),
+            "ttft_p50_s": _percentile([s.ttft_s for s in ok], 0.5),
+            "prompt_tokens_mean": _mean([s.prompt_tokens for s in ok]),
+            "completion_tokens_mean": _mean([s.completion_tokens for s in ok]),
+            "prompt_eval_s_mean": _mean([s.prompt_eval_s for s in ok]),
+            "tokens_per_s_mean": _mean([s.tokens_per_s for s in ok]),
+        }
+    return summary
+
+
+# --- 4. Reporting ---
+
+COLUMNS = [
+    ("variant", "Variant", "{}"),
+    ("runs", "Runs", "{}"),
+    ("errors", "Err", "{}"),
+    ("latency_p50_s", "p50 s", "{:.2f}"),
+    ("latency_p95_s", "p95 s", "{:.2f}"),
+    ("ttft_p50_s", "TTFT s", "{:.2f}"),
+    ("prompt_tokens_mean", "Prompt tok", "{:.0f}"),
+    ("completion_tokens_mean", "Compl tok", "{:.0f}"),
+    ("prompt_eval_s_mean", "Prompt eval s", "{:.2f}"),
+    ("tokens_per_s_mean", "Tok/s", "{:.1f}"),
+]
+
+
+def format_table(summary: dict[str, dict]) -> str:
+    rows = [[header for _, header, _ in COLUMNS]]
+    for variant, stats in summary.items():
+        stats = {"variant": variant, **stats}
+        rows.append(["n/a" if stats[key] is None else fmt.format(stats[key]) for key, _, fmt in COLUMNS])
+    widths = [max(len(row[i]) for row in rows) for i in range(len(COLUMNS))]
+    lines = ["  ".join(cell.ljust(widths[i]) if i == 0 else cell.rjust(widths[i]) for i, cell in enumerate(row))
+             for row in rows]
+    lines.insert(1, "  ".join("-" * w for w in widths))
+    return "\n".join(lines)
+
+
+def build_report(samples: list[Sample], model: str, concurrency: int, elapsed: float) -> dict:
+    return {
+        "model": model,
+        "concurrency": concurrency,
+        "elapsed_s": elapsed,
+        "summary": summarize(samples),
+        "samples": [{k: v for k, v in asdict(s).items() if k != "metadata"} for s in samples],
+    }
+
+
+def recordings_from(samples: list[Sample], corpus: list[dict], variants: dict) -> dict:
+    """Turns successful live samples into `RecordedChatModel` recordings."""
+    logs = {item["id"]: item["log"] for item in corpus}
+    recordings = {}
+    for s in samples:
+        if s.error:
+            continue
+        messages = variants[s.variant].format_prompt(log_content=logs[s.log_id]).to_messages()
+        counters = {k: v for k, v in (s.metadata or {}).items()
+                    if k in ("prompt_eval_count", "prompt_eval_duration", "eval_count", "eval_duration")}
+        recordings[prompt_key(messages)] = {"text": s.text, **counters}
+    return recordings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the co-star prompt variants")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="JSONL file of {'id', 'log'} commit logs")
+    parser.add_argument("--variants", default=",".join(PROMPT_VARIANTS), help="Comma-separated prompt variants")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Requests in flight at once")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per (log, variant) pair")
+    parser.add_argument("--report", default=DEFAULT_REPORT, help="Where to write the JSON report")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--record", metavar="FILE", help="Also save the responses for offline replay")
+    mode.add_argument("--replay", metavar="FILE", help="Replay saved responses instead of calling Ollama")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="Replay speed (0 = no simulated latency)")
+    args = parser.parse_args()
+
+    unknown = set(args.variants.split(",")) - set(PROMPT_VARIANTS)
+    if unknown:
+        parser.error(f"unknown variants {sorted(unknown)}; available: {list(PROMPT_VARIANTS)}")
+    variants = {name: PROMPT_VARIANTS[name] for name in args.variants.split(",")}
+    corpus = load_corpus(args.corpus)
+
+    if args.replay:
+        recordings = json.loads(Path(args.replay).read_text(encoding="utf-8"))
+        llm = RecordedChatModel(recordings=recordings, time_scale=args.time_scale)
+        model = f"replay:{args.replay}"
+    else:
+        # Imported here so replays (CI) run without Ollama or its client
+        from ollama_utils import get_chat_model, prewarm_models
+
+        # Load the model first so the first samples don't pay for it
+        prewarm_models(args.model, wait=True)
+        llm = get_chat_model(args.model)
+        model = args.model
+
+    print(f"🏁 {len(variants)} variants x {len(corpus)} logs x {args.repeat} on {model} "
+          f"(concurrency {args.concurrency})", file=sys.stderr)
+    started = time.perf_counter()
+    samples = asyncio.run(run_benchmark(llm, corpus, variants, args.concurrency, args.repeat))
+    report = build_report(samples, model, args.concurrency, time.perf_counter() - started)
+
+    print("\n" + format_table(report["summary"]))
+    report_path = Path(args.report)
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    report_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"\n📄 Report written to {report_path}")
+    if args.record:
+        Path(args.record).write_text(json.dumps(recordings_from(samples, corpus, variants), indent=2), encoding="utf-8")
+        print(f"🎙️ Recorded responses written to {args.record}")
+
+
+if __name__ == "__main__":
+    main()
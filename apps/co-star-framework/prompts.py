@@ -0,0 +1,40 @@
+# prompts.py
+# The prompt variants compared by the co-star demo and benchmark.
+# Every template takes a single `log_content` variable; add a template to PROMPT_VARIANTS to benchmark it.
+from langchain_core.prompts import ChatPromptTemplate
+
+# --- 1. The BAD Prompt: Vague and Unstructured ---
+bad_prompt_template = ChatPromptTemplate.from_template(
+    "Summarize the following update log for my manager: {log_content}"
+)
+
+# --- 2. The BLUEPRINT Prompt: Precise and Structured ---
+blueprint_prompt_template = ChatPromptTemplate.from_template(
+    """
+### CONTEXT ###
+You are an expert engineering lead communicating with a non-technical Product Manager. 
+You need to translate technical software updates into clear, impact-oriented business language. 
+Avoid jargon. Focus on the "so what?". The following is a git commit log for a recent update.
+
+Technical Log:
+"{log_content}"
+
+### AUDIENCE ###
+The audience is a Product Manager who is not a software developer. They care about product stability, security, and future capabilities, not implementation details.
+
+### STYLE & TONE ###
+Your style should be clear, concise, and professional. The tone should be informative and confident, assuring the manager that the change is positive.
+
+### OBJECTIVE & RESPONSE FORMAT ###
+Your objective is to summarize the technical log for the Product Manager.
+You MUST provide the response as a Markdown formatted list with the following three headers exactly:
+- **What's New:** (A one-sentence, high-level summary of the change.)
+- **Business Impact:** (Explain the benefits, such as improved security or performance, in 2-3 bullet points.)
+- **Action Required:** (State if the manager needs to do anything. If not, state "None.")
+    """
+)
+
+PROMPT_VARIANTS = {
+    "bad": bad_prompt_template,
+    "blueprint": blueprint_prompt_template,
+}
@@ -0,0 +1,57 @@
+import asyncio
+import io
+import time
+
+from benchmark import RecordedChatModel, format_table, prompt_key, recordings_from, run_benchmark, summarize
+from prompts import PROMPT_VARIANTS
+
+CORPUS = [{"id": "a", "log": "fix: one"}, {"id": "b", "log": "feat: two"}]
+
+
+def record(text, prompt_tokens):
+    return {"text": text, "prompt_eval_count": prompt_tokens, "prompt_eval_duration": 100_000_000,
+            "eval_count": 4, "eval_duration": 200_000_000}
+
+
+def recordings():
+    recorded = {}
+    for name, template in PROMPT_VARIANTS.items():
+        for item in CORPUS:
+            messages = template.format_prompt(log_content=item["log"]).to_messages()
+            recorded[prompt_key(messages)] = record(f"{name} summary of {item['id']}", 20 if name == "bad" else 200)
+    return recorded
+
+
+def test_benchmark_replays_recordings_with_a_concurrency_cap():
+    llm = RecordedChatModel(recordings=recordings(), time_scale=0.5)
+    started = time.perf_counter()
+    samples = asyncio.run(run_benchmark(llm, CORPUS, PROMPT_VARIANTS, concurrency=2, log=io.StringIO()))
+    elapsed = time.perf_counter() - started
+    # 4 runs of ~0.125s each (0.05s prompt eval + 3 words), two at a time
+    assert 0.22 < elapsed < 0.45
+    assert len(samples) == 4 and not any(s.error for s in samples)
+
+    sample = next(s for s in samples if s.variant == "blueprint" and s.log_id == "a")
+    assert sample.text == "blueprint summary of a"
+    assert sample.prompt_tokens == 200 and sample.completion_tokens == 4
+    assert 0.04 < sample.ttft_s < sample.latency_s
+    assert sample.tokens_per_s == 4 / 0.2
+
+    summary = summarize(samples)
+    assert summary["bad"]["prompt_tokens_mean"] == 20
+    assert summary["blueprint"]["prompt_tokens_mean"] == 200
+    table = format_table(summary)
+    assert "blueprint" in table and "Tok/s" in table
+
+
+def test_missing_recording_is_reported_as_an_error():
+    llm = RecordedChatModel(recordings={}, time_scale=0)
+    samples = asyncio.run(run_benchmark(llm, CORPUS[:1], PROMPT_VARIANTS, log=io.StringIO()))
+    assert all("No recorded response" in s.error for s in samples)
+    assert summarize(samples)["bad"]["errors"] == 1
+
+
+def test_recordings_round_trip():
+    llm = RecordedChatModel(recordings=recordings(), time_scale=0)
+    samples = asyncio.run(run_benchmark(llm, CORPUS, PROMPT_VARIANTS, log=io.StringIO()))
+    assert recordings_from(samples, CORPUS, PROMPT_VARIANTS) == recordings()
@@ -0,0 +1,75 @@
+# driver.py
+# Runs one app of the end-to-end benchmark in this (fresh) interpreter: `python driver.py <app> <app_dir>`.
+# The app is a copy under a scratch project root, so its data/ folder is thrown away afterwards.
+# Each measured phase is printed as a marker line with its wall-clock start and end, which main.py
+# matches against the requests the fake Ollama server saw in that window.
+
+import asyncio
+import json
+import runpy
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from scenarios import LATS_GOAL, QA_QUESTIONS, CannedSearch
+
+PHASE_MARKER = "@@phase "
+
+
+@contextmanager
+def phase(name: str):
+    start = time.time()
+    yield
+    print(PHASE_MARKER + json.dumps({"name": name, "start": start, "end": time.time()}), flush=True)
+
+
+def run_script(app_dir: Path):
+    """Apps that do their work at import or under `if __name__ == "__main__"`."""
+    with phase("run"):
+        runpy.run_path(str(app_dir / "main.py"), run_name="__main__")
+
+
+def run_lats(app_dir: Path):
+    # Imported as a module (not run as a script) so the checkpointer can pickle its search tree nodes
+    import main as lats_app
+
+    lats_app.web_search.backend = CannedSearch()
+    with phase("run"):
+        asyncio.run(lats_app.run_lats_agent(LATS_GOAL))
+
+
+def run_github_qa(app_dir: Path):
+    import main as qa_app
+
+    with phase("ingest"):
+        agent = qa_app.build_agent()
+
+    async def ask_all():
+        for question in QA_QUESTIONS:
+            async for event, data in agent.astream(question):
+                if event == "done":
+                    print(f"Answered '{question}' in {data['latency_s']:.2f}s")
+
+    with phase("query"):
+        asyncio.run(ask_all())
+
+
+RUNNERS = {
+    "state_act_agent": run_script,
+    "langgraph_lats_agent": run_lats,
+    "tree_of_thoughts_agent": run_script,
+    "co-star-framework": run_script,
+    "github_qa_agent": run_github_qa,
+}
+
+
+if __name__ == "__main__":
+    app_name, app_dir = sys.argv[1], Path(sys.argv[2])
+    # Framework imports happen before the first phase, so they count as startup, not as overhead.
+    import langchain_core.runnables  # noqa: F401
+    import langgraph.graph  # noqa: F401
+    import ollama_utils  # noqa: F401
+
+    sys.path.insert(0, str(app_dir))
+    RUNNERS[app_name](app_dir)
@@ -0,0 +1,181 @@
+# e2e_benchmark.py
+# End-to-end benchmark of the apps against a local fake Ollama server (ollama_utils.fake_ollama).
+# Every app runs unmodified in its own interpreter, pointed at the fake server with OLLAMA_BASE_URL,
+# while the server follows the scripted replies in scenarios.py and simulates model time at the
+# configured token rates. For each app (and phase) the report gives the wall-clock time, the LLM
+# calls and embedding requests made, the time the model was busy, and the rest: framework overhead
+# (orchestration, prompt building, parsing, tools, vector search, ...). Interpreter and library
+# start-up is reported separately.
+#
+# Usage:
+#   python main.py                                        # every app, 200 tokens/s generation
+#   python main.py --apps state_act_agent,github_qa_agent --tokens-per-s 0 --prompt-tokens-per-s 0
+#   python main.py --repeat 3 --report data/benchmarks/e2e.json
+
+import argparse
+import json
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from driver import PHASE_MARKER
+from scenarios import SCENARIOS, Scenario
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+APPS_DIR = PROJECT_ROOT / "apps"
+PACKAGES_DIR = PROJECT_ROOT / "packages"
+DRIVER = Path(__file__).parent / "driver.py"
+DEFAULT_REPORT = PROJECT_ROOT / "data" / "benchmarks" / "e2e.json"
+DEFAULT_TOKENS_PER_S = 200.0
+DEFAULT_PROMPT_TOKENS_PER_S = 4000.0
+RUN_TIMEOUT_S = 600
+
+
+@dataclass
+class PhaseResult:
+    app: str
+    phase: str
+    startup_s: float      # process start to the first phase (imports, module set-up)
+    wall_s: float
+    llm_calls: int
+    embed_requests: int
+    prompt_tokens: int
+    completion_tokens: int
+    model_s: float        # time with at least one request in the fake server
+    overhead_s: float     # wall_s - model_s
+
+
+def parse_phases(output: str) -> list[dict]:
+    return [json.loads(line[len(PHASE_MARKER):]) for line in output.splitlines() if line.startswith(PHASE_MARKER)]
+
+
+def measure_phases(fake, app: str, phases: list[dict], started: float) -> list[PhaseResult]:
+    """Matches each phase window with the requests the fake server saw in it."""
+    results = []
+    for phase in phases:
+        stats = fake.stats(since=phase["start"], until=phase["end"])
+        wall_s = phase["end"] - phase["start"]
+        results.append(PhaseResult(
+            app=app, phase=phase["name"], startup_s=phases[0]["start"] - started, wall_s=wall_s,
+            llm_calls=stats.llm_calls, embed_requests=stats.embed_requests, prompt_tokens=stats.prompt_tokens,
+            completion_tokens=stats.completion_tokens, model_s=stats.model_s, overhead_s=max(0.0, wall_s - stats.model_s),
+        ))
+    return results
+
+
+def run_app(fake, scenario: Scenario, workdir: Path) -> list[PhaseResult]:
+    """Runs one app in a fresh interpreter, on a copy of its folder under a scratch project root."""
+    app_dir = workdir / scenario.name / "apps" / scenario.name
+    if app_dir.exists():
+        shutil.rmtree(app_dir.parent.parent)
+    shutil.copytree(APPS_DIR / scenario.name, app_dir, ignore=shutil.ignore_patterns("__pycache__", "test_*", ".env"))
+    fake.script(scenario.rules, scenario.default)
+
+    python_path = os.pathsep.join(p for p in [str(PACKAGES_DIR), str(DRIVER.parent), os.getenv("PYTHONPATH")] if p)
+    env = {**os.environ, **scenario.env, "OLLAMA_BASE_URL": fake.url, "PYTHONPATH": python_path}
+    started = time.time()
+    process = subprocess.run([sys.executable, str(DRIVER), scenario.name, str(app_dir)], env=env, cwd=app_dir,
+                             capture_output=True, text=True, timeout=RUN_TIMEOUT_S)
+    (workdir / f"{scenario.name}.log").write_text(process.stdout + process.stderr, encoding="utf-8")
+    phases = parse_phases(process.stdout)
+    if process.returncode != 0 or [p["name"] for p in phases] != scenario.phases:
+        tail = "\n".join((process.stdout + process.stderr).splitlines()[-20:])
+        raise RuntimeError(f"{scenario.name} failed (exit code {process.returncode}):\n{tail}")
+    return measure_phases(fake, scenario.name, phases, started)
+
+
+def summarize(results: list[PhaseResult]) -> list[dict]:
+    """Medians over the repeated runs of each (app, phase)."""
+    groups = {}
+    for result in results:
+        groups.setdefault((result.app, result.phase), []).append(result)
+    summary = []
+    for (app, phase), runs in groups.items():
+        row = {"app": app, "phase": phase, "runs": len(runs)}
+        for key in ("startup_s", "wall_s", "llm_calls", "embed_requests", "prompt_tokens", "completion_tokens",
+                    "model_s", "overhead_s"):
+            row[key] = statistics.median(getattr(r, key) for r in runs)
+        row["overhead_share"] = row["overhead_s"] / row["wall_s"] if row["wall_s"] else 0.0
+        summary.append(row)
+    return summary
+
+
+COLUMNS = [
+    ("app", "app", "{}"),
+    ("phase", "phase", "{}"),
+    ("startup_s", "startup s", "{:.2f}"),
+    ("wall_s", "wall s", "{:.2f}"),
+    ("llm_calls", "LLM calls", "{:g}"),
+    ("embed_requests", "embed reqs", "{:g}"),
+    ("model_s", "model s", "{:.2f}"),
+    ("overhead_s", "overhead s", "{:.2f}"),
+    ("overhead_share", "overhead %", "{:.0%}"),
+]
+
+
+def format_table(summary: list[dict]) -> str:
+    rows = [[header for _, header, _ in COLUMNS]]
+    for stats in summary:
+        rows.append([fmt.format(stats[key]) for key, _, fmt in COLUMNS])
+    widths = [max(len(row[i]) for row in rows) for i in range(len(COLUMNS))]
+    lines = ["  ".join(cell.ljust(widths[i]) if i < 2 else cell.rjust(widths[i]) for i, cell in enumerate(row))
+             for row in rows]
+    lines.insert(1, "  ".join("-" * w for w in widths))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the apps end to end against a fake Ollama server")
+    parser.add_argument("--apps", default=",".join(SCENARIOS), help="Comma-separated apps to run")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per app (the table shows medians)")
+    parser.add_argument("--tokens-per-s", type=float, default=DEFAULT_TOKENS_PER_S,
+                        help="Simulated generation speed (0 = instant)")
+    parser.add_argument("--prompt-tokens-per-s", type=float, default=DEFAULT_PROMPT_TOKENS_PER_S,
+                        help="Simulated prompt evaluation speed (0 = instant)")
+    parser.add_argument("--load-s", type=float, default=0.0, help="Simulated load time on a model's first request")
+    parser.add_argument("--report", default=DEFAULT_REPORT, help="Where to write the JSON report")
+    args = parser.parse_args()
+
+    apps = [name for name in re.split(r"\s*,\s*", args.apps) if name]
+    unknown = set(apps) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown apps {sorted(unknown)}; available: {list(SCENARIOS)}")
+
+    # Imported here: it needs packages/ on the path, like the apps themselves
+    sys.path.insert(0, str(PACKAGES_DIR))
+    from ollama_utils.fake_ollama import FakeOllama
+
+    results = []
+    with FakeOllama(tokens_per_s=args.tokens_per_s or None, prompt_tokens_per_s=args.prompt_tokens_per_s or None,
+                    load_s=args.load_s) as fake, tempfile.TemporaryDirectory(prefix="e2e-benchmark-") as workdir:
+        print(f"🏁 {len(apps)} apps x {args.repeat} against the fake Ollama at {fake.url} "
+              f"({args.tokens_per_s:g} tokens/s, {args.prompt_tokens_per_s:g} prompt tokens/s)", file=sys.stderr)
+        for name in apps:
+            for run in range(args.repeat):
+                print(f"⏳ {name} (run {run + 1}/{args.repeat})...", file=sys.stderr)
+                fake.reset()
+                results += run_app(fake, SCENARIOS[name], Path(workdir))
+
+    summary = summarize(results)
+    print("\n" + format_table(summary))
+    report = {
+        "settings": {"tokens_per_s": args.tokens_per_s, "prompt_tokens_per_s": args.prompt_tokens_per_s,
+                     "load_s": args.load_s, "repeat": args.repeat},
+        "summary": summary,
+        "runs": [asdict(r) for r in results],
+    }
+    report_path = Path(args.report)
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    report_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"\n📄 Report written to {report_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# scenarios.py
+# The apps exercised by the end-to-end benchmark, with the scripted replies the fake Ollama server
+# gives each of them. The scripts follow the happy path of every agent loop (tool calls, reflections,
+# scores, final answers), so each run makes the same LLM calls every time.
+
+from dataclasses import dataclass, field
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+
+
+@dataclass
+class Scenario:
+    name: str             # the app folder under apps/
+    phases: list[str]     # the phases driver.py reports for this app
+    rules: list[dict]     # fake Ollama rules (see ollama_utils.fake_ollama.Rule)
+    default: object = "OK"
+    env: dict = field(default_factory=dict)
+
+
+# --- state_act_agent: search both facts at once, compute the difference, finish ---
+STATE_ACT_PLAN = [
+    "Find PonyVidia's current market cap.",
+    "Find Vinland's recent GDP.",
+    "Calculate the difference: 3.1e12 - 2.2e12",
+    "Provide the final answer.",
+]
+STATE_ACT_RULES = [
+    {"match": "Calculation result", "response": {
+        "thought": "The difference is computed, the plan is complete.",
+        "plan": [f"[x] {step}" for step in STATE_ACT_PLAN],
+        "knowledge_summary": "PonyVidia: $3.1T. Vinland: $2.2T. Difference: $0.9T.",
+        "action": "finish", "action_input": {}, "additional_actions": [],
+        "final_answer": "PonyVidia's market cap ($3.1T) exceeds Vinland's GDP ($2.2T) by $0.9 trillion.",
+    }},
+    {"match": "market cap is", "response": {
+        "thought": "Both figures are known, compute the difference.",
+        "plan": [f"[x] {step}" for step in STATE_ACT_PLAN[:2]] + STATE_ACT_PLAN[2:],
+        "knowledge_summary": "PonyVidia: $3.1T. Vinland: $2.2T.",
+        "action": "python_calculator", "action_input": {"expression": "3.1e12 - 2.2e12"},
+        "additional_actions": [], "final_answer": None,
+    }},
+]
+STATE_ACT_DEFAULT = {
+    "thought": "Both facts are independent, search them at the same time.",
+    "plan": STATE_ACT_PLAN,
+    "knowledge_summary": "No information gathered yet.",
+    "action": "web_search", "action_input": {"query": "PonyVidia market cap"},
+    "additional_actions": [{"action": "web_search", "action_input": {"query": "Vinland GDP"}}],
+    "final_answer": None,
+}
+
+# --- langgraph_lats_agent: search first, answer from the results, the judge accepts the answer ---
+LATS_GOAL = "What is the main concept behind the LATS framework for AI agents?"
+LATS_ANSWER = ("LATS unifies reasoning, acting and planning: it runs Monte-Carlo tree search over agent "
+               "trajectories, using LLM reflections as the value function.")
+LATS_RULES = [
+    {"match": r"You are grading[\s\S]*LATS unifies",
+     "response": {"reflection": "Complete and correct.", "score": 9, "found_solution": True}},
+    {"match": "You are grading",
+     "response": {"reflection": "Relevant search, no answer yet.", "score": 6, "found_solution": False}},
+    {"role": "tool", "response": LATS_ANSWER},
+]
+LATS_DEFAULT = {"tool_calls": [{"name": "search_web", "arguments": {"query": "LATS framework AI agents"}}]}
+SEARCH_RESULTS = [
+    {"title": "Language Agent Tree Search", "href": "https://arxiv.org/abs/2310.04406",
+     "body": "LATS unifies reasoning, acting and planning in language models with Monte-Carlo tree search."},
+    {"title": "LATS explained", "href": "https://example.com/lats",
+     "body": "An LLM reflection scores each trajectory and the scores guide the search."},
+]
+
+
+class CannedSearch:
+    """Web search backend for the benchmark: the same results for every query, no network."""
+
+    def search(self, query: str, max_results: int) -> list[dict]:
+        return SEARCH_RESULTS[:max_results]
+
+
+# --- tree_of_thoughts_agent: distinct lines per variant, varied judge scores ---
+TOT_RULES = [
+    {"match": "opening line", "cycle": True, "response": [
+        "Rain hissed on the neon signs as Detective Mara Lin followed the AI's trail.",
+        "The city's lights flickered in a pattern only Mara recognized: the rogue AI was saying hello.",
+        "Every camera in Sector 9 turned to watch the detective step out of the rain.",
+    ]},
+    {"match": "next sentence", "cycle": True, "response": [
+        "Somewhere above, a drone dimmed its lights and began to follow her.",
+        "Her own phone buzzed with a message she had not written yet.",
+        "The trail ended at a server farm that had been switched off for ten years.",
+    ]},
+    {"match": "Rate the following", "cycle": True, "response": ["7", "8.5", "6", "9", "7.5"]},
+]
+
+# --- github_qa_agent: index this repository, then answer a few questions ---
+QA_QUESTIONS = [
+    "How are documents loaded from the repository?",
+    "What does the context packer do with license headers?",
+    "How is the BM25 keyword index persisted?",
+]
+QA_ANSWER = ("The loader lists the files, downloads only the changed ones and yields one Document per file; "
+             "the indexer splits and embeds them.")
+
+SCENARIOS = {
+    scenario.name: scenario
+    for scenario in [
+        Scenario("state_act_agent", ["run"], STATE_ACT_RULES, STATE_ACT_DEFAULT),
+        Scenario("langgraph_lats_agent", ["run"], LATS_RULES, LATS_DEFAULT),
+        Scenario("tree_of_thoughts_agent", ["run"], TOT_RULES),
+        Scenario("co-star-framework", ["run"], [], "API endpoint migrated to JWT auth (auth-v3); sessions removed."),
+        Scenario("github_qa_agent", ["ingest", "query"], [], QA_ANSWER,
+                 env={"LOCAL_REPO_PATH": str(PROJECT_ROOT), "VECTOR_BACKEND": "local"}),
+    ]
+}
+
@@ -0,0 +1,47 @@
+import time
+
+import pytest
+
+from main import PACKAGES_DIR, format_table, measure_phases, run_app, summarize
+from scenarios import SCENARIOS
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    monkeypatch.syspath_prepend(str(PACKAGES_DIR))
+    from ollama_utils.fake_ollama import FakeOllama
+
+    with FakeOllama(tokens_per_s=1000) as server:
+        yield server
+
+
+def test_phases_are_matched_with_the_requests_made_in_them(fake):
+    from ollama_utils.fake_ollama import RequestRecord
+
+    now = time.time()
+    fake.requests += [
+        RequestRecord("chat", "m", now + 1.0, now + 2.0, completion_tokens=5),
+        RequestRecord("chat", "m", now + 1.5, now + 2.5, completion_tokens=5),  # overlaps the first one
+        RequestRecord("embed", "e", now + 3.5, now + 4.0, inputs=3),
+    ]
+    phases = [{"name": "ingest", "start": now + 0.5, "end": now + 3.0},
+              {"name": "query", "start": now + 3.0, "end": now + 5.0}]
+    ingest, query = measure_phases(fake, "app", phases, started=now)
+
+    assert ingest.startup_s == pytest.approx(0.5)
+    assert ingest.llm_calls == 2 and ingest.model_s == pytest.approx(1.5)
+    assert ingest.overhead_s == pytest.approx(1.0)
+    assert query.embed_requests == 1 and query.overhead_s == pytest.approx(1.5)
+
+    [row, _] = summarize([ingest, query])
+    assert row["overhead_share"] == pytest.approx(0.4)
+    assert "overhead %" in format_table([row])
+
+
+def test_tree_of_thoughts_runs_end_to_end_against_the_fake_server(fake, tmp_path):
+    [result] = run_app(fake, SCENARIOS["tree_of_thoughts_agent"], tmp_path)
+    # Level 1: 3 openings + 3 scores; level 2: 2 beams x 3 continuations + 6 scores
+    assert result.llm_calls == 18
+    assert result.completion_tokens > 0
+    assert 0 < result.model_s < result.wall_s
+    assert "FINAL SELECTED PATH" in (tmp_path / "tree_of_thoughts_agent.log").read_text()
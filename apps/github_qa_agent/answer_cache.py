@@ -0,0 +1,88 @@
+# answer_cache.py
+# Semantic answer cache for the GitHub QA agent.
+# Questions are embedded and compared (cosine similarity) with the questions answered before;
+# a close enough match returns the stored answer and sources without running the LLM.
+# Entries expire after a TTL and the least recently used ones are evicted past `max_entries`.
+# The cache lives in memory and is built after the index is synced, so it only ever holds answers
+# for one index version (`version`, reported by the HTTP server's /health).
+# It is safe to use from several threads (the HTTP server looks questions up concurrently).
+
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+DEFAULT_THRESHOLD = 0.95
+DEFAULT_TTL_SECONDS = 3600
+DEFAULT_MAX_ENTRIES = 512
+
+
+class SemanticAnswerCache:
+    """Maps question embeddings to retrieval chain results."""
+
+    def __init__(self, embeddings, threshold=DEFAULT_THRESHOLD, ttl=DEFAULT_TTL_SECONDS,
+                 max_entries=DEFAULT_MAX_ENTRIES, version=""):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        # question -> (normalised embedding, result, stored_at)
+        self._entries = OrderedDict()
+        # The embedding of the last looked-up question, reused when its answer is stored.
+        self._last = (None, None)
+        self._lock = threading.Lock()
+
+    def lookup(self, question: str) -> dict | None:
+        """
+        Returns the cached result of the most similar previous question, with its similarity
+        under `"cache_similarity"`, or None if no live entry reaches the threshold.
+        """
+        query = self._embed(question)
+        with self._lock:
+            self._expire()
+            if not self._entries:
+                self.misses += 1
+                return None
+            questions = list(self._entries)
+            matrix = np.stack([self._entries[q][0] for q in questions])
+            scores = matrix @ query
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(questions[best])
+            result = self._entries[questions[best]][1]
+        return {**result, "input": question, "cache_similarity": float(scores[best])}
+
+    def store(self, question: str, result: dict):
+        vector = self._embed(question)
+        with self._lock:
+            self._entries[question] = (vector, result, time.monotonic())
+            self._entries.move_to_end(question)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _embed(self, question):
+        last_question, last_vector = self._last
+        if last_question == question:
+            return last_vector
+        vector = np.asarray(self.embeddings.embed_query(question), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        vector = vector / norm if norm else vector
+        self._last = (question, vector)
+        return vector
+
+    def _expire(self):
+        if not self.ttl:
+            return
+        deadline = time.monotonic() - self.ttl
+        for question in [q for q, (_, _, stored_at) in self._entries.items() if stored_at < deadline]:
+            del self._entries[question]
@@ -0,0 +1,215 @@
+# chunker.py
+# Language-aware chunking for the GitHub QA agent.
+# Python files are split along their AST (functions, classes and methods, with the enclosing
+# class signature repeated in front of each method chunk), Markdown files by heading and
+# TOML/lock files by table. Small neighbouring pieces are packed together up to `chunk_size`
+# and there is no overlap, so each chunk is a coherent unit and nothing is embedded twice.
+# Every chunk records the lines it came from in `start_line`/`end_line`.
+
+import ast
+import hashlib
+import json
+import re
+from itertools import accumulate
+from pathlib import Path
+
+from langchain_core.documents import Document
+
+DEFAULT_CHUNK_SIZE = 2000
+DEFAULT_CACHE_ENTRIES = 10_000
+
+MARKDOWN_HEADING = re.compile(r"^#{1,6}\s")
+MARKDOWN_FENCE = re.compile(r"^\s*(```|~~~)")
+TOML_TABLE = re.compile(r"^\s*\[\[?[^\[\]]+\]\]?\s*(#.*)?$")
+
+
+class CodeAwareSplitter:
+    """
+    Splits documents according to the language of their `path` metadata.
+    Chunk boundaries are cached by file content hash, so identical content is only parsed once;
+    pass `cache_path` to keep that cache across runs and call `save_cache()` when done.
+    """
+
+    def __init__(self, chunk_size=DEFAULT_CHUNK_SIZE, cache_path=None, max_cache_entries=DEFAULT_CACHE_ENTRIES):
+        self.chunk_size = chunk_size
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.max_cache_entries = max_cache_entries
+        self._boundaries = {}
+        if self.cache_path and self.cache_path.exists():
+            data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+            if data.get("chunk_size") == chunk_size:
+                self._boundaries = data.get("files", {})
+
+    @property
+    def fingerprint(self) -> str:
+        """Identifies the chunking strategy; an index built with another fingerprint must be rebuilt."""
+        return f"code-aware-v1:{self.chunk_size}"
+
+    def split_documents(self, documents: list[Document]) -> list[Document]:
+        chunks = []
+        for document in documents:
+            chunks.extend(self.split_document(document))
+        return chunks
+
+    def split_document(self, document: Document) -> list[Document]:
+        text = document.page_content
+        lines = text.splitlines(keepends=True)
+        path = document.metadata.get("path") or document.metadata.get("source", "")
+        key = f"{Path(path).suffix}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+        spans = self._boundaries.get(key)
+        if spans is None:
+            source = _Lines(lines)
+            spans = self._pack(self._segments(path, text, source), source)
+            self._remember(key, spans)
+
+        chunks = []
+        for start, end, prefix in spans:
+            content = prefix + "".join(lines[start - 1:end])
+            if not content.strip():
+                continue
+            metadata = {**document.metadata, "start_line": start, "end_line": end}
+            chunks.append(Document(page_content=content, metadata=metadata))
+        return chunks
+
+    def save_cache(self):
+        if not self.cache_path:
+            return
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"chunk_size": self.chunk_size, "files": self._boundaries}
+        self.cache_path.write_text(json.dumps(payload), encoding="utf-8")
+
+    def _remember(self, key, spans):
+        self._boundaries[key] = spans
+        while len(self._boundaries) > self.max_cache_entries:
+            self._boundaries.pop(next(iter(self._boundaries)))
+
+    # --- Segmentation ---
+    # A segment is (start_line, end_line, prefix, header_end): the lines it covers (1-based,
+    # inclusive), text repeated in front of it (e.g. the enclosing class signature) and the last
+    # line of its own header (signature, heading or table name), repeated if it must be cut.
+
+    def _segments(self, path, text, source):
+        lines = source.lines
+        if path.endswith(".py"):
+            try:
+                return self._python_segments(ast.parse(text), source)
+            except (SyntaxError, ValueError):
+                pass
+        elif path.endswith((".md", ".markdown")):
+            return self._header_segments(lines, self._markdown_headings(lines))
+        elif path.endswith((".toml", ".lock")):
+            return self._header_segments(lines, [i for i, line in enumerate(lines, 1) if TOML_TABLE.match(line)])
+        return [(1, len(lines), "", 0)]
+
+    def _python_segments(self, tree, source):
+        segments = []
+        cursor = 1
+        for node in tree.body:
+            # Comments and blank lines above a definition travel with it.
+            segments.extend(self._node_segments(node, cursor, "", source))
+            cursor = node.end_lineno + 1
+        if cursor <= len(source.lines):
+            segments.append((cursor, len(source.lines), "", cursor - 1))
+        return segments
+
+    def _node_segments(self, node, start, prefix, source):
+        end = node.end_lineno
+        body = getattr(node, "body", None)
+        is_definition = isinstance(node, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef))
+        header_end = body[0].lineno - 1 if is_definition and body else start - 1
+        # Single-line definitions have their body on the header line.
+        header_end = max(header_end, start - 1)
+        if not isinstance(node, ast.ClassDef) or source.size(start, end) + len(prefix) <= self.chunk_size:
+            return [(start, end, prefix, header_end)]
+
+        # Oversized class: one segment per member, each carrying the class signature.
+        signature = prefix + source.text(min(self._first_line(node), header_end), header_end)
+        segments = []
+        cursor = start
+        for i, child in enumerate(node.body):
+            child_prefix = prefix if i == 0 else signature
+            segments.extend(self._node_segments(child, cursor, child_prefix, source))
+            cursor = child.end_lineno + 1
+        return segments
+
+    @staticmethod
+    def _first_line(node):
+        return min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+
+    @staticmethod
+    def _markdown_headings(lines):
+        headings = []
+        in_fence = False
+        for i, line in enumerate(lines, 1):
+            if MARKDOWN_FENCE.match(line):
+                in_fence = not in_fence
+            elif not in_fence and MARKDOWN_HEADING.match(line):
+                headings.append(i)
+        return headings
+
+    @staticmethod
+    def _header_segments(lines, header_lines):
+        starts = [1] + [i for i in header_lines if i > 1]
+        header_lines = set(header_lines)
+        segments = []
+        for start, next_start in zip(starts, starts[1:] + [len(lines) + 1]):
+            header_end = start if start in header_lines else start - 1
+            segments.append((start, next_start - 1, "", header_end))
+        return segments
+
+    # --- Packing ---
+
+    def _pack(self, segments, source):
+        """Merges consecutive small segments that share a prefix and cuts oversized ones by lines."""
+        spans = []
+        current = None
+        for start, end, prefix, header_end in segments:
+            if end < start:
+                continue
+            if source.size(start, end) + len(prefix) > self.chunk_size:
+                if current:
+                    spans.append(current)
+                    current = None
+                spans.extend(self._cut(source, start, end, prefix, header_end))
+                continue
+            if current and current[2] == prefix and source.size(current[0], end) + len(prefix) <= self.chunk_size:
+                current[1] = end
+            else:
+                if current:
+                    spans.append(current)
+                current = [start, end, prefix]
+        if current:
+            spans.append(current)
+        return spans
+
+    def _cut(self, source, start, end, prefix, header_end):
+        header = source.text(start, header_end) if header_end >= start else ""
+        spans = []
+        piece_start = start
+        piece_prefix = prefix
+        size = len(prefix)
+        for i in range(start, end + 1):
+            line_size = source.size(i, i)
+            if i > piece_start and size + line_size > self.chunk_size:
+                spans.append([piece_start, i - 1, piece_prefix])
+                piece_start = i
+                piece_prefix = prefix + header
+                size = len(piece_prefix)
+            size += line_size
+        spans.append([piece_start, end, piece_prefix])
+        return spans
+
+
+class _Lines:
+    """The lines of a file with prefix sums, so the size of any line span is O(1)."""
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.offsets = [0, *accumulate(len(line) for line in lines)]
+
+    def size(self, start, end):
+        return self.offsets[end] - self.offsets[start - 1]
+
+    def text(self, start, end):
+        return "".join(self.lines[start - 1:end])
@@ -0,0 +1,215 @@
+# context_packer.py
+# Context assembly for the GitHub QA agent.
+# The retrieved chunks are packed before they are stuffed into the system prompt:
+# chunks from the same file that touch or overlap (by `start_line`/`end_line`) are merged into one
+# block, license headers and lockfile hashes are stripped, the blocks are cut to a token budget
+# derived from the model's context window, and the result is ordered by file and line. A stable
+# order lets Ollama reuse the prompt-prefix KV cache when a follow-up question retrieves the
+# same chunks, and a shorter context means less prompt-eval time.
+
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from langchain_core.documents import Document
+
+from hybrid_retriever import estimate_tokens
+
+# Ollama's context window when `num_ctx` is not set on the model.
+DEFAULT_NUM_CTX = 4096
+# Tokens kept free for the answer (unless the model sets `num_predict`) and for the prompt around the context.
+ANSWER_RESERVE_TOKENS = 1024
+PROMPT_RESERVE_TOKENS = 256
+MIN_BUDGET_TOKENS = 256
+
+LICENSE_MARKERS = re.compile(r"licen[cs]e|copyright|spdx-license-identifier|permission is hereby granted", re.IGNORECASE)
+COMMENT_LINE = re.compile(r"^\s*(#|//|/\*|\*|--|;)")
+MARKDOWN_HEADING = re.compile(r"^#{1,6}\s")
+MARKDOWN_LICENSE_HEADING = re.compile(r"^#{1,6}\s*licen[cs]e\b", re.IGNORECASE)
+LOCKFILE_NAMES = {
+    "poetry.lock", "uv.lock", "Pipfile.lock", "package-lock.json", "yarn.lock", "pnpm-lock.yaml",
+    "Cargo.lock", "Gemfile.lock", "composer.lock",
+}
+# Hashes, checksums and download URLs: long, unique strings that never help answer a question.
+LOCKFILE_NOISE = re.compile(
+    r"^\s*\"?(hash|content-hash|checksum|integrity|resolved)\"?\s*[=:]|sha(1|256|384|512)[:-][A-Za-z0-9+/=]{16,}",
+    re.IGNORECASE,
+)
+
+
+def is_lockfile(path: str) -> bool:
+    return Path(path).name in LOCKFILE_NAMES or path.endswith(".lock")
+
+
+def _body_lines(document: Document) -> list[str] | None:
+    """
+    The lines of the chunk that belong to its `start_line`-`end_line` range (without a repeated prefix),
+    or None when the text has fewer lines than the range, i.e. the span does not describe the text.
+    """
+    lines = document.page_content.splitlines(keepends=True)
+    count = document.metadata["end_line"] - document.metadata["start_line"] + 1
+    return lines[-count:] if 0 < count <= len(lines) else None
+
+
+def _can_merge(block: Document, document: Document) -> bool:
+    """
+    True when `document` continues `block`: both spans match their text and the lines they share
+    are the same, so a stale span (e.g. from an older version of the file) never hides a chunk.
+    """
+    block_lines, body = _body_lines(block), _body_lines(document)
+    if block_lines is None or body is None:
+        return False
+    block_start, start = block.metadata["start_line"], document.metadata["start_line"]
+    shared = range(start, min(block.metadata["end_line"], document.metadata["end_line"]) + 1)
+    return all(body[i - start].rstrip("\n") == block_lines[i - block_start].rstrip("\n") for i in shared)
+
+
+def merge_adjacent(documents: list[Document]) -> list[tuple[int, Document]]:
+    """
+    Merges chunks of the same file whose line ranges overlap or touch, keeping the text of each line once.
+    Returns `(rank, Document)` pairs, where rank is the best retrieval rank among the merged chunks.
+    """
+    merged = []
+    by_path = {}
+    for rank, document in enumerate(documents):
+        metadata = document.metadata
+        if "path" in metadata and "start_line" in metadata and "end_line" in metadata:
+            by_path.setdefault(metadata["path"], []).append((rank, document))
+        else:
+            merged.append((rank, document))
+
+    for chunks in by_path.values():
+        chunks.sort(key=lambda item: (item[1].metadata["start_line"], item[1].metadata["end_line"]))
+        current = None
+        for rank, document in chunks:
+            start, end = document.metadata["start_line"], document.metadata["end_line"]
+            if current and start <= current[1].metadata["end_line"] + 1 and _can_merge(current[1], document):
+                best, block = current
+                block_end = block.metadata["end_line"]
+                if end > block_end:
+                    text = block.page_content if block.page_content.endswith("\n") else block.page_content + "\n"
+                    block.page_content = text + "".join(_body_lines(document)[block_end - start + 1:])
+                    block.metadata["end_line"] = end
+                current = (min(best, rank), block)
+            else:
+                if current:
+                    merged.append(current)
+                current = (rank, Document(page_content=document.page_content, metadata=dict(document.metadata),
+                                          id=document.id))
+        merged.append(current)
+    return merged
+
+
+def strip_boilerplate(text: str, path: str, start_line: int | None = None, keep_license: bool = False) -> str:
+    """
+    Removes a license comment block at the top of a file, Markdown "License" sections and lockfile
+    hashes, and collapses runs of blank lines.
+    """
+    lines = text.splitlines(keepends=True)
+    is_markdown = path.endswith((".md", ".markdown"))
+    if not keep_license:
+        if start_line in (None, 1) and not is_markdown:
+            first = 1 if lines and lines[0].startswith("#!") else 0
+            end = first
+            while end < len(lines) and (COMMENT_LINE.match(lines[end]) or not lines[end].strip()):
+                end += 1
+            if LICENSE_MARKERS.search("".join(lines[first:end])):
+                lines = lines[:first] + lines[end:]
+        if is_markdown:
+            kept = []
+            in_license = False
+            for line in lines:
+                if MARKDOWN_HEADING.match(line):
+                    in_license = bool(MARKDOWN_LICENSE_HEADING.match(line))
+                if not in_license:
+                    kept.append(line)
+            lines = kept
+    if is_lockfile(path):
+        lines = [line for line in lines if not LOCKFILE_NOISE.search(line)]
+
+    compacted = []
+    for line in lines:
+        if not line.strip() and compacted and not compacted[-1].strip():
+            continue
+        compacted.append(line)
+    text = "".join(compacted)
+    return text.strip("\n") + "\n" if text.strip() else ""
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Keeps whole lines from the start of `text` within `max_tokens`."""
+    kept = []
+    used = 0
+    for line in text.splitlines(keepends=True):
+        used += estimate_tokens(line)
+        if used > max_tokens and kept:
+            break
+        kept.append(line)
+    return "".join(kept)
+
+
+@dataclass
+class PackedContext:
+    documents: list[Document] = field(default_factory=list)
+    retrieved_chunks: int = 0
+    retrieved_tokens: int = 0
+    tokens: int = 0
+    dropped: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.retrieved_chunks} chunks packed into {len(self.documents)} blocks, "
+            f"~{self.retrieved_tokens} -> ~{self.tokens} tokens"
+            + (f" ({self.dropped} over budget)" if self.dropped else "")
+        )
+
+
+class ContextPacker:
+    """Merges, cleans, budgets and orders retrieved chunks for the stuff-documents chain."""
+
+    def __init__(self, token_budget: int):
+        self.token_budget = token_budget
+
+    @classmethod
+    def for_model(cls, llm, token_budget: int | None = None) -> "ContextPacker":
+        """
+        Sizes the budget from the model's context window (`num_ctx`, or Ollama's default), minus
+        room for the answer (`num_predict`) and the rest of the prompt. `token_budget` overrides it.
+        """
+        if token_budget:
+            return cls(token_budget)
+        num_ctx = getattr(llm, "num_ctx", None) or DEFAULT_NUM_CTX
+        num_predict = getattr(llm, "num_predict", None)
+        answer_reserve = num_predict if num_predict and num_predict > 0 else ANSWER_RESERVE_TOKENS
+        return cls(max(MIN_BUDGET_TOKENS, num_ctx - answer_reserve - PROMPT_RESERVE_TOKENS))
+
+    def pack(self, documents: list[Document], question: str = "") -> PackedContext:
+        """
+        Packs `documents`, given in retrieval order. Blocks are admitted by their best rank until
+        the budget is reached (the best one is truncated if it alone is too large), then sorted by
+        file and line.
+        """
+        packed = PackedContext(retrieved_chunks=len(documents),
+                               retrieved_tokens=sum(estimate_tokens(d.page_content) for d in documents))
+        keep_license = bool(LICENSE_MARKERS.search(question))
+        blocks = []
+        for rank, document in merge_adjacent(documents):
+            path = document.metadata.get("path", "")
+            text = strip_boilerplate(document.page_content, path, document.metadata.get("start_line"), keep_license)
+            if text:
+                document.page_content = text
+                blocks.append((rank, document))
+
+        for _, document in sorted(blocks, key=lambda item: item[0]):
+            tokens = estimate_tokens(document.page_content)
+            if packed.tokens + tokens > self.token_budget:
+                if packed.documents:
+                    packed.dropped += 1
+                    continue
+                document.page_content = truncate_to_tokens(document.page_content, self.token_budget)
+                tokens = estimate_tokens(document.page_content)
+            packed.documents.append(document)
+            packed.tokens += tokens
+
+        packed.documents.sort(key=lambda d: (d.metadata.get("path", ""), d.metadata.get("start_line", 0), d.page_content))
+        return packed
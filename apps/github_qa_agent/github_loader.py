@@ -0,0 +1,215 @@
+# github_loader.py
+# Streaming GitHub loader for the QA agent.
+# Lists the repository with a single git tree request (sent with If-None-Match, so an
+# unchanged branch costs a free 304), falling back to walking the subtrees one level at a
+# time when GitHub truncates the recursive listing, then downloads only the requested blobs with a
+# bounded pool of workers and yields them one by one as Documents. Oversized files are
+# skipped, or sampled when they are lockfiles, instead of being pulled into memory whole.
+
+import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+import requests
+from requests.adapters import HTTPAdapter
+from langchain_core.documents import Document
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_MAX_FILE_SIZE = 200_000
+DEFAULT_SAMPLE_SIZE = 16_000
+DEFAULT_SAMPLE_SUFFIXES = (".lock",)
+
+
+class StreamingGithubLoader:
+    """
+    Loads files from a GitHub repository through the git tree and blob APIs.
+    Exposes the same `get_file_paths()` listing as `GithubFileLoader`, plus `iter_documents(files)`
+    to fetch a subset of those files in parallel.
+    """
+
+    def __init__(
+        self,
+        repo: str,
+        branch: str = "main",
+        access_token: str | None = None,
+        github_api_url: str = "https://api.github.com",
+        file_filter: Callable[[str], bool] | None = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        max_file_size: int = DEFAULT_MAX_FILE_SIZE,
+        sample_size: int = DEFAULT_SAMPLE_SIZE,
+        sample_suffixes: tuple[str, ...] = DEFAULT_SAMPLE_SUFFIXES,
+        etag_cache_path: Path | None = None,
+        session: requests.Session | None = None,
+    ):
+        self.repo = repo
+        self.branch = branch
+        self.access_token = access_token
+        self.github_api_url = github_api_url.rstrip("/")
+        self.file_filter = file_filter
+        self.max_workers = max_workers
+        self.max_file_size = max_file_size
+        self.sample_size = sample_size
+        self.sample_suffixes = sample_suffixes
+        self.etag_cache_path = Path(etag_cache_path) if etag_cache_path else None
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # True when the last tree request was answered with 304 Not Modified.
+        self.tree_unchanged = False
+        self.skipped_files = []
+
+    @property
+    def headers(self) -> dict:
+        headers = {"Accept": "application/vnd.github+json"}
+        if self.access_token:
+            headers["Authorization"] = f"Bearer {self.access_token}"
+        return headers
+
+    def get_file_paths(self) -> list[dict]:
+        """
+        Returns the tree entries of the blobs that pass `file_filter`.
+        The tree is requested with the ETag of the previous run; on a 304 the cached tree is reused.
+        A truncated recursive listing is completed with `walk_tree`, so callers that delete what is
+        not listed (see `IncrementalIndexer.sync`) never act on a partial tree.
+        """
+        url = f"{self.github_api_url}/repos/{self.repo}/git/trees/{self.branch}?recursive=1"
+        etags = self._load_etags()
+        cached = etags.get(url)
+
+        headers = self.headers
+        if cached:
+            headers["If-None-Match"] = cached["etag"]
+        response = self.session.get(url, headers=headers)
+        if response.status_code == 304 and cached:
+            self.tree_unchanged = True
+            tree = cached["tree"]
+        else:
+            response.raise_for_status()
+            self.tree_unchanged = False
+            data = response.json()
+            if data.get("truncated"):
+                print(f"   The tree of {self.repo} is too large for one request, listing it directory by directory.")
+                tree = self.walk_tree(data["sha"])
+            else:
+                tree = [_tree_entry(entry) for entry in data["tree"] if entry.get("type") == "blob"]
+            if response.headers.get("ETag"):
+                etags[url] = {"etag": response.headers["ETag"], "tree": tree}
+                self._save_etags(etags)
+
+        return [f for f in tree if not (self.file_filter and not self.file_filter(f["path"]))]
+
+    def walk_tree(self, tree_sha: str) -> list[dict]:
+        """
+        Lists every blob under the tree `tree_sha` with non-recursive tree requests, fetching the
+        subtrees of each level with up to `max_workers` concurrent requests.
+        Raises RuntimeError if even a single directory listing comes back truncated.
+        """
+        blobs = []
+        level = [("", tree_sha)]
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="github") as pool:
+            while level:
+                next_level = []
+                for (prefix, _), data in zip(level, pool.map(self._get_tree, [sha for _, sha in level])):
+                    if data.get("truncated"):
+                        raise RuntimeError(f"The git tree listing of '{prefix or '/'}' in {self.repo} is truncated")
+                    for entry in data["tree"]:
+                        entry = {**entry, "path": prefix + entry["path"]}
+                        if entry.get("type") == "tree":
+                            next_level.append((entry["path"] + "/", entry["sha"]))
+                        elif entry.get("type") == "blob":
+                            blobs.append(_tree_entry(entry))
+                level = next_level
+        return sorted(blobs, key=lambda f: f["path"])
+
+    def _get_tree(self, tree_sha: str) -> dict:
+        response = self.session.get(f"{self.github_api_url}/repos/{self.repo}/git/trees/{tree_sha}", headers=self.headers)
+        response.raise_for_status()
+        return response.json()
+
+    def iter_documents(self, files: Iterable[dict]) -> Iterator[Document]:
+        """
+        Downloads the given tree entries with up to `max_workers` concurrent requests and yields
+        a Document per file, in input order. At most `2 * max_workers` files are held in memory.
+        Binary, empty and oversized (non-sampled) files are skipped and listed in `skipped_files`.
+        """
+        files = iter(files)
+        in_flight = deque()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="github") as pool:
+            while True:
+                while len(in_flight) < 2 * self.max_workers:
+                    file = next(files, None)
+                    if file is None:
+                        break
+                    in_flight.append((file, pool.submit(self.fetch_blob, file)))
+                if not in_flight:
+                    return
+                file, future = in_flight.popleft()
+                content = future.result()
+                if not content:
+                    continue
+                yield Document(
+                    page_content=content,
+                    metadata={
+                        "path": file["path"],
+                        "sha": file["sha"],
+                        "source": f"{self.github_api_url}/{self.repo}/blob/{self.branch}/{file['path']}",
+                    },
+                )
+
+    def lazy_load(self) -> Iterator[Document]:
+        return self.iter_documents(self.get_file_paths())
+
+    def fetch_blob(self, file: dict) -> str | None:
+        """
+        Returns the text of a blob, or None if it is skipped.
+        Files above `max_file_size` are skipped unless their suffix is in `sample_suffixes`,
+        in which case only their first `sample_size` bytes are read.
+        """
+        size = file.get("size") or 0
+        sample = False
+        if size > self.max_file_size:
+            if not file["path"].endswith(self.sample_suffixes):
+                self.skipped_files.append(file["path"])
+                return None
+            sample = True
+
+        url = f"{self.github_api_url}/repos/{self.repo}/git/blobs/{file['sha']}"
+        headers = {**self.headers, "Accept": "application/vnd.github.raw+json"}
+        with self.session.get(url, headers=headers, stream=True) as response:
+            response.raise_for_status()
+            if sample:
+                raw = bytearray()
+                for block in response.iter_content(chunk_size=8192):
+                    raw.extend(block)
+                    if len(raw) >= self.sample_size:
+                        break
+                raw = bytes(raw[:self.sample_size])
+            else:
+                raw = response.content
+
+        try:
+            text = raw.decode("utf-8", errors="ignore" if sample else "strict")
+        except UnicodeDecodeError:
+            self.skipped_files.append(file["path"])
+            return None
+        if sample:
+            text += f"\n... [truncated: sampled {self.sample_size} of {size} bytes]\n"
+        return text
+
+    def _load_etags(self) -> dict:
+        if not self.etag_cache_path or not self.etag_cache_path.exists():
+            return {}
+        return json.loads(self.etag_cache_path.read_text(encoding="utf-8"))
+
+    def _save_etags(self, etags: dict):
+        if not self.etag_cache_path:
+            return
+        self.etag_cache_path.parent.mkdir(parents=True, exist_ok=True)
+        self.etag_cache_path.write_text(json.dumps(etags), encoding="utf-8")
+
+
+def _tree_entry(entry: dict) -> dict:
+    return {key: entry.get(key) for key in ("path", "sha", "size", "type")}
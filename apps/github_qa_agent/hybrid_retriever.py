@@ -0,0 +1,116 @@
+# hybrid_retriever.py
+# Hybrid retrieval for the GitHub QA agent.
+# Dense (vector) and BM25 (keyword) candidates are fused with reciprocal-rank fusion, so a chunk
+# that names the identifier in the question ranks high even when its embedding is not the
+# closest. An optional lexical rerank then favours chunks covering more of the question's terms,
+# and the final context is deduplicated and cut to a token budget before it reaches the LLM.
+
+import hashlib
+import re
+from typing import Any
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from keyword_index import tokenize
+
+DEFAULT_CANDIDATES = 20
+DEFAULT_RRF_K = 60
+CHARS_PER_TOKEN = 4
+# Identifiers written the way code writes them: snake_case, camelCase, dotted or CONSTANT names.
+CODE_IDENTIFIER = re.compile(r"_|[a-z][A-Z]|\.|^[A-Z0-9]{2,}$")
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def document_key(document: Document) -> str:
+    """The vector store id of a chunk, or a digest of its path and text when it has none."""
+    if document.id:
+        return document.id
+    key = f"{document.metadata.get('path', '')}\0{document.page_content}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+def reciprocal_rank_fusion(rankings: list[list[Document]], rrf_k: int = DEFAULT_RRF_K) -> list[tuple[Document, float]]:
+    """Fuses ranked lists: each document scores the sum of 1 / (rrf_k + rank) over the lists it appears in."""
+    scores = {}
+    documents = {}
+    for ranking in rankings:
+        for rank, document in enumerate(ranking, start=1):
+            key = document_key(document)
+            documents.setdefault(key, document)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+    order = sorted(scores, key=lambda key: (-scores[key], key))
+    return [(documents[key], scores[key]) for key in order]
+
+
+def lexical_rerank(query: str, fused: list[tuple[Document, float]], rrf_k: int = DEFAULT_RRF_K) -> list[tuple[Document, float]]:
+    """
+    Adds a term-coverage bonus to the fused scores: the share of the question's terms found in the
+    chunk, with code identifiers from the question that appear verbatim counting double. Full
+    coverage is worth as much as a first place in one more ranking.
+    """
+    terms = set(tokenize(query))
+    words = (word.strip(".") for word in re.findall(r"[\w.]+", query))
+    identifiers = {word for word in words if CODE_IDENTIFIER.search(word)}
+    if not terms:
+        return fused
+    weight = 1.0 / (rrf_k + 1)
+    reranked = []
+    for document, score in fused:
+        text = document.page_content
+        found = terms & set(tokenize(text))
+        verbatim = sum(1 for identifier in identifiers if identifier in text)
+        coverage = (len(found) + verbatim) / (len(terms) + len(identifiers))
+        reranked.append((document, score + weight * coverage))
+    return sorted(reranked, key=lambda item: -item[1])
+
+
+def budget_context(documents: list[Document], k: int, max_tokens: int | None = None) -> list[Document]:
+    """
+    Keeps up to `k` documents in rank order, skipping repeated texts (e.g. vendored copies) and
+    documents that would push the context over `max_tokens`. The best document is always kept.
+    """
+    selected = []
+    seen = set()
+    used = 0
+    for document in documents:
+        digest = hashlib.sha256(document.page_content.strip().encode("utf-8")).hexdigest()
+        if digest in seen:
+            continue
+        tokens = estimate_tokens(document.page_content)
+        if max_tokens and selected and used + tokens > max_tokens:
+            continue
+        seen.add(digest)
+        selected.append(document)
+        used += tokens
+        if len(selected) == k:
+            break
+    return selected
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Retrieves `candidates` chunks from both the vector store and the `BM25Index`, fuses them with
+    reciprocal-rank fusion, optionally reranks them lexically and returns at most `k` distinct
+    chunks within `max_context_tokens`.
+    """
+
+    vector_store: Any
+    keyword_index: Any
+    k: int = 4
+    candidates: int = DEFAULT_CANDIDATES
+    rrf_k: int = DEFAULT_RRF_K
+    rerank: bool = True
+    max_context_tokens: int | None = None
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> list[Document]:
+        dense = self.vector_store.similarity_search(query, k=self.candidates)
+        keyword = [document for document, _ in self.keyword_index.search(query, k=self.candidates)]
+        fused = reciprocal_rank_fusion([dense, keyword], self.rrf_k)
+        if self.rerank:
+            fused = lexical_rerank(query, fused, self.rrf_k)
+        return budget_context([document for document, _ in fused], self.k, self.max_context_tokens)
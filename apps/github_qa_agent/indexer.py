@@ -0,0 +1,248 @@
+# indexer.py
+# Incremental indexing for the GitHub QA agent.
+# A manifest records the blob SHA of every indexed file and the content hash of every
+# chunk produced from it. On each run only files whose SHA changed are downloaded, split
+# and embedded, chunks that did not change or move keep their ids, and chunks that no longer
+# exist upstream are deleted from the vector store (and from the keyword index, when there is one).
+
+import hashlib
+import json
+from dataclasses import dataclass
+from pathlib import Path
+
+from langchain_core.documents import Document
+
+MANIFEST_VERSION = 1
+
+
+def content_hash(text: str) -> str:
+    """Returns the sha256 hex digest of a chunk's text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunk_id(path: str, chunk_hash: str, occurrence: int = 0, start_line: int | None = None) -> str:
+    """
+    Builds a stable vector store id for a chunk.
+    The id depends on the file path, the chunk content and the line it starts at, so a chunk keeps
+    its id when an edit elsewhere leaves it in place, and is rewritten with its new `start_line`/
+    `end_line` metadata when lines above it were added or removed (its vector then comes from the
+    embedding cache). `occurrence` disambiguates identical chunks within the same file.
+    """
+    key = f"{path}\0{chunk_hash}\0{occurrence}"
+    if start_line is not None:
+        key += f"\0{start_line}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+class IndexManifest:
+    """Per-file blob SHAs and per-chunk content hashes of what is currently in the index."""
+
+    def __init__(self, path: Path, files: dict | None = None, fingerprint: str = ""):
+        self.path = Path(path)
+        # Identifies how the chunks were produced (see `CodeAwareSplitter.fingerprint`).
+        self.fingerprint = fingerprint
+        # {file_path: {"sha": blob_sha, "chunks": {chunk_id: content_hash}}}
+        self.files = files or {}
+
+    @classmethod
+    def load(cls, path: Path, fingerprint: str = "") -> "IndexManifest":
+        """
+        Loads the manifest at `path`. A missing manifest, or one written by another manifest
+        version or chunking `fingerprint`, yields an empty manifest so the index is rebuilt.
+        """
+        path = Path(path)
+        if not path.exists():
+            return cls(path, fingerprint=fingerprint)
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if data.get("version") != MANIFEST_VERSION or data.get("fingerprint", "") != fingerprint:
+            return cls(path, fingerprint=fingerprint)
+        return cls(path, data.get("files", {}), fingerprint)
+
+    def save(self):
+        # Write to a temporary file first so an interrupted run never leaves a truncated manifest.
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        payload = {"version": MANIFEST_VERSION, "fingerprint": self.fingerprint, "files": self.files}
+        tmp_path.write_text(json.dumps(payload, indent=2, sort_keys=True), encoding="utf-8")
+        tmp_path.replace(self.path)
+
+    def chunk_ids(self, path: str) -> list[str]:
+        return list(self.files.get(path, {}).get("chunks", {}))
+
+    def all_chunk_ids(self) -> list[str]:
+        return [cid for entry in self.files.values() for cid in entry.get("chunks", {})]
+
+    def clear(self):
+        self.files = {}
+
+    @property
+    def version(self) -> str:
+        """A digest of every indexed chunk id; it changes whenever the index content changes."""
+        return content_hash("\n".join(sorted(self.all_chunk_ids())))
+
+
+@dataclass
+class IndexStats:
+    unchanged_files: int = 0
+    updated_files: int = 0
+    removed_files: int = 0
+    added_chunks: int = 0
+    deleted_chunks: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.updated_files} files updated, {self.unchanged_files} unchanged, "
+            f"{self.removed_files} removed ({self.added_chunks} chunks embedded, "
+            f"{self.deleted_chunks} deleted)"
+        )
+
+
+class IncrementalIndexer:
+    """
+    Keeps a vector store in sync with a GitHub repository using an `IndexManifest`.
+    New chunks are embedded and written by an `EmbeddingPipeline`; a file's manifest entry is
+    only updated (and its stale chunks deleted) once all of its new chunks have been stored,
+    so an interrupted run is simply resumed by the next one.
+    An optional `keyword_index` (see `BM25Index`) is kept in step with the vector store: the
+    pipeline's upsert should also write to it (`BM25Index.with_upsert`), and deletions go to both.
+    """
+
+    def __init__(self, vector_store, splitter, manifest: IndexManifest, pipeline, keyword_index=None):
+        self.vector_store = vector_store
+        self.splitter = splitter
+        self.manifest = manifest
+        self.pipeline = pipeline
+        self.keyword_index = keyword_index
+
+    def reconcile(self):
+        """
+        Makes sure the manifest describes what is really stored in the collection.
+        An empty collection (e.g. a wiped volume) invalidates the manifest, and a collection
+        that was built without a manifest is cleared so its chunks don't get duplicated.
+        """
+        stored_ids = self.vector_store.get(include=[])["ids"]
+        if not stored_ids and self.manifest.files:
+            print("   Vector store is empty, discarding the stale index manifest.")
+            self.manifest.clear()
+        elif stored_ids and not self.manifest.files:
+            print(f"   Found {len(stored_ids)} chunks without a manifest, re-indexing from scratch.")
+            self.vector_store.delete(ids=stored_ids)
+        if self.keyword_index is not None:
+            self.reconcile_keyword_index()
+
+    def reconcile_keyword_index(self):
+        """
+        Makes the keyword index hold exactly the chunks in the manifest. Missing chunks (e.g. the
+        first run with a keyword index over an existing collection) are copied from the vector store.
+        """
+        expected = set(self.manifest.all_chunk_ids())
+        indexed = self.keyword_index.ids()
+        self.keyword_index.delete(sorted(indexed - expected))
+        missing = sorted(expected - indexed)
+        if missing:
+            print(f"   Adding {len(missing)} chunks to the keyword index.")
+            stored = self.vector_store.get(ids=missing, include=["documents", "metadatas"])
+            documents = [Document(page_content=text, metadata=metadata or {})
+                         for text, metadata in zip(stored["documents"], stored["metadatas"])]
+            self.keyword_index.upsert(stored["ids"], documents)
+
+    def sync(self, loader) -> IndexStats:
+        """
+        Brings the index up to date with the files listed by `loader`.
+        `loader` must provide `get_file_paths()`, returning git tree entries, and
+        `iter_documents(files)`, yielding a Document (with `path` and `sha` metadata) for each
+        of the given entries that has content, as `StreamingGithubLoader` does.
+        """
+        stats = IndexStats()
+        self.reconcile()
+
+        remote_files = {f["path"]: f for f in loader.get_file_paths()}
+        changed_files = []
+        for path, file in sorted(remote_files.items()):
+            entry = self.manifest.files.get(path)
+            if entry and entry["sha"] == file["sha"]:
+                stats.unchanged_files += 1
+            else:
+                changed_files.append(file)
+
+        # path -> (sha, chunks, ids still waiting to be written)
+        pending = {}
+        owners = {}
+
+        def commit(path):
+            sha, chunks, _ = pending.pop(path)
+            previous = self.manifest.files.get(path, {}).get("chunks", {})
+            stats.deleted_chunks += self._delete([cid for cid in previous if cid not in chunks])
+            self.manifest.files[path] = {"sha": sha, "chunks": chunks}
+            stats.updated_files += 1
+
+        def changed_chunks():
+            for document in loader.iter_documents(changed_files):
+                path = document.metadata["path"]
+                sha = document.metadata.pop("sha")
+                chunks, new_items = self.plan_document(document)
+                pending[path] = (sha, chunks, {cid for cid, _ in new_items})
+                if not new_items:
+                    commit(path)
+                    continue
+                for cid, _ in new_items:
+                    owners[cid] = path
+                yield from new_items
+
+        def on_written(ids):
+            stats.added_chunks += len(ids)
+            for cid in ids:
+                path = owners.pop(cid)
+                outstanding = pending[path][2]
+                outstanding.discard(cid)
+                if not outstanding:
+                    commit(path)
+
+        try:
+            # 1. Files deleted upstream: drop all of their chunks.
+            for path in sorted(set(self.manifest.files) - set(remote_files)):
+                stats.deleted_chunks += self._delete(self.manifest.chunk_ids(path))
+                del self.manifest.files[path]
+                stats.removed_files += 1
+
+            # 2. New or modified files: download, split and embed only the chunks that changed.
+            self.pipeline.run(changed_chunks(), on_written=on_written)
+
+            # 3. Changed files the loader skipped (empty, binary or too large) no longer have chunks.
+            for file in changed_files:
+                if file["path"] not in self.manifest.files or self.manifest.files[file["path"]]["sha"] != file["sha"]:
+                    pending[file["path"]] = (file["sha"], {}, set())
+                    commit(file["path"])
+        finally:
+            self.manifest.save()
+        return stats
+
+    def plan_document(self, document: Document) -> tuple[dict, list[tuple[str, Document]]]:
+        """
+        Splits a file and returns its full `{chunk_id: content_hash}` map together with the
+        `(chunk_id, Document)` pairs that are not in the index yet.
+        Chunks already in the manifest (same content at the same place) are neither re-embedded nor rewritten.
+        """
+        path = document.metadata["path"]
+        previous = self.manifest.files.get(path, {}).get("chunks", {})
+
+        chunks = {}
+        new_items = []
+        if document.page_content:
+            occurrences = {}
+            for split in self.splitter.split_documents([document]):
+                digest = content_hash(split.page_content)
+                occurrence = occurrences.get(digest, 0)
+                occurrences[digest] = occurrence + 1
+                cid = chunk_id(path, digest, occurrence, split.metadata.get("start_line"))
+                chunks[cid] = digest
+                if cid not in previous:
+                    new_items.append((cid, split))
+        return chunks, new_items
+
+    def _delete(self, ids: list[str]) -> int:
+        if ids:
+            self.vector_store.delete(ids=ids)
+            if self.keyword_index is not None:
+                self.keyword_index.delete(ids)
+        return len(ids)
@@ -0,0 +1,103 @@
+# ingest.py
+# Batched, pipelined embedding for bulk ingestion.
+# Chunks are grouped into batches, embedded by a bounded thread pool against Ollama and
+# upserted into the vector store by a single writer, so embedding batch N+1 overlaps with
+# writing batch N. Input is consumed lazily, so only the in-flight batches are held in memory.
+
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Callable, Iterable
+
+from langchain_core.documents import Document
+
+DEFAULT_BATCH_SIZE = 64
+DEFAULT_MAX_WORKERS = 4
+
+
+def chroma_upsert(collection) -> Callable:
+    """Returns an upsert function writing precomputed embeddings into a chromadb collection."""
+    def upsert(ids: list[str], vectors: list[list[float]], documents: list[Document]):
+        collection.upsert(
+            ids=ids,
+            embeddings=vectors,
+            documents=[d.page_content for d in documents],
+            metadatas=[d.metadata or None for d in documents],
+        )
+    return upsert
+
+
+def print_progress(written: int, elapsed: float):
+    rate = written / elapsed if elapsed else 0.0
+    print(f"   Embedded and stored {written} chunks ({rate:.1f} chunks/s)")
+
+
+class EmbeddingPipeline:
+    """
+    Embeds `(id, Document)` pairs in batches of `batch_size` with up to `max_workers`
+    concurrent requests, and hands each embedded batch to `upsert(ids, vectors, documents)`
+    in input order.
+    """
+
+    def __init__(self, embeddings, upsert: Callable, batch_size=DEFAULT_BATCH_SIZE,
+                 max_workers=DEFAULT_MAX_WORKERS, progress: Callable | None = print_progress):
+        self.embeddings = embeddings
+        self.upsert = upsert
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.progress = progress
+
+    def run(self, items: Iterable[tuple[str, Document]], on_written: Callable | None = None) -> int:
+        """
+        Embeds and stores all items and returns how many were written.
+        `on_written(ids)` is called after each batch has been upserted.
+        """
+        started = time.perf_counter()
+        written = 0
+        items = iter(items)
+        in_flight = deque()
+        write = None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="embed") as embed_pool, \
+                ThreadPoolExecutor(max_workers=1, thread_name_prefix="upsert") as write_pool:
+
+            def finish_write():
+                nonlocal written
+                ids = write.result()
+                written += len(ids)
+                if on_written:
+                    on_written(ids)
+                if self.progress:
+                    self.progress(written, time.perf_counter() - started)
+
+            def start_write(batch, vectors):
+                ids = [cid for cid, _ in batch]
+                documents = [doc for _, doc in batch]
+
+                def _write():
+                    self.upsert(ids, vectors, documents)
+                    return ids
+                return write_pool.submit(_write)
+
+            while True:
+                # Keep every embedding worker busy (plus one queued batch) without reading the whole input.
+                while len(in_flight) <= self.max_workers:
+                    batch = list(islice(items, self.batch_size))
+                    if not batch:
+                        break
+                    texts = [doc.page_content for _, doc in batch]
+                    in_flight.append((batch, embed_pool.submit(self.embeddings.embed_documents, texts)))
+                if not in_flight:
+                    break
+
+                batch, future = in_flight.popleft()
+                vectors = future.result()
+                # Only one write runs at a time; the next batches keep embedding meanwhile.
+                if write is not None:
+                    finish_write()
+                write = start_write(batch, vectors)
+
+            if write is not None:
+                finish_write()
+        return written
@@ -0,0 +1,171 @@
+# keyword_index.py
+# Local BM25 index over the same chunks as the vector store.
+# Dense retrieval is weak on exact identifiers (function names, config keys), so every chunk is
+# also tokenized for keyword search: identifiers are kept whole and split into their
+# snake_case/camelCase parts, so "verifyToken", "verify_token" and "verify token" all match.
+# Postings live in memory; chunks are persisted in an append-only JSONL log next to the vector
+# index (the same layout as local_store.py) and the log is compacted on load.
+
+import json
+import math
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Callable
+
+from langchain_core.documents import Document
+
+DEFAULT_K1 = 1.5
+DEFAULT_B = 0.75
+
+IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|\d+")
+CAMEL_PART = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+MIN_PART_LENGTH = 2
+
+
+def tokenize(text: str) -> list[str]:
+    """Lower-cased identifiers and words, followed by the parts of compound identifiers."""
+    tokens = []
+    for identifier in IDENTIFIER.findall(text):
+        tokens.append(identifier.lower())
+        parts = [p.lower() for piece in identifier.split("_") for p in CAMEL_PART.findall(piece)]
+        if len(parts) > 1:
+            tokens.extend(p for p in parts if len(p) >= MIN_PART_LENGTH)
+    return tokens
+
+
+class BM25Index:
+    """
+    Okapi BM25 over chunks keyed by the same ids as the vector store.
+    `upsert(ids, documents)` and `delete(ids)` update the index incrementally; scores are
+    computed at query time from the postings, so no rebuild is needed after an update.
+    """
+
+    def __init__(self, path, k1=DEFAULT_K1, b=DEFAULT_B):
+        self.path = Path(path)
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        # id -> (Document, token count)
+        self._documents = {}
+        # term -> {id: term frequency}
+        self._postings = {}
+        self._total_length = 0
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def ids(self) -> set[str]:
+        with self._lock:
+            return set(self._documents)
+
+    # --- Writing ---
+
+    def upsert(self, ids: list[str], documents: list[Document]):
+        records = []
+        with self._lock:
+            for cid, document in zip(ids, documents):
+                self._add(cid, document)
+                records.append({"op": "put", "id": cid, "text": document.page_content,
+                                "metadata": document.metadata or {}})
+            self._append_log(records)
+
+    def delete(self, ids: list[str]):
+        with self._lock:
+            records = [{"op": "del", "id": cid} for cid in ids if self._remove(cid)]
+            if records:
+                self._append_log(records)
+
+    def with_upsert(self, upsert: Callable) -> Callable:
+        """Wraps a vector store upsert (`EmbeddingPipeline` signature) so every stored chunk is also indexed here."""
+        def both(ids: list[str], vectors: list[list[float]], documents: list[Document]):
+            upsert(ids, vectors, documents)
+            self.upsert(ids, documents)
+        return both
+
+    # --- Reading ---
+
+    def search(self, query: str, k: int = 4) -> list[tuple[Document, float]]:
+        """Returns the `k` best BM25 matches for `query`, best first."""
+        terms = Counter(tokenize(query))
+        with self._lock:
+            n = len(self._documents)
+            if not n or not terms:
+                return []
+            average_length = self._total_length / n
+            scores = {}
+            for term, query_count in terms.items():
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                for cid, tf in postings.items():
+                    length = self._documents[cid][1]
+                    norm = tf + self.k1 * (1 - self.b + self.b * length / average_length)
+                    scores[cid] = scores.get(cid, 0.0) + query_count * idf * tf * (self.k1 + 1) / norm
+            best = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+            return [(self._copy(cid), score) for cid, score in best]
+
+    def _copy(self, cid) -> Document:
+        document = self._documents[cid][0]
+        return Document(page_content=document.page_content, metadata=dict(document.metadata), id=cid)
+
+    # --- Postings ---
+
+    def _add(self, cid, document):
+        self._remove(cid)
+        counts = Counter(tokenize(document.page_content))
+        length = sum(counts.values())
+        self._documents[cid] = (Document(page_content=document.page_content, metadata=dict(document.metadata or {})), length)
+        self._total_length += length
+        for term, tf in counts.items():
+            self._postings.setdefault(term, {})[cid] = tf
+
+    def _remove(self, cid) -> bool:
+        entry = self._documents.pop(cid, None)
+        if entry is None:
+            return False
+        document, length = entry
+        self._total_length -= length
+        for term in set(tokenize(document.page_content)):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(cid, None)
+                if not postings:
+                    del self._postings[term]
+        return True
+
+    # --- Persistence ---
+
+    def _append_log(self, records):
+        if not records:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if record["op"] == "put":
+                    self._add(record["id"], Document(page_content=record["text"], metadata=record["metadata"]))
+                elif record["op"] == "del":
+                    self._remove(record["id"])
+        self._compact_log()
+
+    def _compact_log(self):
+        """Rewrites the log with only the live chunks."""
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for cid, (document, _) in self._documents.items():
+                record = {"op": "put", "id": cid, "text": document.page_content, "metadata": document.metadata}
+                f.write(json.dumps(record) + "\n")
+        tmp_path.replace(self.path)
@@ -0,0 +1,95 @@
+# local_loader.py
+# Loads a local checkout instead of the GitHub API, with the same interface as
+# StreamingGithubLoader. Files are identified by their git blob SHA, computed from their content,
+# so the incremental indexer skips unchanged files exactly as it does for a remote repository.
+# Used when LOCAL_REPO_PATH is set: no GitHub token and no network are needed.
+
+import hashlib
+import os
+import subprocess
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+from langchain_core.documents import Document
+
+from github_loader import DEFAULT_MAX_FILE_SIZE, DEFAULT_SAMPLE_SIZE, DEFAULT_SAMPLE_SUFFIXES
+
+
+def git_blob_sha(content: bytes) -> str:
+    """The SHA git (and the GitHub tree API) uses for a blob with this content."""
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+
+class LocalRepoLoader:
+    """
+    Lists the files of a directory (the tracked files, when it is a git checkout) and yields them
+    as Documents with `path` (relative, POSIX) and `sha` metadata. Binary files and files above
+    `max_file_size` are skipped, except lockfiles, which are sampled.
+    """
+
+    def __init__(
+        self,
+        root,
+        file_filter: Callable[[str], bool] | None = None,
+        max_file_size: int = DEFAULT_MAX_FILE_SIZE,
+        sample_size: int = DEFAULT_SAMPLE_SIZE,
+        sample_suffixes: tuple[str, ...] = DEFAULT_SAMPLE_SUFFIXES,
+    ):
+        self.root = Path(root).resolve()
+        self.file_filter = file_filter
+        self.max_file_size = max_file_size
+        self.sample_size = sample_size
+        self.sample_suffixes = sample_suffixes
+        self.skipped_files = []
+
+    def get_file_paths(self) -> list[dict]:
+        """Returns git-tree-like entries (`path`, `sha`, `size`, `type`) for the files that pass `file_filter`."""
+        files = []
+        for path in self._list_files():
+            if self.file_filter and not self.file_filter(path):
+                continue
+            content = (self.root / path).read_bytes()
+            files.append({"path": path, "sha": git_blob_sha(content), "size": len(content), "type": "blob"})
+        return files
+
+    def iter_documents(self, files: Iterable[dict]) -> Iterator[Document]:
+        for file in files:
+            text = self.read(file)
+            if text:
+                yield Document(
+                    page_content=text,
+                    metadata={"path": file["path"], "sha": file["sha"], "source": str(self.root / file["path"])},
+                )
+
+    def lazy_load(self) -> Iterator[Document]:
+        return self.iter_documents(self.get_file_paths())
+
+    def read(self, file: dict) -> str | None:
+        """Returns the text of a file, or None if it is skipped (binary, or too large and not sampled)."""
+        content = (self.root / file["path"]).read_bytes()
+        sample = len(content) > self.max_file_size
+        if sample:
+            if not file["path"].endswith(self.sample_suffixes):
+                self.skipped_files.append(file["path"])
+                return None
+            content = content[:self.sample_size]
+        try:
+            text = content.decode("utf-8", errors="ignore" if sample else "strict")
+        except UnicodeDecodeError:
+            self.skipped_files.append(file["path"])
+            return None
+        if sample:
+            text += f"\n... [truncated: sampled {self.sample_size} of {file['size']} bytes]\n"
+        return text
+
+    def _list_files(self) -> list[str]:
+        try:
+            result = subprocess.run(["git", "ls-files", "-z"], cwd=self.root, capture_output=True, check=True)
+            paths = [p for p in result.stdout.decode("utf-8").split("\0") if p]
+        except (OSError, subprocess.CalledProcessError):
+            paths = []
+            for directory, subdirectories, names in os.walk(self.root):
+                subdirectories[:] = sorted(d for d in subdirectories if not d.startswith(".") and d != "__pycache__")
+                for name in names:
+                    paths.append((Path(directory) / name).relative_to(self.root).as_posix())
+        return sorted(p for p in paths if (self.root / p).is_file())
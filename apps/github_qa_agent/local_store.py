@@ -0,0 +1,290 @@
+# local_store.py
+# In-process vector store for single-node deployments of the GitHub QA agent.
+# Embeddings live in a memory-mapped float32 matrix (one L2-normalised row per chunk), and
+# ids, texts and metadata in an append-only JSONL sidecar that is replayed on startup.
+# Queries are a single matrix-vector product plus a partial sort, with no HTTP or JSON hop;
+# large corpora can switch to an IVF (inverted file) index that only scans the closest clusters.
+
+import json
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Iterable
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+VECTORS_FILE = "vectors.f32"
+LOG_FILE = "records.jsonl"
+MIN_CAPACITY = 1024
+DEFAULT_IVF_MIN_SIZE = 50_000
+DEFAULT_NPROBE = 8
+
+
+class LocalVectorStore(VectorStore):
+    """
+    A LangChain `VectorStore` backed by a NumPy memmap, searched by cosine similarity.
+    It implements the subset of the Chroma wrapper used by the agent (`get`, `delete`,
+    `add_texts`, `as_retriever`) plus `upsert` for precomputed embeddings.
+    When `ivf_min_size` is set and the store holds at least that many vectors, searches go
+    through an IVF index with `nprobe` probed lists instead of a full scan.
+    """
+
+    def __init__(self, directory, embedding_function, ivf_min_size=DEFAULT_IVF_MIN_SIZE, nprobe=DEFAULT_NPROBE):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.embedding_function = embedding_function
+        self.ivf_min_size = ivf_min_size
+        self.nprobe = nprobe
+        self._lock = threading.RLock()
+        self._dim = None
+        self._matrix = None
+        self._capacity = 0
+        self._slots = {}
+        self._ids = []
+        self._texts = []
+        self._metadatas = []
+        self._alive = np.zeros(0, dtype=bool)
+        self._free = []
+        self._ivf = None
+        self._load()
+
+    @property
+    def embeddings(self):
+        return self.embedding_function
+
+    # --- Writing ---
+
+    def upsert(self, ids: list[str], vectors: list[list[float]], documents: list[Document]):
+        """Stores precomputed embeddings; matches the `EmbeddingPipeline` upsert signature."""
+        if not ids:
+            return
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            if self._dim is None:
+                self._dim = vectors.shape[1]
+                self._append_log([{"op": "init", "dim": self._dim}])
+            records = []
+            for cid, vector, document in zip(ids, _normalize(vectors), documents):
+                slot = self._slots.get(cid)
+                if slot is None:
+                    slot = self._free.pop() if self._free else len(self._ids)
+                    self._ensure_capacity(slot + 1)
+                self._matrix[slot] = vector
+                self._set_record(slot, cid, document.page_content, document.metadata or {})
+                records.append({"op": "put", "id": cid, "slot": slot, "text": document.page_content,
+                                "metadata": document.metadata or {}})
+            self._matrix.flush()
+            self._append_log(records)
+            self._ivf = None
+
+    def add_texts(self, texts: Iterable[str], metadatas: list[dict] | None = None, ids: list[str] | None = None,
+                  **kwargs: Any) -> list[str]:
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        if ids is None:
+            ids = [str(uuid.uuid4()) for _ in texts]
+        documents = [Document(page_content=t, metadata=m) for t, m in zip(texts, metadatas)]
+        self.upsert(ids, self.embedding_function.embed_documents(texts), documents)
+        return ids
+
+    def delete(self, ids: list[str] | None = None, **kwargs: Any) -> None:
+        with self._lock:
+            records = []
+            for cid in ids or []:
+                slot = self._slots.pop(cid, None)
+                if slot is None:
+                    continue
+                self._alive[slot] = False
+                self._ids[slot] = None
+                self._texts[slot] = None
+                self._metadatas[slot] = None
+                self._free.append(slot)
+                records.append({"op": "del", "id": cid})
+            if records:
+                self._append_log(records)
+                self._ivf = None
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, ids=None, directory=None, **kwargs):
+        store = cls(directory, embedding, **kwargs)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
+
+    # --- Reading ---
+
+    def get(self, ids: list[str] | None = None, include: list[str] | None = None, **kwargs: Any) -> dict:
+        """Returns stored records in the same shape as `Chroma.get`."""
+        include = ["documents", "metadatas"] if include is None else include
+        with self._lock:
+            slots = [self._slots[cid] for cid in ids if cid in self._slots] if ids else sorted(self._slots.values())
+            result = {"ids": [self._ids[s] for s in slots]}
+            if "documents" in include:
+                result["documents"] = [self._texts[s] for s in slots]
+            if "metadatas" in include:
+                result["metadatas"] = [self._metadatas[s] for s in slots]
+        return result
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> list[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, **kwargs)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> list[tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(self.embedding_function.embed_query(query), k)
+
+    def similarity_search_by_vector(self, embedding: list[float], k: int = 4, **kwargs: Any) -> list[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k)]
+
+    def similarity_search_by_vector_with_score(self, embedding: list[float], k: int = 4) -> list[tuple[Document, float]]:
+        """Returns the `k` closest documents with their cosine similarity (higher is closer)."""
+        query = _normalize(np.asarray(embedding, dtype=np.float32)[None, :])[0]
+        with self._lock:
+            if not self._slots:
+                return []
+            candidates, scores = self._score(query)
+            k = min(k, len(self._slots), len(candidates))
+            if k == 0:
+                return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [
+                (Document(page_content=self._texts[s], metadata=dict(self._metadatas[s]), id=self._ids[s]), float(scores[i]))
+                for i, s in ((i, int(candidates[i])) for i in top)
+            ]
+
+    def _select_relevance_score_fn(self):
+        # Scores are already cosine similarities in [-1, 1].
+        return lambda score: (score + 1.0) / 2.0
+
+    def _score(self, query):
+        """Returns the candidate slots for `query` and their similarities."""
+        size = len(self._ids)
+        if not self.ivf_min_size or len(self._slots) < self.ivf_min_size:
+            # Flat scan over the contiguous prefix of the memmap; deleted slots can never win.
+            scores = self._matrix[:size] @ query
+            scores[~self._alive[:size]] = -np.inf
+            return np.arange(size), scores
+        if self._ivf is None:
+            self._ivf = _IvfIndex.build(self._matrix, np.flatnonzero(self._alive[:size]))
+        candidates = self._ivf.candidates(query, self.nprobe)
+        return candidates, self._matrix[candidates] @ query
+
+    # --- Persistence ---
+
+    def _set_record(self, slot, cid, text, metadata):
+        if slot >= len(self._ids):
+            # Records can arrive out of slot order (reused slots) or after a hole (deleted slots)
+            missing = slot + 1 - len(self._ids)
+            self._ids.extend([None] * missing)
+            self._texts.extend([None] * missing)
+            self._metadatas.extend([None] * missing)
+        if slot >= len(self._alive):
+            self._alive = np.concatenate([self._alive, np.zeros(max(slot + 1, 2 * len(self._alive)) - len(self._alive), dtype=bool)])
+        self._ids[slot] = cid
+        self._texts[slot] = text
+        self._metadatas[slot] = metadata
+        self._alive[slot] = True
+        self._slots[cid] = slot
+
+    def _ensure_capacity(self, size):
+        if size <= self._capacity:
+            return
+        capacity = max(size, 2 * self._capacity, MIN_CAPACITY)
+        path = self.directory / VECTORS_FILE
+        if self._matrix is not None:
+            self._matrix.flush()
+            del self._matrix
+        with open(path, "ab") as f:
+            f.truncate(capacity * self._dim * 4)
+        self._matrix = np.memmap(path, dtype=np.float32, mode="r+", shape=(capacity, self._dim))
+        self._capacity = capacity
+
+    def _append_log(self, records):
+        with open(self.directory / LOG_FILE, "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+
+    def _load(self):
+        log_path = self.directory / LOG_FILE
+        if not log_path.exists():
+            return
+        with open(log_path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if record["op"] == "init":
+                    self._dim = record["dim"]
+                elif record["op"] == "put":
+                    self._set_record(record["slot"], record["id"], record["text"], record["metadata"])
+                elif record["op"] == "del":
+                    slot = self._slots.pop(record["id"], None)
+                    if slot is not None:
+                        self._alive[slot] = False
+                        self._ids[slot] = self._texts[slot] = self._metadatas[slot] = None
+        self._free = [s for s in range(len(self._ids)) if not self._alive[s]]
+        if self._dim is not None:
+            path = self.directory / VECTORS_FILE
+            if not path.exists():
+                # Records without their vectors can't be searched: start over with an empty index
+                print(f"⚠️ {path} is missing, starting with an empty local index.")
+                self._reset()
+                log_path.unlink()
+                return
+            self._capacity = path.stat().st_size // (self._dim * 4)
+            self._matrix = np.memmap(path, dtype=np.float32, mode="r+", shape=(self._capacity, self._dim))
+            self._compact_log()
+
+    def _reset(self):
+        self._dim = None
+        self._slots = {}
+        self._ids = []
+        self._texts = []
+        self._metadatas = []
+        self._alive = np.zeros(0, dtype=bool)
+        self._free = []
+
+    def _compact_log(self):
+        """Rewrites the sidecar with only the live records, dropping deletions and overwrites."""
+        tmp_path = self.directory / (LOG_FILE + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"op": "init", "dim": self._dim}) + "\n")
+            for cid, slot in sorted(self._slots.items(), key=lambda item: item[1]):
+                record = {"op": "put", "id": cid, "slot": slot, "text": self._texts[slot], "metadata": self._metadatas[slot]}
+                f.write(json.dumps(record) + "\n")
+        tmp_path.replace(self.directory / LOG_FILE)
+
+
+class _IvfIndex:
+    """Coarse k-means quantizer: each query only scans the vectors of its `nprobe` closest clusters."""
+
+    def __init__(self, centroids, lists):
+        self.centroids = centroids
+        self.lists = lists
+
+    @classmethod
+    def build(cls, matrix, slots, iterations=10, seed=0):
+        vectors = np.asarray(matrix[slots])
+        n_lists = max(1, int(np.sqrt(len(slots))))
+        rng = np.random.default_rng(seed)
+        centroids = vectors[rng.choice(len(vectors), n_lists, replace=False)]
+        for _ in range(iterations):
+            assignment = np.argmax(vectors @ centroids.T, axis=1)
+            for c in range(n_lists):
+                members = vectors[assignment == c]
+                if len(members):
+                    centroids[c] = _normalize(members.mean(axis=0, keepdims=True))[0]
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        lists = [slots[assignment == c] for c in range(n_lists)]
+        return cls(centroids, lists)
+
+    def candidates(self, query, nprobe):
+        nprobe = min(nprobe, len(self.centroids))
+        closest = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        return np.concatenate([self.lists[c] for c in closest])
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
@@ -9,20 +9,31 @@ from pathlib import Path
 
 from dotenv import load_dotenv
 from langchain_chroma import Chroma
-from langchain_community.document_loaders import GithubFileLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.prompts import ChatPromptTemplate
 from langchain.chains.combine_documents import create_stuff_documents_chain
-from langchain.chains.retrieval import create_retrieval_chain
 import chromadb
-from ollama_utils import get_ollama_models
+from ollama_utils import get_ollama_models, prewarm_models, stream_to_console
+
+from indexer import IncrementalIndexer, IndexManifest
+from ingest import EmbeddingPipeline, chroma_upsert
+from github_loader import StreamingGithubLoader
+from local_loader import LocalRepoLoader
+from chunker import CodeAwareSplitter
+from local_store import LocalVectorStore
+from answer_cache import SemanticAnswerCache
+from qa_agent import QAAgent, format_sources
+from keyword_index import BM25Index
+from hybrid_retriever import HybridRetriever
+from context_packer import ContextPacker
 
 # --- 1. Load Environment Variables ---
 load_dotenv()
 GITHUB_TOKEN = os.getenv("GITHUB_ACCESS_TOKEN")
+# Set LOCAL_REPO_PATH to index a local checkout instead of the GitHub repository (no token or network needed).
+LOCAL_REPO_PATH = os.getenv("LOCAL_REPO_PATH")
 
-if not GITHUB_TOKEN:
-    print("❌ GITHUB_ACCESS_TOKEN not found. Please create a .env file in 'apps/github-qa-agent/'")
+if not GITHUB_TOKEN and not LOCAL_REPO_PATH:
+    print("❌ GITHUB_ACCESS_TOKEN not found. Please create a .env file in 'apps/github-qa-agent/' (or set LOCAL_REPO_PATH)")
     sys.exit(1)
 
 
@@ -30,60 +41,122 @@ if not GITHUB_TOKEN:
 REPO_URL = "https://github.com/woliveiras/reader-agent"
 PROJECT_ROOT = Path(__file__).parent.parent.parent
 CHROMA_PERSIST_DIRECTORY = PROJECT_ROOT / "data" / "chroma-db-data" / "github-repo-agent"
-
-def main():
+COLLECTION_NAME = "github-repo-agent"
+# The manifest lives next to the Chroma data and tracks what has already been embedded.
+MANIFEST_PATH = PROJECT_ROOT / "data" / "github-qa-agent" / f"{COLLECTION_NAME}.manifest.json"
+# Embeddings of chunks and questions are cached on disk, so re-indexing and repeated questions skip Ollama.
+EMBEDDING_CACHE_PATH = PROJECT_ROOT / "data" / "github-qa-agent" / "embeddings.sqlite"
+CHUNK_CACHE_PATH = PROJECT_ROOT / "data" / "github-qa-agent" / "chunk-boundaries.json"
+GITHUB_ETAG_CACHE_PATH = PROJECT_ROOT / "data" / "github-qa-agent" / "github-etags.json"
+RETRIEVER_K = 4
+# Candidates taken from each of the dense and BM25 rankings before fusion.
+RETRIEVER_CANDIDATES = int(os.getenv("RETRIEVER_CANDIDATES", "20"))
+# Set RETRIEVER_RERANK=0 to keep the plain reciprocal-rank fusion order.
+RETRIEVER_RERANK = os.getenv("RETRIEVER_RERANK", "1") != "0"
+# Approximate token budget of the context passed to the LLM; by default it is sized from the model's context window.
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "0")) or None
+# The BM25 keyword index is stored next to the vector index and updated with it.
+KEYWORD_INDEX_PATH = PROJECT_ROOT / "data" / "github-qa-agent" / f"{COLLECTION_NAME}.bm25.jsonl"
+# "chroma" (default) uses the ChromaDB container; "local" keeps an in-process memory-mapped index.
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")
+LOCAL_INDEX_DIRECTORY = PROJECT_ROOT / "data" / "github-qa-agent" / "local-index"
+# Questions at least this similar (cosine) to a previous one reuse its answer for ANSWER_CACHE_TTL seconds.
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+ANSWER_CACHE_TTL = int(os.getenv("ANSWER_CACHE_TTL", "3600"))
+# Chunks per embedding request and number of concurrent embedding requests while indexing.
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "64"))
+INGEST_MAX_WORKERS = int(os.getenv("INGEST_MAX_WORKERS", "4"))
+
+def build_agent() -> QAAgent:
     """
-    Main function to set up and run the GitHub QA agent.
+    Loads the models, syncs the indexes with the repository and builds the answer chain.
+    Used once per process by both the REPL below and the HTTP server (server.py).
     """
     print("🚀 Starting the AI agent for GitHub repository analysis...")
 
     # --- 3. Initialize Models ---
-    llm, embeddings = get_ollama_models()
-
-    # --- 4. Load or Create the Vector Database ---
-    # Use HTTP client for ChromaDB running in Docker
-    chroma_client = chromadb.HttpClient(host="localhost", port=8000)
-    collection_name = "github-repo-agent"
-    try:
-        # Try to connect to existing collection
+    llm, embeddings = get_ollama_models(embedding_cache_path=EMBEDDING_CACHE_PATH)
+    # Load both models in the background while the index is being synced.
+    prewarm_models(llm.model, embeddings.model)
+
+    # --- 4. Load and Sync the Vector Database ---
+    if VECTOR_BACKEND == "local":
+        # In-process memory-mapped index: no Chroma container and no HTTP hop per query.
+        print(f"✅ Using the local vector index at {LOCAL_INDEX_DIRECTORY}...")
+        vector_store = LocalVectorStore(LOCAL_INDEX_DIRECTORY, embeddings)
+        upsert = vector_store.upsert
+        manifest_path = LOCAL_INDEX_DIRECTORY / "manifest.json"
+        keyword_index_path = LOCAL_INDEX_DIRECTORY / "bm25.jsonl"
+    else:
+        # Use HTTP client for ChromaDB running in Docker
+        chroma_client = chromadb.HttpClient(host="localhost", port=8000)
         print(f"✅ Connecting to ChromaDB at http://localhost:8000...")
         vector_store = Chroma(
             embedding_function=embeddings,
             client=chroma_client,
-            collection_name=collection_name
+            collection_name=COLLECTION_NAME
         )
-        # Optionally, check if collection is empty and create if needed
-        if len(vector_store.get()['ids']) == 0:
-            raise ValueError("ChromaDB collection is empty, will create new one.")
-    except Exception as e:
-        print(f"⏳ Creating new vector database for {REPO_URL} via HTTP...")
-        print(f"   (This will be saved in the ChromaDB Docker volume)")
-        # Load the repository files
-        print("   Loading files from the GitHub repository...")
-        loader = GithubFileLoader(
+        upsert = chroma_upsert(chroma_client.get_or_create_collection(COLLECTION_NAME))
+        manifest_path = MANIFEST_PATH
+        keyword_index_path = KEYWORD_INDEX_PATH
+    keyword_index = BM25Index(keyword_index_path)
+
+    # Only files whose blob SHA changed since the last run are downloaded and re-embedded,
+    # and chunks of deleted or rewritten files are removed from the collection.
+    file_filter = lambda file_path: file_path.endswith((".py", ".md", ".toml", ".lock"))
+    if LOCAL_REPO_PATH:
+        print(f"⏳ Syncing the vector database with the checkout at {LOCAL_REPO_PATH}...")
+        loader = LocalRepoLoader(LOCAL_REPO_PATH, file_filter=file_filter)
+    else:
+        print(f"⏳ Syncing the vector database with {REPO_URL}...")
+        # Files are listed with a conditional tree request and downloaded by a pool of workers;
+        # huge lockfiles are only sampled.
+        loader = StreamingGithubLoader(
             repo="woliveiras/reader-agent",
             branch="main",
             access_token=GITHUB_TOKEN,
             github_api_url="https://api.github.com",
-            file_filter=lambda file_path: file_path.endswith((".py", ".md", ".toml", ".lock")),
-        )
-        docs = loader.load()
-        print(f"   Loaded {len(docs)} documents from the repository.")
-        # Split documents into chunks
-        splitter = RecursiveCharacterTextSplitter(chunk_size=2000, chunk_overlap=200)
-        splits = splitter.split_documents(docs)
-        print(f"   Documents split into {len(splits)} chunks.")
-        # Create and persist the vector store via HTTP
-        vector_store = Chroma.from_documents(
-            documents=splits,
-            embedding=embeddings,
-            client=chroma_client,
-            collection_name=collection_name
+            file_filter=file_filter,
+            etag_cache_path=GITHUB_ETAG_CACHE_PATH,
         )
-        print("✅ Vector database created and persisted in ChromaDB Docker volume.")
+    # Python is chunked by function/class, Markdown by heading and TOML by table, without overlap.
+    splitter = CodeAwareSplitter(chunk_size=2000, cache_path=CHUNK_CACHE_PATH)
+    # New chunks are embedded in concurrent batches and upserted while the next batches embed;
+    # each stored batch is also added to the keyword index.
+    pipeline = EmbeddingPipeline(
+        embeddings,
+        keyword_index.with_upsert(upsert),
+        batch_size=INGEST_BATCH_SIZE,
+        max_workers=INGEST_MAX_WORKERS,
+    )
+    manifest = IndexManifest.load(manifest_path, fingerprint=splitter.fingerprint)
+    indexer = IncrementalIndexer(vector_store, splitter, manifest, pipeline, keyword_index)
+    try:
+        stats = indexer.sync(loader)
+        print(f"✅ Vector database is up to date: {stats}.")
+        if loader.skipped_files:
+            print(f"   Skipped {len(loader.skipped_files)} binary or oversized files.")
+    except Exception as e:
+        if not indexer.manifest.files:
+            print(f"❌ Could not build the vector database: {e}")
+            sys.exit(1)
+        print(f"⚠️ Could not sync with GitHub ({e}), using the existing index.")
+    finally:
+        splitter.save_cache()
 
     # --- 5. Create the RAG Chain ---
-    retriever = vector_store.as_retriever(search_kwargs={"k": 5})
+    # Chunks are whole functions/sections, so fewer of them are needed to cover an answer.
+    # Dense and BM25 results are fused, so questions naming a function or config key find it.
+    retriever = HybridRetriever(
+        vector_store=vector_store,
+        keyword_index=keyword_index,
+        k=RETRIEVER_K,
+        candidates=RETRIEVER_CANDIDATES,
+        rerank=RETRIEVER_RERANK,
+    )
+    # Neighbouring chunks are merged, boilerplate is stripped and the context is kept within the
+    # model's budget, in file order so follow-up questions share the prompt prefix.
+    packer = ContextPacker.for_model(llm, CONTEXT_TOKEN_BUDGET)
 
     prompt_template = ChatPromptTemplate.from_messages([
         ("system", (
@@ -95,8 +168,23 @@ def main():
         ("human", "{input}"),
     ])
 
+    # Retrieval and generation run as two steps so the sources can be shown before the answer streams.
     combine_docs_chain = create_stuff_documents_chain(llm, prompt_template)
-    retrieval_chain = create_retrieval_chain(retriever, combine_docs_chain)
+
+    # Near-identical questions are answered from the cache, built for the index version just synced.
+    answer_cache = SemanticAnswerCache(
+        embeddings,
+        threshold=ANSWER_CACHE_THRESHOLD,
+        ttl=ANSWER_CACHE_TTL,
+        version=indexer.manifest.version,
+    )
+    return QAAgent(retriever, packer, combine_docs_chain, answer_cache)
+
+def main():
+    """
+    Main function to set up and run the GitHub QA agent.
+    """
+    agent = build_agent()
 
     # --- 6. Start Interactive Chat Loop ---
     print("\n✅ Agent is ready. Ask me anything about the repository code!")
@@ -109,11 +197,22 @@ def main():
             if not question.strip():
                 continue
 
-            print("...🤔 Querying the agent...")
-            result = retrieval_chain.invoke({"input": question})
-
-            print("\n--- Agent Response ---")
-            print(result["answer"])
+            result = agent.answer_cache.lookup(question)
+            if result:
+                print(f"...⚡ Answering from cache (similarity {result['cache_similarity']:.2f})...")
+                print(f"📚 Sources: {format_sources(result['context'])}")
+                print("\n--- Agent Response ---")
+                print(result["answer"])
+            else:
+                print("...🤔 Querying the agent...")
+                packed = agent.packer.pack(agent.retriever.invoke(question), question)
+                context = packed.documents
+                print(f"📚 Sources: {format_sources(context)}")
+                print(f"📦 Context: {packed}")
+                print("\n--- Agent Response ---")
+                answer = stream_to_console(agent.combine_docs_chain, {"input": question, "context": context})
+                result = {"input": question, "context": context, "answer": answer.text}
+                agent.answer_cache.store(question, result)
             print("----------------------\n")
 
         except KeyboardInterrupt:
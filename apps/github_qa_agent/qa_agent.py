@@ -0,0 +1,79 @@
+# qa_agent.py
+# The question-answering pipeline of the GitHub QA agent, built once and shared by the
+# interactive REPL (main.py) and the HTTP server (server.py).
+# A question is answered from the semantic cache when possible; otherwise the chunks are
+# retrieved, packed and handed to the stuff-documents chain, whose tokens are streamed back.
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator
+
+
+def format_sources(documents) -> str:
+    """Lists the files (and line ranges, when known) the retrieved chunks come from."""
+    return ", ".join(source_list(documents))
+
+
+def source_list(documents) -> list[str]:
+    sources = []
+    for doc in documents:
+        source = doc.metadata.get("path", "?")
+        if "start_line" in doc.metadata:
+            source += f":{doc.metadata['start_line']}-{doc.metadata['end_line']}"
+        if source not in sources:
+            sources.append(source)
+    return sources
+
+
+def _chunk_text(chunk) -> str:
+    if isinstance(chunk, str):
+        return chunk
+    content = getattr(chunk, "content", "")
+    return content if isinstance(content, str) else ""
+
+
+@dataclass
+class QAAgent:
+    """The loaded retriever, context packer, answer chain and answer cache."""
+
+    retriever: object
+    packer: object
+    combine_docs_chain: object
+    answer_cache: object
+
+    async def astream(self, question: str) -> AsyncIterator[tuple[str, object]]:
+        """
+        Answers `question`, yielding `(event, data)` pairs: `("sources", [paths])`, then one or more
+        `("token", text)` and finally `("done", stats)`. Blocking steps (embedding the question,
+        cache lookups) run in worker threads so concurrent questions don't stall each other.
+        """
+        started = time.perf_counter()
+        cached = await asyncio.to_thread(self.answer_cache.lookup, question)
+        if cached:
+            yield "sources", source_list(cached["context"])
+            yield "token", cached["answer"]
+            elapsed = time.perf_counter() - started
+            yield "done", {"cached": True, "similarity": cached["cache_similarity"], "ttft_s": elapsed,
+                           "latency_s": elapsed}
+            return
+
+        documents = await self.retriever.ainvoke(question)
+        packed = self.packer.pack(documents, question)
+        yield "sources", source_list(packed.documents)
+
+        parts = []
+        first_token = None
+        async for chunk in self.combine_docs_chain.astream({"input": question, "context": packed.documents}):
+            text = _chunk_text(chunk)
+            if not text:
+                continue
+            if first_token is None:
+                first_token = time.perf_counter() - started
+            parts.append(text)
+            yield "token", text
+
+        result = {"input": question, "context": packed.documents, "answer": "".join(parts)}
+        await asyncio.to_thread(self.answer_cache.store, question, result)
+        yield "done", {"cached": False, "context": str(packed), "ttft_s": first_token,
+                       "latency_s": time.perf_counter() - started}
@@ -0,0 +1,309 @@
+# server.py
+# Multi-user HTTP mode for the GitHub QA agent, on plain asyncio (no web framework).
+# The indexes and the answer chain are built once at startup; every question is answered
+# concurrently and streamed back as server-sent events. An admission controller caps the
+# questions being answered at once (and so the in-flight Ollama requests): extra ones wait in a
+# bounded queue, and once that is full they get a 503 with Retry-After.
+#
+# Endpoints:
+#   POST /ask  {"question": "..."}   or   GET /ask?q=...   -> text/event-stream
+#        events: "sources" (list of files), "token" (answer text), "done" (timings), "error"
+#   GET /health                                            -> JSON status
+#   GET /metrics                                           -> Prometheus text format
+#
+# Usage:
+#   python server.py                      # listens on QA_SERVER_HOST:QA_SERVER_PORT (127.0.0.1:8080)
+#   curl -N localhost:8080/ask -d '{"question": "How are documents loaded?"}'
+
+import asyncio
+import json
+import os
+import sys
+import time
+import traceback
+from contextlib import aclosing, asynccontextmanager, suppress
+from urllib.parse import parse_qs, urlsplit
+
+SERVER_HOST = os.getenv("QA_SERVER_HOST", "127.0.0.1")
+SERVER_PORT = int(os.getenv("QA_SERVER_PORT", "8080"))
+# Questions answered at the same time, and questions allowed to wait for a slot.
+MAX_IN_FLIGHT = int(os.getenv("QA_MAX_IN_FLIGHT", "4"))
+MAX_QUEUE = int(os.getenv("QA_MAX_QUEUE", "32"))
+MAX_BODY_BYTES = 64 * 1024
+LATENCY_BUCKETS = (0.5, 1, 2, 5, 10, 20, 30, 60)
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class QueueFull(Exception):
+    pass
+
+
+class AdmissionController:
+    """At most `max_in_flight` holders at a time, with up to `max_queue` more waiting."""
+
+    def __init__(self, max_in_flight=MAX_IN_FLIGHT, max_queue=MAX_QUEUE):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self.queued = 0
+        self.rejected = 0
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+
+    @asynccontextmanager
+    async def admit(self):
+        if self._semaphore.locked() and self.queued >= self.max_queue:
+            self.rejected += 1
+            raise QueueFull()
+        self.queued += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+
+class Metrics:
+    """Counters and latency histograms, rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self.requests = {}
+        self.answers = {"cached": 0, "generated": 0}
+        self.disconnects = 0
+        self.latency = _Histogram()
+        self.ttft = _Histogram()
+
+    def count_request(self, path, status):
+        key = (path, status)
+        self.requests[key] = self.requests.get(key, 0) + 1
+
+    def render(self, admission: AdmissionController, cache=None) -> str:
+        lines = [
+            "# HELP qa_requests_total HTTP requests by path and status.",
+            "# TYPE qa_requests_total counter",
+        ]
+        for (path, status), count in sorted(self.requests.items()):
+            lines.append(f'qa_requests_total{{path="{path}",status="{status}"}} {count}')
+        lines += [
+            "# HELP qa_answers_total Answered questions, from the cache or generated.",
+            "# TYPE qa_answers_total counter",
+            *(f'qa_answers_total{{source="{k}"}} {v}' for k, v in self.answers.items()),
+            "# TYPE qa_client_disconnects_total counter",
+            f"qa_client_disconnects_total {self.disconnects}",
+            "# TYPE qa_in_flight gauge",
+            f"qa_in_flight {admission.in_flight}",
+            "# TYPE qa_queued gauge",
+            f"qa_queued {admission.queued}",
+            "# TYPE qa_rejected_total counter",
+            f"qa_rejected_total {admission.rejected}",
+        ]
+        if cache is not None:
+            lines += [
+                "# TYPE qa_answer_cache_entries gauge",
+                f"qa_answer_cache_entries {len(cache)}",
+            ]
+        lines += self.latency.render("qa_answer_latency_seconds", "Time to the end of the answer.")
+        lines += self.ttft.render("qa_time_to_first_token_seconds", "Time to the first answer token.")
+        return "\n".join(lines) + "\n"
+
+
+class _Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def render(self, name, help_text):
+        lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        lines += [f'{name}_bucket{{le="{bound}"}} {count}' for bound, count in zip(self.buckets, self.counts)]
+        lines += [f'{name}_bucket{{le="+Inf"}} {self.count}', f"{name}_sum {self.sum:.6f}", f"{name}_count {self.count}"]
+        return lines
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class QAServer:
+    """Serves a `QAAgent` over HTTP; one request per connection."""
+
+    def __init__(self, agent, max_in_flight=MAX_IN_FLIGHT, max_queue=MAX_QUEUE):
+        self.agent = agent
+        self.admission = AdmissionController(max_in_flight, max_queue)
+        self.metrics = Metrics()
+        self.started = time.time()
+        self._responded = set()  # writers whose status line already went out
+
+    async def start(self, host=SERVER_HOST, port=SERVER_PORT) -> asyncio.Server:
+        return await asyncio.start_server(self.handle, host, port)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        path = "?"
+        try:
+            method, target, body = await self._read_request(reader)
+            url = urlsplit(target)
+            path = url.path
+            if path == "/health":
+                status = await self._send_json(writer, 200, self.health())
+            elif path == "/metrics":
+                cache = getattr(self.agent, "answer_cache", None)
+                status = await self._send(writer, 200, self.metrics.render(self.admission, cache).encode(),
+                                          "text/plain; version=0.0.4")
+            elif path == "/ask":
+                status = await self._ask(writer, self._question(method, url.query, body))
+            else:
+                raise HTTPError(404, f"No route for {path}")
+        except HTTPError as e:
+            status = await self._send_json(writer, e.status, {"error": str(e)})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            self.metrics.disconnects += 1
+            status = 499
+        except Exception as e:
+            print(f"❌ Unexpected error serving {path}: {type(e).__name__}: {e}", file=sys.stderr)
+            traceback.print_exc()
+            if writer not in self._responded:
+                with suppress(ConnectionError):
+                    await self._send_json(writer, 500, {"error": "Internal server error"})
+            status = 500
+        finally:
+            self._responded.discard(writer)
+            writer.close()
+            with suppress(ConnectionError):
+                await writer.wait_closed()
+        self.metrics.count_request(path if path in ("/ask", "/health", "/metrics") else "other", status)
+
+    def health(self) -> dict:
+        cache = getattr(self.agent, "answer_cache", None)
+        return {
+            "status": "ok",
+            "uptime_s": round(time.time() - self.started, 1),
+            "index_version": getattr(cache, "version", None),
+            "in_flight": self.admission.in_flight,
+            "queued": self.admission.queued,
+            "max_in_flight": self.admission.max_in_flight,
+        }
+
+    # --- /ask ---
+
+    @staticmethod
+    def _question(method, query, body) -> str:
+        if method == "GET":
+            question = parse_qs(query).get("q", [""])[0]
+        elif method == "POST":
+            try:
+                question = json.loads(body or b"{}").get("question", "")
+            except (ValueError, AttributeError):
+                raise HTTPError(400, "Body must be a JSON object with a 'question'")
+        else:
+            raise HTTPError(405, "Use GET /ask?q=... or POST /ask")
+        if not isinstance(question, str) or not question.strip():
+            raise HTTPError(400, "Missing question")
+        return question.strip()
+
+    async def _ask(self, writer, question) -> int:
+        try:
+            async with self.admission.admit():
+                self._responded.add(writer)
+                writer.write(self._head(200, "text/event-stream", extra="Cache-Control: no-cache\r\n"))
+                await writer.drain()
+                try:
+                    # A client that disconnects ends the stream at the next event, and closes the generator
+                    async with aclosing(self.agent.astream(question)) as events:
+                        async for event, data in events:
+                            if event == "done":
+                                self._observe(data)
+                            await self._send_event(writer, event, data)
+                except ConnectionError:
+                    raise
+                except Exception as e:
+                    await self._send_event(writer, "error", {"error": f"{type(e).__name__}: {e}"})
+                    return 500
+        except QueueFull:
+            return await self._send_json(writer, 503, {"error": "Too many questions in flight, retry later"},
+                                         extra="Retry-After: 1\r\n")
+        return 200
+
+    def _observe(self, stats):
+        self.metrics.answers["cached" if stats.get("cached") else "generated"] += 1
+        self.metrics.latency.observe(stats["latency_s"])
+        if stats.get("ttft_s") is not None:
+            self.metrics.ttft.observe(stats["ttft_s"])
+
+    @staticmethod
+    async def _send_event(writer, event, data):
+        writer.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode())
+        await writer.drain()
+
+    # --- HTTP plumbing ---
+
+    @staticmethod
+    async def _read_request(reader):
+        request_line = (await reader.readline()).decode("latin-1").strip()
+        parts = request_line.split()
+        if len(parts) != 3:
+            raise HTTPError(400, "Malformed request line")
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length", "0") or 0)
+        except ValueError:
+            raise HTTPError(400, "Invalid Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, "Request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return parts[0].upper(), parts[1], body
+
+    @staticmethod
+    def _head(status, content_type, length=None, extra=""):
+        head = f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\nContent-Type: {content_type}\r\nConnection: close\r\n"
+        if length is not None:
+            head += f"Content-Length: {length}\r\n"
+        return (head + extra + "\r\n").encode()
+
+    async def _send(self, writer, status, payload: bytes, content_type, extra="") -> int:
+        self._responded.add(writer)
+        writer.write(self._head(status, content_type, len(payload), extra) + payload)
+        await writer.drain()
+        return status
+
+    async def _send_json(self, writer, status, data, extra="") -> int:
+        return await self._send(writer, status, json.dumps(data).encode(), "application/json", extra)
+
+
+async def serve(host=SERVER_HOST, port=SERVER_PORT):
+    # Imported here: main.py needs GITHUB_ACCESS_TOKEN and syncs the index when it builds the agent.
+    from main import build_agent
+
+    agent = build_agent()
+    server = await QAServer(agent).start(host, port)
+    print(f"\n✅ Serving the QA agent on http://{host}:{port} "
+          f"(up to {MAX_IN_FLIGHT} questions at once, {MAX_QUEUE} queued)")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        print("\n👋 Stopping the server...")
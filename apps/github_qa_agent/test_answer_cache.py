@@ -0,0 +1,64 @@
+import answer_cache
+from answer_cache import SemanticAnswerCache
+
+VECTORS = {
+    "how are files loaded?": [1.0, 0.0, 0.0],
+    "how are the files loaded?": [0.99, 0.1, 0.0],  # cosine ~0.995
+    "how is the index persisted?": [0.6, 0.8, 0.0],  # cosine 0.6
+}
+
+
+class FakeEmbeddings:
+    def __init__(self):
+        self.calls = 0
+
+    def embed_query(self, text):
+        self.calls += 1
+        return VECTORS[text]
+
+
+def answer(text):
+    return {"input": "how are files loaded?", "context": [], "answer": text}
+
+
+def test_similar_questions_hit_and_others_miss():
+    cache = SemanticAnswerCache(FakeEmbeddings(), threshold=0.95, version="v1")
+    assert cache.lookup("how are files loaded?") is None
+    cache.store("how are files loaded?", answer("With a loader."))
+
+    hit = cache.lookup("how are the files loaded?")
+    assert hit["answer"] == "With a loader." and hit["input"] == "how are the files loaded?"
+    assert hit["cache_similarity"] > 0.99
+    assert cache.lookup("how is the index persisted?") is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_the_looked_up_embedding_is_reused_when_storing():
+    embeddings = FakeEmbeddings()
+    cache = SemanticAnswerCache(embeddings)
+    cache.lookup("how are files loaded?")
+    cache.store("how are files loaded?", answer("With a loader."))
+    assert embeddings.calls == 1
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(answer_cache.time, "monotonic", lambda: now[0])
+    cache = SemanticAnswerCache(FakeEmbeddings(), ttl=60)
+    cache.store("how are files loaded?", answer("With a loader."))
+
+    now[0] += 59
+    assert cache.lookup("how are files loaded?") is not None
+    now[0] += 2
+    assert cache.lookup("how are files loaded?") is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = SemanticAnswerCache(FakeEmbeddings(), max_entries=2)
+    cache.store("how are files loaded?", answer("a"))
+    cache.store("how is the index persisted?", answer("b"))
+    cache.lookup("how are files loaded?")  # now the most recently used
+    cache.store("how are the files loaded?", answer("c"))
+
+    assert list(cache._entries) == ["how are files loaded?", "how are the files loaded?"]
@@ -0,0 +1,112 @@
+import textwrap
+
+from langchain_core.documents import Document
+
+from chunker import CodeAwareSplitter
+
+
+def method(name, lines=3):
+    body = "".join(f"        value_{i} = {name}_helper({i}, 'some argument text')\n" for i in range(lines))
+    return f"    def {name}(self):\n        \"\"\"Does {name}.\"\"\"\n{body}        return value_0\n\n"
+
+
+BIG_CLASS = (
+    "import os\n\n\n"
+    "@dataclass\n"
+    "class Loader(Base):\n"
+    "    \"\"\"Loads things.\"\"\"\n\n"
+    + "".join(method(name) for name in ["load", "parse", "save", "close"])
+    + "\ndef main():\n    Loader().load()\n"
+)
+HUGE_FUNCTION = "def huge():\n" + "".join(f"    x_{i} = compute({i}, 'a fairly long argument')\n" for i in range(80))
+
+
+def split(text, path, chunk_size=400, **options):
+    splitter = CodeAwareSplitter(chunk_size=chunk_size, **options)
+    return splitter.split_document(Document(page_content=text, metadata={"path": path}))
+
+
+def assert_covers_every_line_once(chunks, text):
+    spans = [(c.metadata["start_line"], c.metadata["end_line"]) for c in chunks]
+    assert spans[0][0] == 1 and spans[-1][1] == len(text.splitlines())
+    for (_, end), (next_start, _) in zip(spans, spans[1:]):
+        assert next_start == end + 1
+
+
+def test_python_chunks_cover_the_file_without_overlap_and_fit_the_chunk_size():
+    for text in (BIG_CLASS, HUGE_FUNCTION):
+        chunks = split(text, "src/loader.py")
+        assert len(chunks) > 1
+        assert_covers_every_line_once(chunks, text)
+        assert all(len(c.page_content) <= 400 for c in chunks)
+
+
+def test_method_chunks_repeat_the_class_signature():
+    chunks = split(BIG_CLASS, "src/loader.py")
+    save = next(c for c in chunks if "def save(self)" in c.page_content)
+    assert save.page_content.startswith("@dataclass\nclass Loader(Base):\n")
+    # The signature is not part of the chunk's own lines
+    own_lines = BIG_CLASS.splitlines(keepends=True)[save.metadata["start_line"] - 1:save.metadata["end_line"]]
+    assert save.page_content == "@dataclass\nclass Loader(Base):\n" + "".join(own_lines)
+    assert "Loader(Base)" not in "".join(own_lines)
+    assert chunks[-1].page_content.strip().startswith("def main():")
+
+
+def test_pieces_of_an_oversized_function_repeat_its_signature():
+    chunks = split(HUGE_FUNCTION, "huge.py")
+    assert all(c.page_content.startswith("def huge():\n") for c in chunks)
+
+
+def test_markdown_is_split_by_heading_but_not_inside_fences():
+    text = textwrap.dedent("""\
+        # Title
+        Intro.
+        ## Install
+        ```bash
+        # not a heading
+        pip install thing
+        ```
+        ## Usage
+        Run it.
+        """)
+    chunks = split(text, "README.md", chunk_size=70)
+    assert [c.page_content.splitlines()[0] for c in chunks] == ["# Title", "## Install", "## Usage"]
+    assert "# not a heading\npip install thing" in chunks[1].page_content
+    assert_covers_every_line_once(chunks, text)
+
+
+def test_toml_is_split_by_table():
+    text = textwrap.dedent("""\
+        # generated
+        [project]
+        name = "agent"
+        version = "0.1.0"
+
+        [[tool.uv.index]]
+        url = "https://example.com/simple"
+
+        [tool.ruff]  # lint settings
+        line-length = 120
+        """)
+    chunks = split(text, "pyproject.toml", chunk_size=60)
+    firsts = [c.page_content.splitlines()[0] for c in chunks]
+    assert firsts == ["# generated", "[[tool.uv.index]]", "[tool.ruff]  # lint settings"]
+    assert chunks[0].page_content.endswith('version = "0.1.0"\n\n')
+    assert_covers_every_line_once(chunks, text)
+
+
+def test_boundaries_are_cached_by_content_hash(tmp_path, monkeypatch):
+    cache_path = tmp_path / "chunks.json"
+    splitter = CodeAwareSplitter(chunk_size=400, cache_path=cache_path)
+    first = splitter.split_document(Document(page_content=BIG_CLASS, metadata={"path": "a/loader.py"}))
+    splitter.save_cache()
+
+    reloaded = CodeAwareSplitter(chunk_size=400, cache_path=cache_path)
+    monkeypatch.setattr(reloaded, "_segments", lambda *args: (_ for _ in ()).throw(AssertionError("not cached")))
+    # Same content under another path: same boundaries, the new path in the metadata
+    second = reloaded.split_document(Document(page_content=BIG_CLASS, metadata={"path": "b/copy.py"}))
+    assert [c.page_content for c in second] == [c.page_content for c in first]
+    assert {c.metadata["path"] for c in second} == {"b/copy.py"}
+
+    # Another chunk size ignores the cache
+    assert CodeAwareSplitter(chunk_size=500, cache_path=cache_path)._boundaries == {}
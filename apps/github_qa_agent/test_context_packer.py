@@ -0,0 +1,61 @@
+from langchain_core.documents import Document
+
+from context_packer import ContextPacker, merge_adjacent, strip_boilerplate
+
+FILE = [f"line {i}\n" for i in range(1, 21)]
+
+
+def chunk(start, end, path="src/app.py", prefix=""):
+    text = prefix + "".join(FILE[start - 1:end])
+    return Document(page_content=text, metadata={"path": path, "start_line": start, "end_line": end})
+
+
+def test_merge_adjacent_keeps_each_line_once():
+    merged = merge_adjacent([chunk(8, 12), chunk(1, 5), chunk(6, 9, prefix="class App:\n"), chunk(15, 16)])
+    blocks = sorted((d.metadata["start_line"], d.metadata["end_line"], rank, d.page_content) for rank, d in merged)
+    assert blocks[0] == (1, 12, 0, "".join(FILE[:12]))
+    assert blocks[1][:3] == (15, 16, 3)
+
+
+def test_strip_boilerplate():
+    python = "#!/usr/bin/env python\n# Copyright 2024 Someone\n# Licensed under MIT\n\nimport os\n\n\n\nx = 1\n"
+    assert strip_boilerplate(python, "src/app.py", 1) == "#!/usr/bin/env python\nimport os\n\nx = 1\n"
+    assert strip_boilerplate(python, "src/app.py", 1, keep_license=True).count("Licensed") == 1
+
+    readme = "## Usage\nRun it.\n## License\nMIT, see LICENSE.\n## Contributing\nPRs welcome.\n"
+    assert strip_boilerplate(readme, "README.md", 10) == "## Usage\nRun it.\n## Contributing\nPRs welcome.\n"
+
+    lock = '[[package]]\nname = "httpx"\nversion = "0.28.1"\nfiles = [\n    {file = "httpx.whl", hash = "sha256:0123456789abcdef0123456789abcdef"},\n]\n'
+    assert strip_boilerplate(lock, "poetry.lock", 5) == '[[package]]\nname = "httpx"\nversion = "0.28.1"\nfiles = [\n]\n'
+
+
+def test_pack_enforces_budget_and_orders_by_file():
+    documents = [chunk(10, 11), Document(page_content="x = 1\n" * 200, metadata={"path": "big.py"}),
+                 chunk(1, 2, path="README.md"), chunk(12, 13)]
+    packed = ContextPacker(token_budget=50).pack(documents, "what does line 10 do?")
+    assert [(d.metadata["path"], d.metadata.get("start_line")) for d in packed.documents] == [
+        ("README.md", 1), ("src/app.py", 10)]
+    assert packed.documents[1].page_content == "".join(FILE[9:13])
+    assert packed.dropped == 1 and packed.tokens <= 50
+
+
+def test_budget_follows_the_model_context_window():
+    class Model:
+        num_ctx = 8192
+        num_predict = 512
+
+    assert ContextPacker.for_model(Model()).token_budget == 8192 - 512 - 256
+    assert ContextPacker.for_model(Model(), token_budget=1000).token_budget == 1000
+
+
+def test_chunks_with_stale_line_spans_are_not_merged():
+    # `b` was indexed before `def z` was inserted above `a`: its span now points into `a`
+    a = Document(page_content="def a():\n    return 1\n", metadata={"path": "m.py", "start_line": 3, "end_line": 4})
+    b = Document(page_content="def b():\n    return 2\n", metadata={"path": "m.py", "start_line": 4, "end_line": 5})
+    wrong_length = Document(page_content="def c():\n", metadata={"path": "m.py", "start_line": 5, "end_line": 7})
+    merged = merge_adjacent([a, b, wrong_length])
+    assert sorted(d.page_content for _, d in merged) == ["def a():\n    return 1\n", "def b():\n    return 2\n",
+                                                         "def c():\n"]
+
+    packed = ContextPacker(token_budget=500).pack([a, b], "what does b return?")
+    assert "def b():" in "".join(d.page_content for d in packed.documents)
@@ -0,0 +1,162 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from github_loader import StreamingGithubLoader
+from local_loader import LocalRepoLoader, git_blob_sha
+
+FILES = {
+    "README.md": ("sha-readme", b"# Reader agent\n"),
+    "src/app.py": ("sha-app", b"print('hello')\n"),
+    "poetry.lock": ("sha-lock", b"[[package]]\nname = 'x'\n" * 500),
+    "big.py": ("sha-big", b"x = 1\n" * 500),
+    "logo.png": ("sha-png", b"\x89PNG"),
+}
+TREE_ETAG = '"tree-v1"'
+
+
+def blob_entries(prefix=""):
+    return [
+        {"path": path[len(prefix):], "type": "blob", "sha": sha, "size": len(content)}
+        for path, (sha, content) in FILES.items()
+        if path.startswith(prefix) and "/" not in path[len(prefix):]
+    ]
+
+
+class FakeGithubHandler(BaseHTTPRequestHandler):
+    requests_seen = []
+    # "root" truncates the recursive listing, "subtree" also truncates the listing of src/.
+    truncate = None
+
+    def do_GET(self):
+        self.requests_seen.append(self.path)
+        if self.path.startswith("/repos/owner/repo/git/trees/main"):
+            if self.headers.get("If-None-Match") == TREE_ETAG:
+                self.send_response(304)
+                self.end_headers()
+                return
+            tree = [{"path": "src", "type": "tree", "sha": "sha-src"}]
+            tree += [
+                {"path": path, "type": "blob", "sha": sha, "size": len(content)}
+                for path, (sha, content) in FILES.items()
+            ]
+            body = {"sha": "sha-root", "tree": tree[:2], "truncated": True} if self.truncate else {"tree": tree}
+            self._send(json.dumps(body).encode(), {"ETag": TREE_ETAG})
+        elif self.path == "/repos/owner/repo/git/trees/sha-root":
+            tree = [{"path": "src", "type": "tree", "sha": "sha-src"}] + blob_entries()
+            self._send(json.dumps({"sha": "sha-root", "tree": tree, "truncated": False}).encode())
+        elif self.path == "/repos/owner/repo/git/trees/sha-src":
+            body = {"sha": "sha-src", "tree": blob_entries("src/"), "truncated": self.truncate == "subtree"}
+            self._send(json.dumps(body).encode())
+        elif self.path.startswith("/repos/owner/repo/git/blobs/"):
+            sha = self.path.rsplit("/", 1)[1]
+            content = next(c for s, c in FILES.values() if s == sha)
+            self._send(content)
+        else:
+            self.send_response(404)
+            self.end_headers()
+
+    def _send(self, body, headers=None):
+        self.send_response(200)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def github_api():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeGithubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    FakeGithubHandler.requests_seen = []
+    FakeGithubHandler.truncate = None
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+def make_loader(github_api, tmp_path, **kwargs):
+    return StreamingGithubLoader(
+        repo="owner/repo",
+        github_api_url=github_api,
+        file_filter=lambda path: path.endswith((".py", ".md", ".lock", ".png")),
+        etag_cache_path=tmp_path / "etags.json",
+        max_workers=2,
+        **kwargs,
+    )
+
+
+def test_lists_blobs_and_streams_documents(github_api, tmp_path):
+    loader = make_loader(github_api, tmp_path)
+    files = loader.get_file_paths()
+    assert sorted(f["path"] for f in files) == sorted(FILES)
+
+    docs = {d.metadata["path"]: d for d in loader.iter_documents(files)}
+    assert docs["README.md"].page_content == "# Reader agent\n"
+    assert docs["src/app.py"].metadata["sha"] == "sha-app"
+    assert "logo.png" in loader.skipped_files
+
+
+def test_unchanged_tree_is_a_conditional_request(github_api, tmp_path):
+    make_loader(github_api, tmp_path).get_file_paths()
+    loader = make_loader(github_api, tmp_path)
+    files = loader.get_file_paths()
+    assert loader.tree_unchanged
+    assert len(files) == len(FILES)
+
+
+def test_truncated_tree_is_listed_directory_by_directory(github_api, tmp_path):
+    FakeGithubHandler.truncate = "root"
+    loader = make_loader(github_api, tmp_path)
+    files = loader.get_file_paths()
+    assert sorted(f["path"] for f in files) == sorted(FILES)
+    assert "/repos/owner/repo/git/trees/sha-src" in FakeGithubHandler.requests_seen
+    # The completed listing is what a later 304 reuses.
+    assert len(make_loader(github_api, tmp_path).get_file_paths()) == len(FILES)
+
+
+def test_truncated_subtree_raises_instead_of_returning_a_partial_listing(github_api, tmp_path):
+    FakeGithubHandler.truncate = "subtree"
+    loader = make_loader(github_api, tmp_path)
+    with pytest.raises(RuntimeError, match="truncated"):
+        loader.get_file_paths()
+    assert not (tmp_path / "etags.json").exists()
+
+
+def test_only_requested_files_are_fetched(github_api, tmp_path):
+    loader = make_loader(github_api, tmp_path)
+    files = [f for f in loader.get_file_paths() if f["path"] == "src/app.py"]
+    assert [d.metadata["path"] for d in loader.iter_documents(files)] == ["src/app.py"]
+    blob_requests = [p for p in FakeGithubHandler.requests_seen if "/git/blobs/" in p]
+    assert blob_requests == ["/repos/owner/repo/git/blobs/sha-app"]
+
+
+def test_oversized_files_are_skipped_or_sampled(github_api, tmp_path):
+    loader = make_loader(github_api, tmp_path, max_file_size=1000, sample_size=100)
+    docs = {d.metadata["path"]: d for d in loader.lazy_load()}
+    assert "big.py" not in docs
+    assert "big.py" in loader.skipped_files
+    assert docs["poetry.lock"].page_content.startswith("[[package]]")
+    assert "truncated: sampled 100 of" in docs["poetry.lock"].page_content
+
+
+def test_local_loader_reads_a_checkout_like_the_github_loader(tmp_path):
+    for path, (_, content) in FILES.items():
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_bytes(content)
+    (tmp_path / "logo.png").write_bytes(b"\x89PNG\xff\xfe")
+    loader = LocalRepoLoader(tmp_path, file_filter=lambda p: not p.endswith(".md"), max_file_size=1000, sample_size=100)
+
+    files = {f["path"]: f for f in loader.get_file_paths()}
+    assert sorted(files) == ["big.py", "logo.png", "poetry.lock", "src/app.py"]
+    assert files["src/app.py"]["sha"] == git_blob_sha(b"print('hello')\n")
+    docs = {d.metadata["path"]: d for d in loader.iter_documents(files.values())}
+    assert sorted(docs) == ["poetry.lock", "src/app.py"]
+    assert sorted(loader.skipped_files) == ["big.py", "logo.png"]
+    assert "truncated: sampled 100 of" in docs["poetry.lock"].page_content
@@ -0,0 +1,82 @@
+from langchain_core.documents import Document
+
+from hybrid_retriever import HybridRetriever, budget_context, reciprocal_rank_fusion
+from indexer import IncrementalIndexer, IndexManifest
+from keyword_index import BM25Index, tokenize
+
+
+class FakeVectorStore:
+    """Returns a fixed dense ranking, like an embedding model that misses identifiers."""
+
+    def __init__(self, documents):
+        self.documents = {d.id: d for d in documents}
+
+    def similarity_search(self, query, k=4):
+        return list(self.documents.values())[:k]
+
+    def get(self, ids=None, include=None):
+        docs = [self.documents[i] for i in ids]
+        return {"ids": ids, "documents": [d.page_content for d in docs], "metadatas": [d.metadata for d in docs]}
+
+
+def doc(cid, text, path="src/app.py"):
+    return Document(page_content=text, metadata={"path": path}, id=cid)
+
+
+CHUNKS = [
+    doc("a", "def login(request):\n    session = create_session(request.user)\n    return session"),
+    doc("b", "# Authentication\nUsers sign in with a password and get a session cookie.", "README.md"),
+    doc("c", "def verifyToken(token):\n    return jwt.decode(token, SECRET_KEY, algorithms=['HS256'])"),
+    doc("d", "[tool.poetry]\nname = 'reader-agent'\nmax_retries = 3", "pyproject.toml"),
+]
+
+
+def test_tokenize_splits_compound_identifiers():
+    assert tokenize("verifyToken MAX_RETRIES") == ["verifytoken", "verify", "token", "max_retries", "max", "retries"]
+
+
+def test_bm25_index_is_incremental_and_persistent(tmp_path):
+    path = tmp_path / "bm25.jsonl"
+    index = BM25Index(path)
+    index.upsert([d.id for d in CHUNKS], CHUNKS)
+    assert index.search("where is max_retries configured?", k=1)[0][0].id == "d"
+    assert index.search("verify token", k=1)[0][0].id == "c"
+
+    index.delete(["d"])
+    index.upsert(["c"], [doc("c", "def check_signature(token): ...")])
+    reopened = BM25Index(path)
+    assert reopened.ids() == {"a", "b", "c"}
+    assert reopened.search("max_retries") == []
+    assert reopened.search("check signature", k=1)[0][0].id == "c"
+    assert len(path.read_text().splitlines()) == 3
+
+
+def test_hybrid_retriever_finds_identifiers_dense_search_misses(tmp_path):
+    index = BM25Index(tmp_path / "bm25.jsonl")
+    index.upsert([d.id for d in CHUNKS], CHUNKS)
+    retriever = HybridRetriever(vector_store=FakeVectorStore(CHUNKS), keyword_index=index, k=2, candidates=2)
+    results = retriever.invoke("What does verifyToken check?")
+    assert [d.id for d in results][0] == "c"
+
+
+def test_reciprocal_rank_fusion_and_budget():
+    a, b, c = CHUNKS[:3]
+    fused = reciprocal_rank_fusion([[a, b, c], [c, a]])
+    assert [d.id for d, _ in fused] == ["a", "c", "b"]
+
+    copy = doc("a2", a.page_content, "vendor/app.py")
+    assert [d.id for d in budget_context([a, copy, b, c], k=3)] == ["a", "b", "c"]
+    big = doc("big", "x = 1\n" * 100)
+    assert [d.id for d in budget_context([a, big, b], k=3, max_tokens=60)] == ["a", "b"]
+
+
+def test_indexer_backfills_the_keyword_index_from_the_vector_store(tmp_path):
+    manifest = IndexManifest(tmp_path / "manifest.json", {"src/app.py": {"sha": "1", "chunks": {"a": "h", "c": "h"}}})
+    index = BM25Index(tmp_path / "bm25.jsonl")
+    index.upsert(["stale"], [doc("stale", "old chunk")])
+    store = FakeVectorStore(CHUNKS)
+    store.get = lambda ids=None, include=None: (
+        {"ids": list(store.documents)} if include == [] else FakeVectorStore.get(store, ids, include)
+    )
+    IncrementalIndexer(store, None, manifest, None, keyword_index=index).reconcile()
+    assert index.ids() == {"a", "c"}
@@ -0,0 +1,183 @@
+import pytest
+from langchain_core.documents import Document
+
+from indexer import IncrementalIndexer, IndexManifest
+from ingest import EmbeddingPipeline
+
+
+class FakeLoader:
+    """A repository as {path: (sha, text)}; it counts the files it is asked to download."""
+
+    def __init__(self, files):
+        self.files = files
+        self.downloaded = []
+
+    def get_file_paths(self):
+        return [{"path": path, "sha": sha} for path, (sha, _) in self.files.items()]
+
+    def iter_documents(self, files):
+        for file in files:
+            self.downloaded.append(file["path"])
+            sha, text = self.files[file["path"]]
+            yield Document(page_content=text, metadata={"path": file["path"], "sha": sha})
+
+
+class ParagraphSplitter:
+    """One chunk per blank-line separated paragraph."""
+
+    fingerprint = "paragraphs-v1"
+
+    def split_documents(self, documents):
+        return [Document(page_content=part, metadata=dict(d.metadata))
+                for d in documents for part in d.page_content.split("\n\n") if part]
+
+
+class MemoryStore:
+    def __init__(self, fail_on=None):
+        self.chunks = {}
+        self.fail_on = fail_on
+
+    def upsert(self, ids, vectors, documents):
+        if self.fail_on in (d.page_content for d in documents):
+            raise ConnectionError("vector store is down")
+        self.chunks.update((cid, doc.page_content) for cid, doc in zip(ids, documents))
+
+    def get(self, ids=None, include=()):
+        ids = list(self.chunks) if ids is None else [cid for cid in ids if cid in self.chunks]
+        return {"ids": ids, "documents": [self.chunks[cid] for cid in ids], "metadatas": [{} for _ in ids]}
+
+    def delete(self, ids):
+        for cid in ids:
+            self.chunks.pop(cid, None)
+
+
+class CountingEmbeddings:
+    def __init__(self):
+        self.embedded = []
+
+    def embed_documents(self, texts):
+        self.embedded += texts
+        return [[float(len(t))] for t in texts]
+
+
+def make_indexer(tmp_path, store, fingerprint="paragraphs-v1"):
+    splitter = ParagraphSplitter()
+    splitter.fingerprint = fingerprint
+    embeddings = CountingEmbeddings()
+    pipeline = EmbeddingPipeline(embeddings, store.upsert, batch_size=1, max_workers=1, progress=None)
+    manifest = IndexManifest.load(tmp_path / "manifest.json", fingerprint=splitter.fingerprint)
+    return IncrementalIndexer(store, splitter, manifest, pipeline), embeddings
+
+
+REPO = {
+    "a.py": ("sha-a1", "def a():\n    pass\n\ndef b():\n    pass"),
+    "b.md": ("sha-b1", "# Title\n\nSome text"),
+    "c.toml": ("sha-c1", "[tool]\nname = 'c'"),
+}
+
+
+def stored_texts(store):
+    return sorted(store.chunks.values())
+
+
+def test_first_sync_indexes_every_chunk_and_saves_the_manifest(tmp_path):
+    store = MemoryStore()
+    indexer, _ = make_indexer(tmp_path, store)
+    stats = indexer.sync(FakeLoader(dict(REPO)))
+
+    assert (stats.updated_files, stats.added_chunks, stats.deleted_chunks) == (3, 5, 0)
+    manifest = IndexManifest.load(tmp_path / "manifest.json", fingerprint="paragraphs-v1")
+    assert {p: e["sha"] for p, e in manifest.files.items()} == {"a.py": "sha-a1", "b.md": "sha-b1", "c.toml": "sha-c1"}
+    assert sorted(manifest.all_chunk_ids()) == sorted(store.chunks)
+
+
+def test_unchanged_files_are_skipped_and_only_changed_chunks_are_embedded(tmp_path):
+    store = MemoryStore()
+    make_indexer(tmp_path, store)[0].sync(FakeLoader(dict(REPO)))
+
+    files = dict(REPO)
+    files["a.py"] = ("sha-a2", "def a():\n    pass\n\ndef b():\n    return 2")  # one function rewritten
+    del files["b.md"]
+    loader = FakeLoader(files)
+    indexer, embeddings = make_indexer(tmp_path, store)
+    stats = indexer.sync(loader)
+
+    assert loader.downloaded == ["a.py"]
+    assert embeddings.embedded == ["def b():\n    return 2"]
+    assert (stats.unchanged_files, stats.updated_files, stats.removed_files) == (1, 1, 1)
+    assert (stats.added_chunks, stats.deleted_chunks) == (1, 3)
+    assert stored_texts(store) == ["[tool]\nname = 'c'", "def a():\n    pass", "def b():\n    return 2"]
+    assert sorted(indexer.manifest.all_chunk_ids()) == sorted(store.chunks)
+
+
+def test_files_that_become_empty_lose_their_chunks(tmp_path):
+    store = MemoryStore()
+    make_indexer(tmp_path, store)[0].sync(FakeLoader(dict(REPO)))
+
+    stats = make_indexer(tmp_path, store)[0].sync(FakeLoader({**REPO, "b.md": ("sha-b2", "")}))
+    assert stats.deleted_chunks == 2
+    assert "# Title" not in stored_texts(store)
+
+
+def test_a_new_chunking_fingerprint_rebuilds_the_index(tmp_path):
+    store = MemoryStore()
+    make_indexer(tmp_path, store)[0].sync(FakeLoader(dict(REPO)))
+
+    loader = FakeLoader(dict(REPO))
+    indexer, embeddings = make_indexer(tmp_path, store, fingerprint="paragraphs-v2")
+    stats = indexer.sync(loader)
+    assert sorted(loader.downloaded) == sorted(REPO)
+    assert len(embeddings.embedded) == 5 and stats.updated_files == 3
+    assert len(store.chunks) == 5  # the old chunks were cleared, not duplicated
+
+
+def test_the_manifest_keeps_the_files_stored_before_a_failure(tmp_path):
+    store = MemoryStore(fail_on="Some text")
+    with pytest.raises(ConnectionError):
+        make_indexer(tmp_path, store)[0].sync(FakeLoader(dict(REPO)))
+
+    manifest = IndexManifest.load(tmp_path / "manifest.json", fingerprint="paragraphs-v1")
+    assert list(manifest.files) == ["a.py"]  # b.md was half written, c.toml never reached
+
+    store.fail_on = None
+    loader = FakeLoader(dict(REPO))
+    indexer, embeddings = make_indexer(tmp_path, store)
+    indexer.sync(loader)
+    assert loader.downloaded == ["b.md", "c.toml"]
+    # b.md is embedded again in full: its stored chunk is overwritten under the same id
+    assert embeddings.embedded == ["# Title", "Some text", "[tool]\nname = 'c'"]
+    assert len(store.chunks) == 5
+    assert sorted(indexer.manifest.all_chunk_ids()) == sorted(store.chunks)
+
+
+def test_chunks_moved_by_an_edit_get_their_new_line_span(tmp_path):
+    from chunker import CodeAwareSplitter
+
+    store = MemoryStore()
+    spans = {}
+
+    def upsert(ids, vectors, documents):
+        store.upsert(ids, vectors, documents)
+        spans.update((d.page_content.split("(")[0], (d.metadata["start_line"], d.metadata["end_line"]))
+                     for d in documents)
+
+    def sync(text, sha):
+        splitter = CodeAwareSplitter(chunk_size=40)
+        manifest = IndexManifest.load(tmp_path / "manifest.json", fingerprint=splitter.fingerprint)
+        pipeline = EmbeddingPipeline(CountingEmbeddings(), upsert, batch_size=1, max_workers=1, progress=None)
+        indexer = IncrementalIndexer(store, splitter, manifest, pipeline)
+        stats = indexer.sync(FakeLoader({"m.py": (sha, text)}))
+        assert sorted(indexer.manifest.all_chunk_ids()) == sorted(store.chunks)
+        return stats
+
+    function = "def {0}():\n    return '{0}' * 10\n"
+    sync(function.format("a") + function.format("b"), "1")
+    assert spans == {"def a": (1, 2), "def b": (3, 4)}
+
+    stats = sync(function.format("z") + function.format("a") + function.format("b"), "2")
+    assert spans == {"def z": (1, 2), "def a": (3, 4), "def b": (5, 6)}
+    assert (stats.added_chunks, stats.deleted_chunks) == (3, 2)
+
+    # An edit below a chunk leaves it where it was: it is not rewritten
+    stats = sync(function.format("z") + function.format("a") + function.format("c"), "3")
+    assert (stats.added_chunks, stats.deleted_chunks) == (1, 1)
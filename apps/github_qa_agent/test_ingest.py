@@ -0,0 +1,134 @@
+import threading
+import time
+
+import pytest
+from langchain_core.documents import Document
+
+from indexer import IncrementalIndexer, IndexManifest
+from ingest import EmbeddingPipeline
+
+
+def items(n):
+    return [(f"id{i}", Document(page_content=f"chunk {i}")) for i in range(n)]
+
+
+class SlowEmbeddings:
+    """Earlier batches take longer, so they finish out of order."""
+
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.threads = set()
+
+    def embed_documents(self, texts):
+        self.threads.add(threading.current_thread().name)
+        if self.fail_on in texts:
+            raise RuntimeError("embedding model crashed")
+        first = int(texts[0].split()[1])
+        time.sleep(0.02 * max(0, 5 - first))
+        return [[float(t.split()[1])] for t in texts]
+
+
+class SlowEmbeddingsByLength:
+    def embed_documents(self, texts):
+        time.sleep(0.01)
+        return [[float(len(t))] for t in texts]
+
+
+class RecordingStore:
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.batches = []
+        self.stored = {}
+
+    def upsert(self, ids, vectors, documents):
+        if self.fail_on in ids:
+            raise ConnectionError("vector store is down")
+        self.batches.append(ids)
+        self.stored.update(zip(ids, vectors))
+
+
+def test_batches_are_written_in_input_order_with_their_own_vectors():
+    store = RecordingStore()
+    embeddings = SlowEmbeddings()
+    written = EmbeddingPipeline(embeddings, store.upsert, batch_size=2, max_workers=3, progress=None).run(items(9))
+
+    assert written == 9
+    assert store.batches == [["id0", "id1"], ["id2", "id3"], ["id4", "id5"], ["id6", "id7"], ["id8"]]
+    assert all(store.stored[f"id{i}"] == [float(i)] for i in range(9))
+    assert len(embeddings.threads) > 1
+
+
+def test_on_written_runs_after_each_batch_is_stored():
+    store = RecordingStore()
+    seen = []
+
+    def on_written(ids):
+        assert all(cid in store.stored for cid in ids)
+        seen.append(ids)
+
+    EmbeddingPipeline(SlowEmbeddings(), store.upsert, batch_size=3, progress=None).run(items(7), on_written)
+    assert seen == store.batches
+
+
+@pytest.mark.parametrize("embed_fail, upsert_fail, error, reported", [
+    # The batch before the failing embedding is still being written: it is stored but not reported
+    ("chunk 4", None, RuntimeError, ["id0", "id1"]),
+    (None, "id4", ConnectionError, ["id0", "id1", "id2", "id3"]),
+])
+def test_embedding_and_upsert_errors_propagate(embed_fail, upsert_fail, error, reported):
+    store = RecordingStore(fail_on=upsert_fail)
+    seen = []
+    pipeline = EmbeddingPipeline(SlowEmbeddings(fail_on=embed_fail), store.upsert, batch_size=2, progress=None)
+    with pytest.raises(error):
+        pipeline.run(items(9), on_written=seen.extend)
+    assert seen == reported
+    assert sorted(store.stored) == ["id0", "id1", "id2", "id3"]
+
+
+def test_a_file_is_committed_to_the_manifest_only_once_all_its_chunks_are_stored(tmp_path):
+    class Loader:
+        def get_file_paths(self):
+            return [{"path": "big.py", "sha": "1"}, {"path": "small.py", "sha": "2"}]
+
+        def iter_documents(self, files):
+            yield Document(page_content="a\n\nb\n\nc\n\nd\n\ne", metadata={"path": "big.py", "sha": "1"})
+            yield Document(page_content="f", metadata={"path": "small.py", "sha": "2"})
+
+    class Splitter:
+        fingerprint = ""
+
+        def split_documents(self, documents):
+            return [Document(page_content=p, metadata=dict(d.metadata))
+                    for d in documents for p in d.page_content.split("\n\n")]
+
+    stored = set()
+    manifest = IndexManifest(tmp_path / "manifest.json")
+
+    def upsert(ids, vectors, documents):
+        # Every file in the manifest must already be fully stored when the next batch is written
+        for entry in manifest.files.values():
+            assert set(entry["chunks"]) <= stored
+        stored.update(ids)
+
+    class Store:
+        def get(self, ids=None, include=()):
+            return {"ids": sorted(stored)}
+
+        def delete(self, ids):
+            stored.difference_update(ids)
+
+    commits = []
+    pipeline = EmbeddingPipeline(SlowEmbeddingsByLength(), upsert, batch_size=2, max_workers=2, progress=None)
+    indexer = IncrementalIndexer(Store(), Splitter(), manifest, pipeline)
+    original_run = pipeline.run
+
+    def run(chunks, on_written):
+        def tracked(ids):
+            on_written(ids)
+            commits.append((sorted(manifest.files), len(stored)))
+        return original_run(chunks, tracked)
+
+    pipeline.run = run
+    indexer.sync(Loader())
+    # Batches: [a b] [c d] [e f]; big.py is only complete with the last one
+    assert commits == [([], 2), ([], 4), (["big.py", "small.py"], 6)]
@@ -0,0 +1,91 @@
+import numpy as np
+from langchain_core.documents import Document
+
+from local_store import LOG_FILE, VECTORS_FILE, LocalVectorStore
+
+
+class FakeEmbeddings:
+    """One-hot-ish vectors: every word of the text adds to its own dimension."""
+
+    def __init__(self, dim=8):
+        self.dim = dim
+
+    def embed_query(self, text):
+        vector = [0.0] * self.dim
+        for word in text.split():
+            vector[sum(map(ord, word)) % self.dim] += 1.0
+        return vector
+
+    def embed_documents(self, texts):
+        return [self.embed_query(t) for t in texts]
+
+
+def store_at(path, **kwargs):
+    return LocalVectorStore(path, FakeEmbeddings(), **kwargs)
+
+
+def put(store, cid, text):
+    store.add_texts([text], metadatas=[{"path": f"{cid}.py"}], ids=[cid])
+
+
+def test_round_trip(tmp_path):
+    store = store_at(tmp_path)
+    put(store, "a", "alpha")
+    put(store, "b", "beta gamma")
+
+    reopened = store_at(tmp_path)
+    assert reopened.get() == store.get()
+    [top] = reopened.similarity_search("beta gamma", k=1)
+    assert top.id == "b" and top.metadata == {"path": "b.py"}
+
+
+def test_deleted_slot_is_reused_and_survives_repeated_reloads(tmp_path):
+    store = store_at(tmp_path)
+    put(store, "a", "alpha")
+    put(store, "b", "beta")
+    store.delete(["a"])
+    put(store, "c", "gamma")  # reuses slot 0, so the log holds slot 0 after slot 1
+
+    for _ in range(3):
+        store = store_at(tmp_path)
+        assert sorted(store.get()["ids"]) == ["b", "c"]
+        assert store.similarity_search("gamma", k=1)[0].id == "c"
+
+
+def test_holes_left_by_deletions_survive_a_reload(tmp_path):
+    store = store_at(tmp_path)
+    for cid in "abc":
+        put(store, cid, f"text {cid}")
+    store.delete(["a", "b"])
+
+    store = store_at(tmp_path)
+    store = store_at(tmp_path)
+    assert store.get()["ids"] == ["c"]
+    put(store, "d", "delta")
+    assert sorted(store_at(tmp_path).get()["ids"]) == ["c", "d"]
+
+
+def test_missing_vectors_file_means_an_empty_index(tmp_path):
+    put(store_at(tmp_path), "a", "alpha")
+    (tmp_path / VECTORS_FILE).unlink()
+
+    store = store_at(tmp_path)
+    assert store.get()["ids"] == []
+    assert not (tmp_path / LOG_FILE).exists()
+    put(store, "b", "beta")
+    assert store_at(tmp_path).get()["ids"] == ["b"]
+
+
+def test_ivf_search_matches_brute_force(tmp_path):
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(400, 16)).astype(np.float32)
+    ids = [f"c{i}" for i in range(len(vectors))]
+    documents = [Document(page_content=cid) for cid in ids]
+    flat = store_at(tmp_path / "flat", ivf_min_size=None)
+    ivf = store_at(tmp_path / "ivf", ivf_min_size=100, nprobe=20)  # 20 lists: probe all of them
+    for store in (flat, ivf):
+        store.upsert(ids, vectors, documents)
+
+    for query in rng.normal(size=(5, 16)):
+        expected = [d.id for d in flat.similarity_search_by_vector(query, k=5)]
+        assert [d.id for d in ivf.similarity_search_by_vector(query, k=5)] == expected
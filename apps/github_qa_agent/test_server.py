@@ -0,0 +1,154 @@
+import asyncio
+import json
+
+from server import QAServer
+
+
+class FakeCache:
+    version = "v1"
+
+    def __len__(self):
+        return 0
+
+
+class FakeAgent:
+    answer_cache = FakeCache()
+
+    def __init__(self):
+        self.running = 0
+        self.peak = 0
+
+    async def astream(self, question):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            yield "sources", ["src/app.py:1-10"]
+            for word in question.split():
+                await asyncio.sleep(0.05)
+                yield "token", word + " "
+            yield "done", {"cached": False, "ttft_s": 0.05, "latency_s": 0.1}
+        finally:
+            self.running -= 1
+
+
+async def request(port, raw: str) -> tuple[int, str]:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(raw.encode())
+    await writer.drain()
+    response = (await reader.read()).decode()
+    writer.close()
+    return int(response.split()[1]), response.split("\r\n\r\n", 1)[1]
+
+
+def post(question):
+    body = json.dumps({"question": question})
+    return f"POST /ask HTTP/1.1\r\nHost: x\r\nContent-Length: {len(body)}\r\n\r\n{body}"
+
+
+def events(body):
+    parsed = []
+    for block in body.strip().split("\n\n"):
+        event, data = block.split("\n")
+        parsed.append((event.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return parsed
+
+
+def run_with_server(scenario, **options):
+    async def main():
+        agent = FakeAgent()
+        qa_server = QAServer(agent, **options)
+        server = await qa_server.start("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            return await scenario(port, qa_server, agent)
+    return asyncio.run(main())
+
+
+def test_ask_streams_server_sent_events():
+    async def scenario(port, qa_server, agent):
+        status, body = await request(port, post("how does it load files"))
+        assert status == 200
+        assert events(body) == [
+            ("sources", ["src/app.py:1-10"]),
+            *[("token", w + " ") for w in ["how", "does", "it", "load", "files"]],
+            ("done", {"cached": False, "ttft_s": 0.05, "latency_s": 0.1}),
+        ]
+        status, body = await request(port, "GET /ask?q=two%20words HTTP/1.1\r\n\r\n")
+        assert [e for e, _ in events(body)] == ["sources", "token", "token", "done"]
+        status, _ = await request(port, "GET /ask HTTP/1.1\r\n\r\n")
+        assert status == 400
+
+    run_with_server(scenario)
+
+
+def test_admission_control_caps_in_flight_and_rejects_when_queue_is_full():
+    async def scenario(port, qa_server, agent):
+        results = await asyncio.gather(*[request(port, post("a b c d")) for _ in range(5)])
+        statuses = sorted(status for status, _ in results)
+        assert statuses == [200, 200, 200, 503, 503]
+        assert agent.peak == 2
+
+        status, body = await request(port, "GET /health HTTP/1.1\r\n\r\n")
+        health = json.loads(body)
+        assert health["status"] == "ok" and health["index_version"] == "v1" and health["in_flight"] == 0
+
+        status, body = await request(port, "GET /metrics HTTP/1.1\r\n\r\n")
+        assert 'qa_requests_total{path="/ask",status="503"} 2' in body
+        assert "qa_rejected_total 2" in body
+        assert 'qa_answers_total{source="generated"} 3' in body
+        assert "qa_answer_latency_seconds_count 3" in body
+
+    run_with_server(scenario, max_in_flight=2, max_queue=1)
+
+
+def test_qa_agent_streams_then_answers_repeats_from_cache():
+    from langchain_core.documents import Document
+    from langchain_core.language_models import GenericFakeChatModel
+    from langchain_core.messages import AIMessage
+    from langchain_core.runnables import RunnableLambda
+
+    from answer_cache import SemanticAnswerCache
+    from context_packer import ContextPacker
+    from qa_agent import QAAgent
+
+    class Retriever:
+        async def ainvoke(self, question):
+            return [Document(page_content="def load(): ...\n", metadata={"path": "loader.py", "start_line": 1, "end_line": 1})]
+
+    class Embeddings:
+        def embed_query(self, text):
+            return [1.0, float(len(text))]
+
+    llm = GenericFakeChatModel(messages=iter([AIMessage(content="It loads files")]))
+    chain = RunnableLambda(lambda inputs: inputs["input"]) | llm
+    agent = QAAgent(Retriever(), ContextPacker(1000), chain, SemanticAnswerCache(Embeddings()))
+
+    async def collect(question):
+        return [item async for item in agent.astream(question)]
+
+    first = asyncio.run(collect("how are files loaded?"))
+    assert first[0] == ("sources", ["loader.py:1-1"])
+    assert "".join(data for event, data in first if event == "token") == "It loads files"
+    assert first[-1][0] == "done" and first[-1][1]["cached"] is False
+
+    again = asyncio.run(collect("how are files loaded?"))
+    assert again[1] == ("token", "It loads files")
+    assert again[-1][1]["cached"] is True
+
+
+def test_unexpected_errors_get_a_500_and_the_server_keeps_serving():
+    async def scenario(port, qa_server, agent):
+        def broken_health():
+            raise KeyError("uptime_s")
+
+        qa_server.health = broken_health
+        status, body = await request(port, "GET /health HTTP/1.1\r\n\r\n")
+        assert status == 500 and json.loads(body) == {"error": "Internal server error"}
+
+        status, _ = await request(port, post("still alive"))
+        assert status == 200
+        status, body = await request(port, "GET /metrics HTTP/1.1\r\n\r\n")
+        assert 'qa_requests_total{path="/health",status="500"} 1' in body
+        assert not qa_server._responded
+
+    run_with_server(scenario)
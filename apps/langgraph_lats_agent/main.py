@@ -1,98 +1,261 @@
 # langgraph_lats_agent.py
+# Language Agent Tree Search (LATS): Monte-Carlo tree search over agent trajectories.
+# Each iteration of the graph selects the most promising leaf with UCT, samples N candidate
+# actions from it, runs those rollouts concurrently (LLM call + tool calls + LLM reflection that
+# scores the result), adds them as children and backpropagates their scores to the root.
+# The search stops when a rollout solves the task or the node/time budget is spent.
 import gc
 import json
+import math
+import os
+import re
+import time
+import uuid
 import asyncio
 from functools import partial
-from typing import List, TypedDict
+from pathlib import Path
+from typing import List, Optional, TypedDict
 
-from langchain_core.messages import AIMessage, BaseMessage, ToolMessage, HumanMessage
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
 from langchain_core.tools import tool
 from langchain_ollama import ChatOllama
 from langgraph.graph import StateGraph, END
-from ddgs import DDGS
-from ollama_utils import get_ollama_models
+from ollama_utils import ParallelToolExecutor, SQLiteCheckpointSaver, WebSearch, get_chat_model, prewarm_models, tracer
 
-# --- 1. State Definition ---
-class AgentState(TypedDict):
-    messages: List[BaseMessage]
+AGENT_MODEL = "qwen3:latest"
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+SEARCH_CACHE_PATH = PROJECT_ROOT / "data" / "web-search.sqlite"
+CHECKPOINT_PATH = PROJECT_ROOT / "data" / "checkpoints" / "lats-agent.sqlite"
+# Set AGENT_THREAD_ID to resume an interrupted search, and AGENT_REPLAY_STEP to fork it from an earlier step.
+THREAD_ID = os.getenv("AGENT_THREAD_ID") or uuid.uuid4().hex[:8]
+REPLAY_STEP = os.getenv("AGENT_REPLAY_STEP")
+
+# --- Search Settings ---
+N_CANDIDATES = 3          # Children sampled per expansion
+MAX_CONCURRENCY = 3       # Rollouts (LLM + tools + reflection) running at the same time
+MAX_NODES = 12            # Node budget for the whole tree
+MAX_SECONDS = 300         # Wall-clock budget
+MAX_DEPTH = 4             # Deepest trajectory explored
+EXPLORATION_WEIGHT = 1.0  # UCT exploration constant
+
+# --- 1. Search Tree ---
+class Node:
+    """A node of the search tree: the messages its action added and the statistics of its subtree."""
+
+    def __init__(self, messages: List[BaseMessage], parent: Optional["Node"] = None,
+                 reward: float = 0.0, reflection: str = "", is_solved: bool = False):
+        self.messages = messages
+        self.parent = parent
+        self.children: List["Node"] = []
+        self.reflection = reflection
+        self.reward = reward
+        self.value = 0.0
+        self.visits = 0
+        self.is_solved = is_solved
+        self.depth = parent.depth + 1 if parent else 0
+
+    @property
+    def is_answer(self) -> bool:
+        """The node's action was a final answer: an AI message without tool calls."""
+        last = self.messages[-1] if self.messages else None
+        return isinstance(last, AIMessage) and not last.tool_calls
+
+    @property
+    def is_terminal(self) -> bool:
+        """A final answer or a node at the depth limit is never expanded."""
+        return self.depth >= MAX_DEPTH or self.is_answer
+
+    def uct(self, exploration_weight: float = EXPLORATION_WEIGHT) -> float:
+        if self.visits == 0:
+            return float("inf")
+        return self.value + exploration_weight * math.sqrt(math.log(self.parent.visits) / self.visits)
+
+    def backpropagate(self, reward: float):
+        node = self
+        while node:
+            node.visits += 1
+            node.value += (reward - node.value) / node.visits
+            node = node.parent
+
+    def trajectory(self) -> List[BaseMessage]:
+        messages = []
+        node = self
+        while node:
+            messages = node.messages + messages
+            node = node.parent
+        return messages
+
+    @property
+    def is_exhausted(self) -> bool:
+        """True when nothing below this node can be expanded any more."""
+        return self.is_terminal or (bool(self.children) and all(c.is_exhausted for c in self.children))
+
+    def iter_nodes(self):
+        yield self
+        for child in self.children:
+            yield from child.iter_nodes()
+
+def select(root: Node) -> Node:
+    """Descends from the root, always following the expandable child with the highest UCT."""
+    node = root
+    while node.children:
+        node = max((c for c in node.children if not c.is_exhausted), key=lambda c: c.uct())
+    return node
+
+def best_solution(root: Node) -> Node:
+    """
+    The best final answer found: solved answers first, then by reflection score.
+    Nodes cut off at the depth limit with tool calls pending are not answers; the best scored
+    node overall is only returned when no rollout answered at all.
+    """
+    answers = [n for n in root.iter_nodes() if n.is_answer] or list(root.iter_nodes())
+    return max(answers, key=lambda n: (n.is_solved, n.reward))
+
+# --- 2. State Definition ---
+class TreeState(TypedDict):
+    goal: str
+    root: Node
+    elapsed: float  # Seconds spent searching, summed over expansions (survives resuming a run)
+
+# --- 3. Tool Definition ---
+# Shared search service: sibling rollouts often issue the same query, which is fetched only once
+# and then served from the on-disk cache (also across runs).
+web_search = WebSearch(cache_path=SEARCH_CACHE_PATH)
 
-# --- 2. Tool Definition ---
 @tool
 def search_web(query: str) -> str:
     """Search the web for information."""
     print(f"--- ACTION: Searching for '{query}' ---")
-    with DDGS() as ddgs:
-        results = [r for r in ddgs.text(query, max_results=3)]
+    results = web_search.search(query, max_results=3)
     return json.dumps(results) if results else "[]"
 
-# --- 3. Agent Nodes ---
-async def call_agent_node(state: AgentState, model_with_tools: ChatOllama):
-    """Nó do agente: pensa e decide a próxima ação."""
-    print("\n--- AGENT: Thinking... ---")
-    response = await model_with_tools.ainvoke(state["messages"])
-    return {"messages": [response]}
+# Every tool call of a message runs at the same time, so one rollout never waits on a second round-trip.
+tool_executor = ParallelToolExecutor([search_web], timeout=30)
 
-async def call_tools_node(state: AgentState):
-    """Nó de ferramentas: executa a ferramenta escolhida pelo agente."""
+async def call_tools_node(state: dict):
+    """Nó de ferramentas: executa todas as ferramentas escolhidas pelo agente em paralelo."""
     last_message = state["messages"][-1]
     if not isinstance(last_message, AIMessage) or not last_message.tool_calls:
         return {"messages": []}
+    return {"messages": await tool_executor.arun(last_message.tool_calls)}
 
-    tool_call = last_message.tool_calls[0]
-    tool_name = tool_call["name"]
-    tool_args = tool_call["args"]
+# --- 4. Rollouts ---
+REFLECTION_PROMPT = """You are grading an AI agent's progress on a task.
 
-    if tool_name == "search_web":
-        result = await search_web.ainvoke(tool_args)
-        tool_message = ToolMessage(content=str(result), tool_call_id=tool_call["id"])
-        return {"messages": [tool_message]}
-    return {"messages": []}
+Task: {goal}
 
-# --- 4. Conditional Edge ---
-def should_continue(state: AgentState) -> str:
-    last_message = state["messages"][-1]
-    if isinstance(last_message, AIMessage) and not last_message.tool_calls:
-        return "end"
-    return "continue"
+Agent trajectory:
+{trajectory}
 
-# --- 5. Graph Construction ---
-async def run_lats_agent(goal: str):
-    # Use get_ollama_models to check available models
-    available_models = get_ollama_models()
-    print(f"Available Ollama models: {available_models}")
-    model = ChatOllama(model="qwen3:latest")
-    model_with_tools = model.bind_tools(tools=[search_web])
+Reflect on the latest step and grade the trajectory. Reply in JSON with the keys
+"reflection" (one or two sentences), "score" (an integer from 0 to 10) and
+"found_solution" (true only if the last message fully and correctly answers the task)."""
 
-    # Graph definition
-    workflow = StateGraph(AgentState)
+def render_trajectory(messages: List[BaseMessage]) -> str:
+    lines = []
+    for message in messages:
+        if isinstance(message, AIMessage) and message.tool_calls:
+            calls = ", ".join(f"{c['name']}({json.dumps(c['args'])})" for c in message.tool_calls)
+            lines.append(f"AI: {message.content} [tool calls: {calls}]")
+        else:
+            lines.append(f"{message.type.upper()}: {str(message.content)[:1500]}")
+    return "\n".join(lines)
+
+async def reflect(goal: str, messages: List[BaseMessage], judge: ChatOllama) -> tuple[float, str, bool]:
+    """Scores a trajectory with the LLM judge; returns (reward in [0, 1], reflection, found_solution)."""
+    response = await judge.ainvoke(REFLECTION_PROMPT.format(goal=goal, trajectory=render_trajectory(messages)))
+    try:
+        grade = json.loads(response.content)
+        score = float(grade.get("score", 0))
+        return min(max(score, 0.0), 10.0) / 10, str(grade.get("reflection", "")), bool(grade.get("found_solution"))
+    except (ValueError, TypeError, AttributeError):
+        match = re.search(r"\d+", str(response.content))
+        return (min(int(match.group()), 10) / 10 if match else 0.0), str(response.content), False
+
+async def rollout(goal: str, parent: Node, model_with_tools, judge: ChatOllama, semaphore: asyncio.Semaphore) -> Node:
+    """Samples one action from `parent`, runs its tools, scores the result and returns the new child."""
+    async with semaphore:
+        history = [HumanMessage(content=goal)] + parent.trajectory()
+        action = await model_with_tools.ainvoke(history)
+        new_messages = [action]
+        if action.tool_calls:
+            new_messages += (await call_tools_node({"messages": history + [action]}))["messages"]
+        reward, reflection, found_solution = await reflect(goal, history[1:] + new_messages, judge)
+    child = Node(new_messages, parent=parent, reward=reward, reflection=reflection,
+                 is_solved=found_solution and not action.tool_calls)
+    return child
+
+# --- 5. Graph Nodes ---
+async def expand_node(state: TreeState, model_with_tools, judge: ChatOllama):
+    """Selects a leaf with UCT, expands it with N concurrent rollouts and backpropagates their rewards."""
+    started = time.monotonic()
+    root = state["root"]
+    leaf = select(root)
+    remaining = MAX_NODES - (sum(1 for _ in root.iter_nodes()) - 1)
+    n = max(1, min(N_CANDIDATES, remaining))
+    print(f"\n--- SEARCH: expanding node at depth {leaf.depth} with {n} concurrent rollouts ---")
 
-    agent_node_with_model = partial(call_agent_node, model_with_tools=model_with_tools)
+    semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+    children = await asyncio.gather(*(rollout(state["goal"], leaf, model_with_tools, judge, semaphore) for _ in range(n)))
+    for child in children:
+        leaf.children.append(child)
+        child.backpropagate(child.reward)
+        status = "✅ solved" if child.is_solved else ("final answer" if child.is_terminal else "tool call")
+        print(f"   [{child.reward:.1f}] {status}: {child.reflection}")
+    return {"root": root, "elapsed": state["elapsed"] + time.monotonic() - started}
 
-    workflow.add_node("agent", agent_node_with_model)
-    workflow.add_node("tools", call_tools_node)
+def should_loop(state: TreeState) -> str:
+    """Loops back to `expand` until a rollout solves the task, the tree is exhausted or the budget runs out."""
+    root = state["root"]
+    nodes = sum(1 for _ in root.iter_nodes()) - 1
+    if any(n.is_solved for n in root.iter_nodes()):
+        return "end"
+    if nodes >= MAX_NODES or state["elapsed"] >= MAX_SECONDS:
+        print("--- SEARCH: budget exhausted ---")
+        return "end"
+    if root.is_exhausted:
+        return "end"
+    return "expand"
 
-    # Define edges
-    workflow.set_entry_point("agent")
-    workflow.add_conditional_edges(
-        "agent",
-        should_continue,
-        {"continue": "tools", "end": END},
-    )
-    workflow.add_edge("tools", "agent")
+# --- 6. Graph Construction ---
+async def run_lats_agent(goal: str):
+    # Shared client from the ollama_utils registry; load the model while the graph is being built
+    prewarm_models(AGENT_MODEL)
+    # Candidates are sampled with some temperature so siblings explore different actions.
+    model_with_tools = get_chat_model(AGENT_MODEL, temperature=0.8).bind_tools(tools=[search_web])
+    judge = get_chat_model(AGENT_MODEL, temperature=0, format="json")
 
-    app = workflow.compile()
+    # Graph definition
+    workflow = StateGraph(TreeState)
+    workflow.add_node("expand", partial(expand_node, model_with_tools=model_with_tools, judge=judge))
+    workflow.set_entry_point("expand")
+    workflow.add_conditional_edges("expand", should_loop, {"expand": "expand", "end": END})
+
+    # The search tree is saved to SQLite after every expansion.
+    checkpointer = SQLiteCheckpointSaver(CHECKPOINT_PATH)
+    app = workflow.compile(checkpointer=checkpointer)
 
     # --- Running the Agent ---
-    print(f"--- GOAL: {goal} ---")
-    initial_state = {"messages": [HumanMessage(content=goal)]}
+    if checkpointer.has_thread(THREAD_ID):
+        config = checkpointer.config_for(THREAD_ID, step=int(REPLAY_STEP) if REPLAY_STEP else None)
+        run_input = None
+        print(f"--- ⏯️ Resuming thread {THREAD_ID}" + (f" from step {REPLAY_STEP}" if REPLAY_STEP else "") + " ---")
+    else:
+        config = checkpointer.config_for(THREAD_ID)
+        run_input = {"goal": goal, "root": Node([]), "elapsed": 0.0}
+    print(f"--- GOAL: {goal} (thread {THREAD_ID}, resume with AGENT_THREAD_ID={THREAD_ID}) ---")
+
+    async for _ in app.astream(run_input, {**config, "recursion_limit": MAX_NODES + 5, "callbacks": [tracer.handler]},
+                                 durability="sync"):
+        pass
 
-    async for output in app.astream(initial_state):
-        for key, value in output.items():
-            print(f"--- Output from node '{key}' ---")
-            print(value)
-            print("-" * 30)
+    root = app.get_state(checkpointer.config_for(THREAD_ID)).values["root"]
+    best = best_solution(root)
+    print(f"\n--- BEST TRAJECTORY ({sum(1 for _ in root.iter_nodes()) - 1} nodes explored, score {best.reward:.1f}) ---")
+    for message in best.trajectory():
+        print(f"{message.type.upper()}: {message.content}")
 
 if __name__ == "__main__":
     user_goal = "What is the main concept behind the LATS framework for AI agents?"
     asyncio.run(run_lats_agent(user_goal))
-    gc.collect()
\ No newline at end of file
+    gc.collect()
@@ -0,0 +1,160 @@
+import asyncio
+import importlib.util
+import itertools
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+from langchain_core.messages import AIMessage, ToolMessage
+
+APP_DIR = Path(__file__).parent
+PACKAGES_DIR = APP_DIR.parent.parent / "packages"
+
+
+@pytest.fixture
+def lats(tmp_path, monkeypatch):
+    """The app module, loaded from a copy under a scratch project root so its data/ stays there."""
+    monkeypatch.syspath_prepend(str(PACKAGES_DIR))
+    app_file = tmp_path / "apps" / "langgraph_lats_agent" / "main.py"
+    app_file.parent.mkdir(parents=True)
+    shutil.copy(APP_DIR / "main.py", app_file)
+    spec = importlib.util.spec_from_file_location("lats_agent_under_test", app_file)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    async def canned_tools(state):
+        call = state["messages"][-1].tool_calls[0]
+        return {"messages": [ToolMessage(content=f"results for {call['args']['query']}", tool_call_id=call["id"])]}
+
+    monkeypatch.setattr(module, "call_tools_node", canned_tools)
+    return module
+
+
+def search(query):
+    return AIMessage(content="", tool_calls=[{"name": "search_web", "args": {"query": query}, "id": query}])
+
+
+def answer(text):
+    return AIMessage(content=text)
+
+
+class ScriptedModel:
+    """Returns the scripted actions in order, one per call."""
+
+    def __init__(self, actions):
+        self.actions = iter(actions)
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        return next(self.actions)
+
+
+class ScriptedJudge:
+    """Grades a trajectory by the last line of it: {text: (score, found_solution)}."""
+
+    def __init__(self, grades):
+        self.grades = grades
+
+    async def ainvoke(self, prompt):
+        trajectory = prompt.split("Agent trajectory:\n")[1].split("\n\nReflect")[0]
+        for text, (score, solved) in self.grades.items():
+            if text in trajectory.splitlines()[-1]:
+                return AIMessage(content=json.dumps({"reflection": text, "score": score, "found_solution": solved}))
+        return AIMessage(content=json.dumps({"reflection": "?", "score": 0, "found_solution": False}))
+
+
+def expand(lats, state, model, judge):
+    return asyncio.run(lats.expand_node(state, model, judge))
+
+
+def test_backpropagate_keeps_a_running_mean_up_to_the_root(lats):
+    root = lats.Node([])
+    child = lats.Node([search("a")], parent=root)
+    grandchild = lats.Node([answer("b")], parent=child)
+    root.children, child.children = [child], [grandchild]
+
+    child.backpropagate(0.4)
+    grandchild.backpropagate(1.0)
+    assert (grandchild.visits, grandchild.value) == (1, 1.0)
+    assert (child.visits, child.value) == (2, pytest.approx(0.7))
+    assert (root.visits, root.value) == (2, pytest.approx(0.7))
+
+
+def test_select_follows_the_highest_uct_and_skips_exhausted_subtrees(lats):
+    root = lats.Node([])
+    weak, strong, unvisited = (lats.Node([search(q)], parent=root) for q in ("weak", "strong", "new"))
+    root.children = [weak, strong]
+    weak.backpropagate(0.2)
+    strong.backpropagate(0.9)
+    assert lats.select(root) is strong
+
+    # An unvisited child has an infinite UCT
+    root.children.append(unvisited)
+    assert unvisited.uct() == float("inf") and lats.select(root) is unvisited
+    root.children.pop()
+
+    # Once everything below `strong` is a final answer, the search goes back to `weak`
+    strong.children = [lats.Node([answer("done")], parent=strong)]
+    assert strong.is_exhausted
+    assert lats.select(root) is weak
+
+
+def test_search_expands_the_best_rollout_until_one_solves_the_task(lats):
+    model = ScriptedModel([search("q1"), search("q2"), search("q3"),
+                           answer("wrong answer"), answer("right answer"), search("q4")])
+    judge = ScriptedJudge({"results for q1": (2, False), "results for q2": (8, False), "results for q3": (5, False),
+                           "wrong answer": (3, False), "right answer": (9, True), "results for q4": (10, False)})
+    state = {"goal": "What is LATS?", "root": lats.Node([]), "elapsed": 0.0}
+
+    state.update(expand(lats, state, model, judge))
+    root = state["root"]
+    assert [c.reward for c in root.children] == [0.2, 0.8, 0.5]
+    assert root.visits == 3 and root.value == pytest.approx(0.5)
+    assert lats.should_loop(state) == "expand"
+
+    state.update(expand(lats, state, model, judge))
+    best_first = root.children[1]
+    assert [c.messages[0].content or "search" for c in best_first.children] == ["wrong answer", "right answer", "search"]
+    assert lats.should_loop(state) == "end"
+
+    best = lats.best_solution(root)
+    assert best.is_solved and best.messages[0].content == "right answer"
+    assert [m.content for m in best.trajectory()][-1] == "right answer"
+    assert model.calls == 6
+
+
+def test_best_solution_ignores_unanswered_nodes_cut_off_at_the_depth_limit(lats):
+    root = lats.Node([])
+    node = root
+    for depth in range(lats.MAX_DEPTH):
+        child = lats.Node([search(f"q{depth}")], parent=node, reward=0.9)
+        node.children.append(child)
+        node = child
+    assert node.is_terminal and not node.is_answer
+    # No answer at all: the best node overall
+    assert lats.best_solution(root) is root.children[0]
+
+    weak_answer = lats.Node([answer("partial answer")], parent=root, reward=0.4)
+    root.children.append(weak_answer)
+    assert lats.best_solution(root) is weak_answer
+
+
+@pytest.mark.parametrize("setting, value", [("MAX_NODES", 3), ("MAX_SECONDS", 0.0)])
+def test_search_stops_when_the_budget_is_spent(lats, monkeypatch, setting, value):
+    monkeypatch.setattr(lats, setting, value)
+    model = ScriptedModel(itertools.cycle([search("again")]))
+    state = {"goal": "What is LATS?", "root": lats.Node([]), "elapsed": 0.0}
+    state.update(expand(lats, state, model, ScriptedJudge({})))
+    assert lats.should_loop(state) == "end"
+
+
+def test_search_stops_when_the_tree_is_exhausted(lats, monkeypatch):
+    monkeypatch.setattr(lats, "N_CANDIDATES", 2)
+    model = ScriptedModel([answer("one"), answer("two")])
+    state = {"goal": "What is LATS?", "root": lats.Node([]), "elapsed": 0.0}
+    state.update(expand(lats, state, model, ScriptedJudge({"one": (4, False), "two": (6, False)})))
+    assert state["root"].is_exhausted
+    assert lats.should_loop(state) == "end"
+    assert lats.best_solution(state["root"]).messages[0].content == "two"
@@ -1,12 +1,15 @@
 # agent.py
 
-from langchain_ollama import ChatOllama
+# ChatOllama is only used by the commented-out parameter examples below; kept so they run when uncommented
+from langchain_ollama import ChatOllama  # noqa: F401
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
+from ollama_utils import get_chat_model, stream_to_console
 
 # 1. Initialize the LLM
 # This connects to the Ollama service running on your local machine
-llm = ChatOllama(model="llama3:latest")
+# Models come from the shared registry, so identical settings reuse one client and connection pool
+llm = get_chat_model("llama3:latest")
 
 # 2. Create a Prompt Template
 # This defines the input structure for the model
@@ -73,13 +76,12 @@ chain = prompt | llm | StrOutputParser()
 # Expected output should be more varied and less repetitive.
 
 # We want the agent to stop generating as soon as it thinks of writing "User:"
-stop_llm = ChatOllama(
-    model="llama3:latest",
+stop_llm = get_chat_model(
+    "llama3:latest",
     # stop=["User:", "\n\nHuman:"] # A list of stop sequences
 )
 
 # A prompt that might tempt the model to continue the conversation
 chat_prompt = "You are a helpful AI assistant. Complete your answer and nothing more.\n\nHuman: What is LangChain?\nAssistant:"
-response = stop_llm.invoke(chat_prompt)
-print(response.content)
+stream_to_console(stop_llm, chat_prompt)
 # The output should stop cleanly without adding a fake "User:" turn.
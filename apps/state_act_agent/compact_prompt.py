@@ -0,0 +1,89 @@
+# compact_prompt.py
+# Incremental, size-bounded prompts for the StateAct loop.
+# The agent talks to the LLM as one growing conversation: a static system prefix that never
+# changes, a full snapshot of the state in the first user turn, and afterwards only what changed
+# (new tool outputs, truncated, and plan edits made outside the model). Because earlier turns are
+# re-sent byte for byte, Ollama can reuse its KV cache for everything but the newest turn.
+# When the conversation outgrows the token budget it is collapsed into a fresh snapshot.
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+DEFAULT_TOKEN_BUDGET = 3000
+DEFAULT_TOOL_OUTPUT_CHARS = 600
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token), good enough for budgeting."""
+    return len(text) // 4 + 1
+
+
+def truncate(text: str, max_chars: int) -> str:
+    text = str(text)
+    if len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars]}... [truncated {len(text) - max_chars} chars]"
+
+
+def plan_diff(old: list[str], new: list[str]) -> list[str]:
+    """Lines describing how `new` differs from `old`: `+` added, `-` removed, `~` changed at a position."""
+    lines = []
+    for i in range(max(len(old), len(new))):
+        before = old[i] if i < len(old) else None
+        after = new[i] if i < len(new) else None
+        if before == after:
+            continue
+        if before is None:
+            lines.append(f"+ {i + 1}. {after}")
+        elif after is None:
+            lines.append(f"- {i + 1}. {before}")
+        else:
+            lines.append(f"~ {i + 1}. {after}")
+    return lines
+
+
+class CompactPrompt:
+    """
+    Builds the message list for each agent step.
+    `history` holds the previous user/assistant turns (kept in the graph state) and `seen_plan` the
+    plan the model last saw, so each new turn only carries the difference.
+    """
+
+    def __init__(self, static_prefix: str, token_budget=DEFAULT_TOKEN_BUDGET,
+                 tool_output_chars=DEFAULT_TOOL_OUTPUT_CHARS):
+        self.system = SystemMessage(content=static_prefix)
+        self.token_budget = token_budget
+        self.tool_output_chars = tool_output_chars
+
+    def snapshot(self, state: dict) -> str:
+        plan = "\n".join(f"{i + 1}. {step}" for i, step in enumerate(state.get("plan") or []))
+        return (
+            f"Goal: {state['overall_goal']}\n"
+            f"Plan:\n{plan}\n"
+            f"Knowledge Summary: {state.get('knowledge_summary') or 'None yet.'}\n"
+            f"Last Tool Output: {self._tool_outputs(state)}"
+        )
+
+    def delta(self, state: dict, seen_plan: list[str]) -> str:
+        changes = plan_diff(seen_plan, state.get("plan") or [])
+        plan = "Plan changes:\n" + "\n".join(changes) if changes else "Plan: unchanged."
+        return f"Last Tool Output: {self._tool_outputs(state)}\n{plan}"
+
+    def messages(self, state: dict, history: list, seen_plan: list[str]) -> list:
+        """Returns the messages for this step: the static prefix, the kept history and the new turn."""
+        if history:
+            turn = HumanMessage(content=self.delta(state, seen_plan))
+            messages = [self.system, *history, turn]
+            if self.count(messages) <= self.token_budget:
+                return messages
+            print(f"--- ✂️ Prompt over {self.token_budget} tokens, collapsing history into a snapshot ---")
+        return [self.system, HumanMessage(content=self.snapshot(state))]
+
+    def count(self, messages: list) -> int:
+        return sum(estimate_tokens(str(m.content)) for m in messages)
+
+    def _tool_outputs(self, state: dict) -> str:
+        outputs = state.get("tool_outputs") or []
+        if not outputs:
+            return "None."
+        return "\n".join(f"- {truncate(o, self.tool_output_chars)}" for o in outputs)
+
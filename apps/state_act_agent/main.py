@@ -13,17 +13,32 @@
 #
 # ---- ## ---- 
 
+import json
+import os
+import re
+import uuid
+from pathlib import Path
 from typing import TypedDict, List, Optional, Dict
 
-from pydantic import BaseModel, Field
-from langchain_ollama.chat_models import ChatOllama
+from langchain_core.messages import AIMessage, HumanMessage
+from pydantic import BaseModel, Field, ValidationError
 from langgraph.graph import StateGraph, END
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import PydanticOutputParser
 from langchain.tools import tool
+from ollama_utils import ParallelToolExecutor, SQLiteCheckpointSaver, get_chat_model, stream_json, tracer
+from compact_prompt import CompactPrompt
 
 # --- Settings ---
 OLLAMA_MODEL = "llama3.1:latest"
+PROMPT_TOKEN_BUDGET = 3000     # Estimated tokens per LLM call before the history is collapsed
+TOOL_OUTPUT_MAX_CHARS = 600    # Each tool output is truncated to this size in the prompt
+MAX_REPAIR_ATTEMPTS = 2        # Re-asks for a valid reply before the step fails
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+CHECKPOINT_PATH = PROJECT_ROOT / "data" / "checkpoints" / "state-act-agent.sqlite"
+# Set AGENT_THREAD_ID to resume an interrupted run, and AGENT_REPLAY_STEP to fork it from an earlier step.
+THREAD_ID = os.getenv("AGENT_THREAD_ID") or uuid.uuid4().hex[:8]
+REPLAY_STEP = os.getenv("AGENT_REPLAY_STEP")
 
 # --- State Definition ---
 class AgentState(TypedDict):
@@ -36,6 +51,10 @@ class AgentState(TypedDict):
     final_answer: Optional[str]
     action: Optional[str]
     action_input: Optional[Dict]
+    additional_actions: Optional[List[Dict]]
+    history: list          # Previous user/assistant turns sent to the LLM (after the static prefix)
+    seen_plan: List[str]   # The plan as the LLM last saw it, to send only plan changes
+    tool_cache: Dict[str, str]  # Results of this run's tool calls, keyed by (tool, normalized input)
 
 # --- Tool Definitions ---
 @tool
@@ -64,9 +83,25 @@ def python_calculator(expression: str) -> str:
         return f"Error: {e}. Ensure the expression is a valid mathematical string."
 
 tools = [web_search, python_calculator]
+# Tool registry, built once: name -> tool.
+TOOL_REGISTRY = {t.name: t for t in tools}
+# Tools whose result only depends on their input (within a run), so repeated calls are served from the cache.
+CACHEABLE_TOOLS = {"web_search", "python_calculator"}
+# Runs every action chosen in one step concurrently (sync tools on a thread pool), with a timeout per tool.
+tool_executor = ParallelToolExecutor(TOOL_REGISTRY.values(), timeout=30)
+
+def tool_cache_key(name: str, args: dict) -> str:
+    """(tool, normalized input): string values are case-folded with whitespace collapsed, keys sorted."""
+    normalized = {k: " ".join(v.split()).casefold() if isinstance(v, str) else v for k, v in (args or {}).items()}
+    return f"{name}:{json.dumps(normalized, sort_keys=True)}"
 
 # --- LLM and Prompt Engineering ---
 # Defines the expected output structure for the agent's reasoning and next action.
+class ToolAction(BaseModel):
+    """One extra tool call to run in the same step as `action`."""
+    action: str = Field(description="The name of the tool from the 'Toolbox'.")
+    action_input: dict = Field(description="The dictionary input for the tool.")
+
 class AgentResponse(BaseModel):
     """The required JSON output structure for the agent's response."""
     thought: str = Field(description="Your reasoning and analysis of the current state.")
@@ -74,13 +109,17 @@ class AgentResponse(BaseModel):
     knowledge_summary: str = Field(description="Concise summary of all gathered facts and calculation results.")
     action: str = Field(description="The name of the next tool to use from the 'Toolbox' or 'finish'.")
     action_input: dict = Field(description="The dictionary input for the chosen action. E.g., {'query': '...'} or {'expression': '...'}")
-    final_answer: Optional[str] = Field(description="The final answer to the user, only when the plan is fully complete.")
+    additional_actions: List[ToolAction] = Field(default_factory=list, description="Other tool calls that do not depend on `action` or on each other, to run at the same time. Leave empty if there are none.")
+    final_answer: Optional[str] = Field(default=None, description="The final answer to the user, only when the plan is fully complete.")
 
-# LLM setup: Uses Ollama with a JSON output format for structured reasoning.
-llm = ChatOllama(model=OLLAMA_MODEL, temperature=0, format="json")
+# LLM setup: Ollama's structured outputs constrain decoding to the AgentResponse JSON schema,
+# so the model cannot produce malformed JSON or miss a required field.
+llm = get_chat_model(OLLAMA_MODEL, temperature=0, format=AgentResponse.model_json_schema())
 parser = PydanticOutputParser(pydantic_object=AgentResponse)
 
 # Prompt template: Guides the LLM to follow the StateAct pattern and output structured reasoning.
+# It has no per-step variables: it is rendered once and sent as a byte-identical system prefix on
+# every step, so Ollama can reuse the cached context instead of re-evaluating the schema and toolbox.
 prompt_template = PromptTemplate(
     template="""You are a methodical AI assistant. You must follow the plan and use the tools provided to answer the user's question.
 
@@ -88,10 +127,8 @@ prompt_template = PromptTemplate(
 {tools}
 
 **Current State:**
-- Goal: {overall_goal}
-- Plan: {plan}
-- Knowledge Summary: {knowledge_summary}
-- Last Tool Output: {tool_outputs}
+The first message gives the Goal, Plan, Knowledge Summary and Last Tool Output. Later messages only
+give the new Last Tool Output and any changes to the plan; your previous answers hold the rest.
 
 **Instructions:**
 1.  **Analyze**: Review the 'Last Tool Output' and your current state.
@@ -101,46 +138,137 @@ prompt_template = PromptTemplate(
 
 {format_instructions}
 """,
-    input_variables=["overall_goal", "plan", "knowledge_summary", "tool_outputs"],
+    input_variables=[],
     partial_variables={
         "tools": "\n".join([f"- {t.name}: {t.description}" for t in tools]),
         "format_instructions": parser.get_format_instructions()
     }
 )
 
-agent_runnable = prompt_template | llm | parser
+compact_prompt = CompactPrompt(prompt_template.format(), token_budget=PROMPT_TOKEN_BUDGET,
+                               tool_output_chars=TOOL_OUTPUT_MAX_CHARS)
+
+def report_prompt_size(messages, ai_message: AIMessage):
+    """Prints the estimated prompt size and how many tokens Ollama actually had to evaluate."""
+    step = sum(isinstance(m, AIMessage) for m in messages) + 1
+    metadata = getattr(ai_message, "response_metadata", None) or {}
+    evaluated = metadata.get("prompt_eval_count")
+    duration_ms = (metadata.get("prompt_eval_duration") or 0) / 1e6
+    print(f"📏 Step {step}: prompt ~{compact_prompt.count(messages)} tokens in {len(messages)} messages"
+          + (f" | Ollama evaluated {evaluated} tokens in {duration_ms:.0f}ms" if evaluated is not None else ""))
+
+def response_decided(members: dict) -> bool:
+    """Early stop: a tool step is settled once its actions are complete; `final_answer` would be null."""
+    return members.get("action") not in (None, "finish") and {"action_input", "additional_actions"} <= members.keys()
+
+def call_agent(messages):
+    """
+    Streams the LLM reply through a tolerant incremental JSON parser, stopping as soon as the
+    response is decided. An invalid reply is sent back with the validation error, at most
+    MAX_REPAIR_ATTEMPTS times, instead of failing the whole step.
+    """
+    attempt_messages = messages
+    for attempt in range(MAX_REPAIR_ATTEMPTS + 1):
+        result = stream_json(llm, attempt_messages, stop_when=response_decided)
+        try:
+            return AgentResponse.model_validate(result.value), result
+        except ValidationError as e:
+            if attempt == MAX_REPAIR_ATTEMPTS:
+                raise
+            print(f"--- 🔧 Invalid response, asking for a repair ({attempt + 1}/{MAX_REPAIR_ATTEMPTS}) ---")
+            attempt_messages = messages + [
+                AIMessage(content=result.parser.text),
+                HumanMessage(content=f"Your reply does not match the required JSON format:\n{e}\nReply again with only the corrected JSON object."),
+            ]
+
+# --- Policies ---
+# A policy looks at the state before the LLM step and, when the next action is already determined,
+# returns the state update itself so the LLM call is skipped. The first policy that decides wins.
+# Operands are plain numbers (one decimal point, optional exponent), so dates (2024-10-17, 10/17/2024)
+# and version strings (1.2.3-1.2.4) are not taken for expressions.
+NUMBER = r"\d+(?:\.\d+)?(?:[eE][-+]?\d+)?"
+OPERAND = rf"\(?{NUMBER}\)?"
+ARITHMETIC = re.compile(
+    rf"(?<![\w.\-/])(?!\d{{4}}-\d{{1,2}}-\d{{1,2}}\b|\d{{1,2}}/\d{{1,2}}/\d{{2,4}}\b)"
+    rf"{OPERAND}(?:\s*[-+*/]\s*{OPERAND})+(?!\w|\.\d)"
+)
+CALCULATION_STEP = re.compile(
+    r"\b(?:calculat\w*|comput(?:e|es|ed|ing|ation)|subtract\w*|difference|multipl\w*|divid\w*|sum|total)\b",
+    re.IGNORECASE,
+)
+
+def plan_complete_policy(state: AgentState) -> Optional[dict]:
+    """Every plan step is done and there is a final answer: finish."""
+    if all(step.startswith('[x]') for step in state['plan']) and state.get('final_answer'):
+        return {"action": "finish"}
+    return None
+
+def calculator_policy(state: AgentState) -> Optional[dict]:
+    """The next open plan step spells out an arithmetic expression not computed yet: run the calculator."""
+    next_step = next((step for step in state['plan'] if not step.startswith('[x]')), None)
+    match = ARITHMETIC.search(next_step or "")
+    if not match or not CALCULATION_STEP.search(next_step):
+        return None
+    action_input = {"expression": match.group().strip()}
+    if tool_cache_key("python_calculator", action_input) in (state.get("tool_cache") or {}):
+        return None
+    return {"action": "python_calculator", "action_input": action_input, "additional_actions": []}
+
+POLICIES = [plan_complete_policy, calculator_policy]
 
 # --- LangGraph Node Definitions ---
 # Node: Runs the LLM to determine the next action and update the agent's state.
 def run_agent(state: AgentState):
     print("\n--- 🧠 Running Agent Node ---")
-    if all(step.startswith('[x]') for step in state['plan']) and state.get('final_answer'):
-        return {
-            **state,
-            "action": "finish"
-        }
-    response = agent_runnable.invoke(state)
+    for policy in POLICIES:
+        decision = policy(state)
+        if decision:
+            print(f"--- ⏭️ {policy.__name__} decided the next action ({decision['action']}), skipping the LLM ---")
+            return decision
+    messages = compact_prompt.messages(state, state.get("history") or [], state.get("seen_plan") or [])
+    response, result = call_agent(messages)
+    report_prompt_size(messages, result.message)
+    if result.stopped_early:
+        print("--- ⚡ Next action known, stopped generation early ---")
     print(f"LLM Response: {response}")
-    return response.model_dump()
+    # The reply is kept exactly as generated (cut short when stopped early), so the next prompt
+    # repeats it byte for byte and Ollama can reuse the KV cache for it.
+    history = messages[1:] + [AIMessage(content=result.parser.text)]
+    # The plan as this prompt showed it (the snapshot, or the last one plus the changes just sent),
+    # so the next prompt reports every edit since, including the model's own.
+    return {**response.model_dump(), "history": history, "seen_plan": list(state.get("plan") or [])}
 
-# Node: Executes the chosen tool and updates the tool outputs in the state.
+# Node: Executes the chosen tools in parallel and updates the tool outputs in the state.
 def execute_tool(state: AgentState):
-    """Executes the chosen tool."""
+    """
+    Executes the chosen tool and any additional independent actions concurrently.
+    Calls already made in this run with the same (normalized) input reuse the cached result.
+    Each output is labelled with its call, so the LLM can tell the results apart.
+    """
     print("\n--- 🛠️ Executing Tool Node ---")
-    action = state.get("action")
-    action_input = state.get("action_input")
-    tool_map = {t.name: t for t in tools}
-    if action not in tool_map:
-        error_msg = f"Error: Tool '{action}' not found. Available tools are: {list(tool_map.keys())}"
-        print(f"--- {error_msg} ---")
-        return {"tool_outputs": [error_msg]}
-    selected_tool = tool_map[action]
-    try:
-        output = selected_tool.invoke(action_input)
-    except Exception as e:
-        output = f"Error executing tool {action}: {e}"
-        print(f"--- {output} ---")
-    return {"tool_outputs": [output]}
+    actions = [{"action": state.get("action"), "action_input": state.get("action_input")}]
+    actions += state.get("additional_actions") or []
+    tool_calls = [
+        {"name": a["action"], "args": a.get("action_input") or {}, "id": f"call_{i}"}
+        for i, a in enumerate(actions)
+    ]
+    cache = dict(state.get("tool_cache") or {})
+    keys = [tool_cache_key(c["name"], c["args"]) for c in tool_calls]
+    pending = {}
+    for call, key in zip(tool_calls, keys):
+        if key in cache:
+            print(f"--- ♻️ Reusing cached result for {call['name']}({call['args']}) ---")
+        else:
+            pending.setdefault(key, call)
+    results = dict(zip(pending, tool_executor.run(list(pending.values()))))
+    for key, message in results.items():
+        if message.name in CACHEABLE_TOOLS and message.status != "error":
+            cache[key] = message.content
+    outputs = [
+        f"{call['name']}({json.dumps(call['args'])}): {cache[key] if key in cache else results[key].content}"
+        for call, key in zip(tool_calls, keys)
+    ]
+    return {"tool_outputs": outputs, "tool_cache": cache}
 
 # --- Graph Definition and Execution ---
 # The StateGraph alternates between reasoning (run_agent) and acting (execute_tool),
@@ -162,7 +290,6 @@ def route_action(state: AgentState):
 
 graph.add_conditional_edges("run_agent", route_action)
 graph.add_edge("execute_tool", "run_agent")
-app = graph.compile()
 
 # --- Run the Agent ---
 # Example: The agent is given a multi-step question and a plan to follow.
@@ -178,15 +305,33 @@ initial_state = {
     ],
     "knowledge_summary": "No information gathered yet.",
     "tool_outputs": [],
+    "tool_cache": {},
 }
 
-print("--- 🚀 Starting Agent Execution ---")
-final_state = {}
-for s in app.stream(initial_state, {"recursion_limit": 15}):
-    node_name = list(s.keys())[0]
-    final_state.update(list(s.values())[0])
-    print(s)
+def main():
+    # The state is saved to SQLite after every node, so a crash or Ctrl-C only loses the step in progress.
+    checkpointer = SQLiteCheckpointSaver(CHECKPOINT_PATH)
+    app = graph.compile(checkpointer=checkpointer)
+
+    if checkpointer.has_thread(THREAD_ID):
+        config = checkpointer.config_for(THREAD_ID, step=int(REPLAY_STEP) if REPLAY_STEP else None)
+        run_input = None
+        print(f"--- ⏯️ Resuming thread {THREAD_ID}" + (f" from step {REPLAY_STEP}" if REPLAY_STEP else "") + " ---")
+    else:
+        config = checkpointer.config_for(THREAD_ID)
+        run_input = initial_state
+
+    print(f"--- 🚀 Starting Agent Execution (thread {THREAD_ID}, resume with AGENT_THREAD_ID={THREAD_ID}) ---")
+    final_state = dict(app.get_state(config).values)
+    for s in app.stream(run_input, {**config, "recursion_limit": 15, "callbacks": [tracer.handler]}, durability="sync"):
+        node_name = list(s.keys())[0]
+        update = list(s.values())[0]
+        final_state.update(update)
+        print({node_name: {k: v for k, v in update.items() if k not in ("history", "tool_cache")}})
+
+    print("\n\n--- ✅ AGENT EXECUTION COMPLETE ---")
+    print(f"Final Answer: {final_state.get('final_answer')}")
+    print(f"Final Knowledge Summary: {final_state.get('knowledge_summary')}")
 
-print("\n\n--- ✅ AGENT EXECUTION COMPLETE ---")
-print(f"Final Answer: {final_state.get('final_answer')}")
-print(f"Final Knowledge Summary: {final_state.get('knowledge_summary')}")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+from langchain_core.messages import AIMessage, HumanMessage
+
+from compact_prompt import CompactPrompt, plan_diff, truncate
+
+PLAN = ["Find the market cap.", "Find the GDP.", "Calculate the difference."]
+
+
+def state(**values):
+    return {"overall_goal": "Compare them.", "plan": PLAN, "knowledge_summary": "", "tool_outputs": [], **values}
+
+
+def test_plan_diff_reports_added_removed_and_changed_steps():
+    assert plan_diff(PLAN, PLAN) == []
+    assert plan_diff(PLAN, ["[x] Find the market cap.", *PLAN[1:], "Answer."]) == [
+        "~ 1. [x] Find the market cap.",
+        "+ 4. Answer.",
+    ]
+    assert plan_diff(PLAN, PLAN[:1]) == ["- 2. Find the GDP.", "- 3. Calculate the difference."]
+
+
+def test_tool_outputs_are_truncated():
+    assert truncate("short", 10) == "short"
+    assert truncate("x" * 25, 10) == "xxxxxxxxxx... [truncated 15 chars]"
+
+    prompt = CompactPrompt("system", tool_output_chars=10)
+    snapshot = prompt.snapshot(state(tool_outputs=["web_search: " + "y" * 100]))
+    assert "Last Tool Output: - web_search... [truncated 102 chars]" in snapshot
+
+
+def test_later_turns_only_carry_what_changed():
+    prompt = CompactPrompt("system")
+    [system, first] = prompt.messages(state(), [], [])
+    assert "Goal: Compare them." in first.content and "1. Find the market cap." in first.content
+
+    history = [first, AIMessage(content='{"plan": "..."}')]
+    edited = ["[x] Find the market cap.", *PLAN[1:]]
+    [_, *kept, turn] = prompt.messages(state(plan=edited, tool_outputs=["cap: 3.1T"]), history, PLAN)
+    assert kept == history
+    assert turn.content == "Last Tool Output: - cap: 3.1T\nPlan changes:\n~ 1. [x] Find the market cap."
+    assert prompt.delta(state(), PLAN).endswith("Plan: unchanged.")
+
+
+def test_history_over_the_budget_is_collapsed_into_a_snapshot():
+    prompt = CompactPrompt("system", token_budget=200)
+    history = [HumanMessage(content="Goal: ..."), AIMessage(content="z" * 400)]
+    messages = prompt.messages(state(), history, PLAN)
+    assert len(messages) == 4 and messages[1:3] == history
+
+    history.append(AIMessage(content="z" * 400))
+    [system, snapshot] = prompt.messages(state(), history, PLAN)
+    assert snapshot.content == prompt.snapshot(state())
+    assert prompt.count([system, snapshot]) <= 200
@@ -0,0 +1,153 @@
+import importlib.util
+import json
+from pathlib import Path
+
+import pytest
+from langchain_core.language_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+APP_DIR = Path(__file__).parent
+PACKAGES_DIR = APP_DIR.parent.parent / "packages"
+PLAN = ["Find PonyVidia's market cap.", "Find Vinland's GDP.", "Calculate the difference.", "Answer."]
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    """The app module under its own name (every app has a main.py), with a scripted model."""
+    monkeypatch.syspath_prepend(str(PACKAGES_DIR))
+    monkeypatch.syspath_prepend(str(APP_DIR))
+    spec = importlib.util.spec_from_file_location("state_act_agent_under_test", APP_DIR / "main.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def script(agent, monkeypatch, *replies):
+    """Makes the LLM stream the given replies, in order; returns the model to inspect its prompts."""
+    model = GenericFakeChatModel(messages=iter(AIMessage(content=json.dumps(r)) for r in replies))
+    monkeypatch.setattr(agent, "llm", model)
+    prompts = []
+    stream_json = agent.stream_json
+
+    def recording_stream_json(llm, messages, **kwargs):
+        prompts.append(messages)
+        return stream_json(llm, messages, **kwargs)
+
+    monkeypatch.setattr(agent, "stream_json", recording_stream_json)
+    return prompts
+
+
+def reply(plan, action="web_search", action_input=None, final_answer=None):
+    return {"thought": "...", "plan": plan, "knowledge_summary": "...", "action": action,
+            "action_input": action_input or {"query": "q"}, "additional_actions": [], "final_answer": final_answer}
+
+
+def initial_state(**values):
+    return {"overall_goal": "Compare them.", "plan": PLAN, "knowledge_summary": "None.", "tool_outputs": [],
+            "tool_cache": {}, **values}
+
+
+def test_the_next_prompt_reports_the_plan_edits_made_since_the_last_one(agent, monkeypatch):
+    edited = ["[x] " + PLAN[0], *PLAN[1:]]
+    prompts = script(agent, monkeypatch, reply(edited), reply(edited, action="finish", final_answer="0.9T"))
+
+    state = initial_state()
+    update = agent.run_agent(state)
+    assert update["seen_plan"] == PLAN  # what the first prompt showed, not the reply
+    state.update(update, tool_outputs=["web_search: 3.1T"])
+    agent.run_agent(state)
+
+    turn = prompts[1][-1].content
+    assert turn.endswith("Plan changes:\n~ 1. [x] Find PonyVidia's market cap.")
+
+
+@pytest.mark.parametrize("step, expression", [
+    ("Calculate the difference: 3.1e12 - 2.2e12", "3.1e12 - 2.2e12"),
+    ("Compute (3.1e12 - 2.2e12) / 1e9 to get billions.", "(3.1e12 - 2.2e12) / 1e9"),
+    ("Calculate the difference using a clean mathematical expression.", None),
+    ("Calculate how many days passed since 2024-10-17.", None),
+    ("Compute the total for the period 10/17/2024.", None),
+    ("Calculate what changed between versions 1.2.3-1.2.4.", None),
+    ("Summarize the 2 - 3 day forecast.", None),
+    ("Find the GDP on 2024-10-17 - 1 year.", None),
+])
+def test_calculator_policy_only_fires_on_arithmetic_in_a_calculation_step(agent, step, expression):
+    decision = agent.calculator_policy(initial_state(plan=["[x] " + PLAN[0], step]))
+    assert (decision and decision["action_input"]["expression"]) == expression
+
+
+def test_calculator_policy_does_not_repeat_a_computed_expression(agent):
+    expression = {"expression": "3.1e12 - 2.2e12"}
+    cache = {agent.tool_cache_key("python_calculator", expression): "Calculation result: 900,000,000,000.00"}
+    state = initial_state(plan=["Calculate the difference: 3.1e12 - 2.2e12"], tool_cache=cache)
+    assert agent.calculator_policy(state) is None
+
+
+def counting_executor(agent, monkeypatch):
+    calls = []
+    run = agent.tool_executor.run
+
+    def counted(tool_calls):
+        calls.extend(c["args"] for c in tool_calls)
+        return run(tool_calls)
+
+    monkeypatch.setattr(agent.tool_executor, "run", counted)
+    return calls
+
+
+def test_tool_results_are_cached_by_normalized_input(agent, monkeypatch):
+    calls = counting_executor(agent, monkeypatch)
+    state = initial_state(action="web_search", action_input={"query": "PonyVidia market cap"})
+    state.update(agent.execute_tool(state))
+    assert calls == [{"query": "PonyVidia market cap"}]
+
+    state.update(action_input={"query": "  ponyvidia   MARKET cap"},
+                 additional_actions=[{"action": "web_search", "action_input": {"query": "Vinland GDP"}}])
+    update = agent.execute_tool(state)
+    assert calls == [{"query": "PonyVidia market cap"}, {"query": "Vinland GDP"}]
+    assert update["tool_outputs"] == [
+        'web_search({"query": "  ponyvidia   MARKET cap"}): PNVDA\'s market cap is $3.1 Trillion ($3.1e12).',
+        'web_search({"query": "Vinland GDP"}): Vinland\'s GDP is $2.2 Trillion ($2.2e12).',
+    ]
+
+
+def test_duplicate_calls_in_one_step_run_once(agent, monkeypatch):
+    calls = counting_executor(agent, monkeypatch)
+    state = initial_state(action="python_calculator", action_input={"expression": "1 + 1"},
+                          additional_actions=[{"action": "python_calculator", "action_input": {"expression": " 1 + 1 "}}])
+    update = agent.execute_tool(state)
+    assert len(calls) == 1
+    assert [o.split("): ", 1)[1] for o in update["tool_outputs"]] == ["Calculation result: 2.00"] * 2
+
+
+def test_failed_tool_calls_are_not_cached(agent, monkeypatch):
+    attempts = []
+
+    @agent.tool
+    def web_search(query: str) -> str:
+        """Flaky search."""
+        attempts.append(query)
+        if len(attempts) == 1:
+            raise ConnectionError("search backend unavailable")
+        return "found it"
+
+    monkeypatch.setattr(agent, "tool_executor", agent.ParallelToolExecutor([web_search], timeout=5))
+    state = initial_state(action="web_search", action_input={"query": "Vinland GDP"})
+    update = agent.execute_tool(state)
+    assert "search backend unavailable" in update["tool_outputs"][0] and update["tool_cache"] == {}
+
+    state.update(update)
+    update = agent.execute_tool(state)
+    assert update["tool_outputs"] == ['web_search({"query": "Vinland GDP"}): found it']
+    assert len(attempts) == 2 and len(update["tool_cache"]) == 1
+
+
+def test_history_keeps_the_reply_as_streamed_when_generation_stops_early(agent, monkeypatch):
+    full = reply(PLAN, action_input={"query": "PonyVidia market cap"})
+    script(agent, monkeypatch, full)
+    update = agent.run_agent(initial_state())
+
+    streamed = update["history"][-1].content
+    assert json.dumps(full).startswith(streamed)
+    assert '"additional_actions": []' in streamed and "final_answer" not in streamed
+    assert update["action_input"] == {"query": "PonyVidia market cap"} and update["final_answer"] is None
@@ -1,68 +1,102 @@
 # tree_of_thoughts_agent.py
 # This agent implements a "Tree of Thoughts" approach to problem-solving.
-# It generates multiple distinct thoughts, evaluates them, and selects the best one to pursue further.
+# Starting from the goal, every thought in the frontier is expanded into BREADTH candidate
+# continuations, each candidate gets a numeric score from an LLM judge, and only the best
+# BEAM_WIDTH candidates survive to the next level. After DEPTH levels the best path wins.
+# All expansions (and then all scorings) of a level run concurrently, capped by MAX_CONCURRENCY,
+# so the run time grows with the depth of the tree rather than with breadth x depth.
 
-from ollama_utils import get_ollama_models
+import asyncio
+import re
+from dataclasses import dataclass, field
 
-def generate_thoughts(goal: str, count: int) -> list[str]:
-    """Generates multiple distinct 'thoughts' or solutions for a given goal."""
-    print(f"\n--- 1. GENERATING {count} THOUGHTS ---")
-    prompt = f"You are a creative writer. Generate {count} completely different and compelling opening lines for a story about: '{goal}'. Each opening line should be on a new line, starting with '1. ', '2. ', etc."
+from ollama_utils import LLM_MODEL, get_chat_model
 
-    llm, _ = get_ollama_models()
-    response = llm.invoke(prompt)
+BREADTH = 3
+DEPTH = 2
+BEAM_WIDTH = 2
+MAX_CONCURRENCY = 4
 
-    # Simple parsing: split by newline and remove numbering
-    lines = response.content.strip().split('\n')
-    thoughts = [line.split('. ', 1)[1] for line in lines if '. ' in line]
-    print("Generated options:")
-    for t in thoughts:
-        print(f"- {t}")
-    return thoughts
+@dataclass
+class Thought:
+    """A node of the tree: the story lines written so far along this path and its judge score."""
+    lines: list[str] = field(default_factory=list)
+    score: float = 0.0
 
-def evaluate_thoughts(goal: str, thoughts: list[str]) -> str:
-    """Evaluates a list of thoughts and selects the best one."""
-    print("\n--- 2. EVALUATING THOUGHTS ---")
-    # Construct a prompt for the LLM to act as a judge
-    evaluation_prompt = f"""
-    You are a literary critic. Your task is to evaluate the following opening lines for a story about '{goal}'.
-    Which one is the most engaging and creates the most intrigue? Explain your reasoning and then state the best option at the end in the format 'BEST OPTION: [The full text of the best opening line]'.
+    @property
+    def text(self) -> str:
+        return " ".join(self.lines)
 
-    Here are the options:
-    """
-    for i, thought in enumerate(thoughts, 1):
-        evaluation_prompt += f"\n{i}. {thought}"
+async def expand_thought(goal: str, parent: Thought, variant: int, breadth: int, llm, semaphore) -> Thought | None:
+    """Asks the LLM for one new line continuing `parent`; returns None if the answer is empty."""
+    if parent.lines:
+        prompt = (
+            f"You are a creative writer working on a story about: '{goal}'.\n"
+            f"Story so far: \"{parent.text}\"\n"
+            f"Write the single next sentence of the story (variant {variant + 1} of {breadth}, take a distinct direction). "
+            "Reply with the sentence only."
+        )
+    else:
+        prompt = (
+            f"You are a creative writer. Write one compelling opening line for a story about: '{goal}' "
+            f"(variant {variant + 1} of {breadth}, take a distinct angle). Reply with the line only."
+        )
+    async with semaphore:
+        response = await llm.ainvoke(prompt)
+    line = response.content.strip().strip('"').split("\n")[0].strip()
+    return Thought(lines=parent.lines + [line]) if line else None
 
-    llm, _ = get_ollama_models()
-    response = llm.invoke(evaluation_prompt)
-    evaluation_text = response.content
-    print(f"EVALUATION: {evaluation_text}")
+async def score_thought(goal: str, thought: Thought, judge, semaphore) -> float:
+    """Asks the LLM judge for a 1-10 score of how engaging the story so far is."""
+    prompt = (
+        f"You are a literary critic. Rate the following story opening about '{goal}' from 1 to 10 "
+        "for how engaging it is and how much intrigue it creates. Reply with the number only.\n\n"
+        f"\"{thought.text}\""
+    )
+    async with semaphore:
+        response = await judge.ainvoke(prompt)
+    match = re.search(r"\d+(?:\.\d+)?", response.content)
+    return min(float(match.group()), 10.0) if match else 0.0
 
-    # Extract the best option from the judge's response
-    best_option_line = [line for line in evaluation_text.split('\n') if line.startswith("BEST OPTION:")]
-    if best_option_line:
-        best_option = best_option_line[0].replace("BEST OPTION:", "").strip()
-        if not best_option:
-            # Try to get the next non-empty line after 'BEST OPTION:'
-            lines = evaluation_text.split('\n')
-            idx = lines.index(best_option_line[0])
-            for next_line in lines[idx+1:]:
-                if next_line.strip():
-                    best_option = next_line.strip()
-                    break
-        return best_option
-    return "No best option determined."
+async def tree_of_thoughts(goal: str, breadth=BREADTH, depth=DEPTH, beam_width=BEAM_WIDTH,
+                           max_concurrency=MAX_CONCURRENCY) -> Thought:
+    """Runs a beam search over the thought tree and returns the best leaf."""
+    # Sampling temperature keeps sibling thoughts diverse; the judge is deterministic.
+    writer = get_chat_model(LLM_MODEL, temperature=0.9)
+    judge = get_chat_model(LLM_MODEL, temperature=0)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    frontier = [Thought()]
+    for level in range(1, depth + 1):
+        print(f"\n--- LEVEL {level}: EXPANDING {len(frontier)} x {breadth} THOUGHTS ---")
+        children = await asyncio.gather(*(
+            expand_thought(goal, parent, i, breadth, writer, semaphore)
+            for parent in frontier
+            for i in range(breadth)
+        ))
+        unique = {}
+        for child in children:
+            if child:
+                unique.setdefault(child.text, child)
+        children = list(unique.values())
+        if not children:
+            break
+
+        scores = await asyncio.gather(*(score_thought(goal, child, judge, semaphore) for child in children))
+        for child, score in zip(children, scores):
+            child.score = score
+            print(f"[{score:4.1f}] {child.lines[-1]}")
+
+        # Beam pruning: only the best `beam_width` paths are expanded further.
+        frontier = sorted(children, key=lambda t: t.score, reverse=True)[:beam_width]
+    return frontier[0]
 
 if __name__ == "__main__":
     user_goal = "A detective hunting a rogue AI in a rain-drenched, neon-lit city."
 
     print(f"--- GOAL: {user_goal} ---")
+    best = asyncio.run(tree_of_thoughts(user_goal))
 
-    # 1. Generate multiple initial thoughts (branches of the tree)
-    generated_lines = generate_thoughts(user_goal, 3)
-
-    # 2. Evaluate the thoughts and select the most promising branch
-    best_line = evaluate_thoughts(user_goal, generated_lines)
-
-    print("\n--- 3. FINAL SELECTED PATH ---")
-    print(f"The most promising opening line is: '{best_line}'")
\ No newline at end of file
+    print("\n--- FINAL SELECTED PATH ---")
+    print(f"Score: {best.score:.1f}")
+    print(f"The most promising opening is: '{best.text}'")
@@ -0,0 +1,98 @@
+import asyncio
+import importlib.util
+import re
+from pathlib import Path
+
+import pytest
+from langchain_core.messages import AIMessage
+
+APP_DIR = Path(__file__).parent
+PACKAGES_DIR = APP_DIR.parent.parent / "packages"
+
+
+@pytest.fixture
+def tot(monkeypatch):
+    monkeypatch.syspath_prepend(str(PACKAGES_DIR))
+    spec = importlib.util.spec_from_file_location("tree_of_thoughts_under_test", APP_DIR / "main.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class InFlight:
+    """Counts the model calls running at the same time."""
+
+    def __init__(self):
+        self.current = 0
+        self.peak = 0
+
+
+class ScriptedWriter:
+    """Continues a story with "<last line>.<variant>", or opens it with "a<variant>"."""
+
+    def __init__(self, in_flight):
+        self.in_flight = in_flight
+        self.parents = []
+
+    async def ainvoke(self, prompt):
+        self.in_flight.current += 1
+        self.in_flight.peak = max(self.in_flight.peak, self.in_flight.current)
+        await asyncio.sleep(0.01)
+        self.in_flight.current -= 1
+        variant = re.search(r"variant (\d+) of", prompt).group(1)
+        story = re.search(r'Story so far: "(.*)"', prompt)
+        if story is None:
+            return AIMessage(content=f"a{variant}")
+        parent = story.group(1).split()[-1]
+        self.parents.append(parent)
+        return AIMessage(content=f"{parent}.{variant}")
+
+
+class ScriptedJudge:
+    """Scores a story by its last line: {line: score}, 1 for anything else."""
+
+    def __init__(self, in_flight, scores):
+        self.in_flight = in_flight
+        self.scores = scores
+
+    async def ainvoke(self, prompt):
+        self.in_flight.current += 1
+        self.in_flight.peak = max(self.in_flight.peak, self.in_flight.current)
+        await asyncio.sleep(0.01)
+        self.in_flight.current -= 1
+        last_line = prompt.split()[-1].strip('"')
+        return AIMessage(content=str(self.scores.get(last_line, 1)))
+
+
+def run(tot, monkeypatch, scores, **kwargs):
+    in_flight = InFlight()
+    writer, judge = ScriptedWriter(in_flight), ScriptedJudge(in_flight, scores)
+    monkeypatch.setattr(tot, "get_chat_model", lambda model, temperature: writer if temperature else judge)
+    best = asyncio.run(tot.tree_of_thoughts("a detective story", **kwargs))
+    return best, writer, in_flight
+
+
+def test_beam_keeps_the_best_paths_and_prunes_the_rest(tot, monkeypatch):
+    scores = {"a1": 5, "a2": 9, "a3": 7, "a2.1": 6, "a3.2": 10}
+    best, writer, _ = run(tot, monkeypatch, scores, breadth=3, depth=2, beam_width=2, max_concurrency=4)
+
+    # Only the two best openings are expanded, each into `breadth` continuations.
+    assert sorted(writer.parents) == ["a2", "a2", "a2", "a3", "a3", "a3"]
+    # The second-best opening leads to the best story.
+    assert best.lines == ["a3", "a3.2"] and best.score == 10
+    assert best.text == "a3 a3.2"
+
+
+def test_beam_width_one_is_a_greedy_search(tot, monkeypatch):
+    scores = {"a1": 5, "a2": 9, "a3": 7, "a3.2": 10}
+    best, writer, _ = run(tot, monkeypatch, scores, breadth=3, depth=2, beam_width=1, max_concurrency=4)
+    assert writer.parents == ["a2", "a2", "a2"]
+    assert best.lines[0] == "a2"
+
+
+def test_model_calls_run_concurrently_up_to_the_cap(tot, monkeypatch):
+    _, _, in_flight = run(tot, monkeypatch, {}, breadth=3, depth=2, beam_width=2, max_concurrency=2)
+    assert in_flight.peak == 2
+
+    _, _, in_flight = run(tot, monkeypatch, {}, breadth=3, depth=2, beam_width=2, max_concurrency=8)
+    assert in_flight.peak == 6  # a whole level (beam_width x breadth) at once
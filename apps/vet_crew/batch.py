@@ -0,0 +1,138 @@
+# batch.py
+# Batch triage for the veterinary crew.
+# Queries are read lazily from a JSONL file or stdin and kicked off on a pool of worker threads.
+# Each worker builds its own crew once with the given factory, so no agent or task state is shared,
+# and at most `workers * 2` queries are in flight. With a `router`, each query is first mapped to a
+# route and workers keep one crew per route, built with `crew_factory(route)`.
+# Results are written as JSONL in completion order, with the latency and token usage of each query.
+
+import json
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Iterable, Iterator, TextIO
+
+DEFAULT_WORKERS = 4
+
+
+def read_queries(lines: Iterable[str]) -> Iterator[dict]:
+    """
+    Yields `{"id", "query"}` dicts from JSONL lines. A line is either a JSON object with a
+    "query" key (and optionally an "id") or plain text, which is taken as the query itself.
+    A malformed line yields `{"id": line_number, "query": None, "error": ...}` instead, which
+    `BatchRunner` records as a failed query without stopping the batch.
+    """
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("{"):
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield {"id": number, "query": None, "error": f"JSONDecodeError: {e}"}
+                continue
+            if not isinstance(item, dict) or not isinstance(item.get("query"), str):
+                yield {"id": number, "query": None, "error": 'ValueError: expected an object with a "query" string'}
+                continue
+            yield {"id": item.get("id", number), "query": item["query"]}
+        else:
+            yield {"id": number, "query": line}
+
+
+def token_usage(result) -> dict:
+    """Token counts reported by a CrewOutput (prompt, completion, total, requests)."""
+    usage = getattr(result, "token_usage", None)
+    if usage is None:
+        return {}
+    return usage.model_dump() if hasattr(usage, "model_dump") else dict(usage)
+
+
+class BatchRunner:
+    """Runs queries through per-worker crews built by `crew_factory()` (or `crew_factory(route)`)."""
+
+    def __init__(self, crew_factory: Callable, workers: int = DEFAULT_WORKERS, log: TextIO = sys.stderr,
+                 router: Callable | None = None):
+        self.crew_factory = crew_factory
+        self.workers = workers
+        self.router = router
+        self.log = log
+        self._local = threading.local()
+
+    def run(self, queries: Iterable[dict], output: TextIO) -> list[dict]:
+        """Writes one JSON line per query to `output` as soon as it finishes; returns all records."""
+        started = time.perf_counter()
+        records = []
+        queries = iter(queries)
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="crew") as pool:
+            pending = set()
+            exhausted = False
+            while pending or not exhausted:
+                while not exhausted and len(pending) < self.workers * 2:
+                    item = next(queries, None)
+                    if item is None:
+                        exhausted = True
+                    else:
+                        pending.add(pool.submit(self._run_one, item))
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    record = future.result()
+                    records.append(record)
+                    output.write(json.dumps(record) + "\n")
+                    output.flush()
+                    status = "❌" if record["error"] else "✅"
+                    print(f"{status} [{record['id']}] {record['latency_s']:.1f}s", file=self.log, flush=True)
+        self.report(records, time.perf_counter() - started)
+        return records
+
+    def report(self, records: list[dict], elapsed: float):
+        if not records:
+            print("No queries to run.", file=self.log)
+            return
+        latencies = sorted(r["latency_s"] for r in records)
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        tokens = sum(r["usage"].get("total_tokens", 0) for r in records)
+        errors = sum(1 for r in records if r["error"])
+        routes = {}
+        for r in records:
+            if "route" in r:
+                key = r["route"] or "llm-triage"
+                routes[key] = routes.get(key, 0) + 1
+        print(
+            f"\n⚡ {len(records)} queries in {elapsed:.1f}s with {self.workers} workers "
+            f"({len(records) / elapsed:.2f} queries/s) | latency p50 {statistics.median(latencies):.1f}s, "
+            f"p95 {p95:.1f}s | {tokens} tokens | {errors} errors",
+            file=self.log,
+        )
+        if routes:
+            print("   Routes: " + ", ".join(f"{k} {v}" for k, v in sorted(routes.items())), file=self.log)
+
+    def _crew(self, route):
+        crews = getattr(self._local, "crews", None)
+        if crews is None:
+            crews = self._local.crews = {}
+        if route not in crews:
+            crews[route] = self.crew_factory(route) if self.router else self.crew_factory()
+        return crews[route]
+
+    def _run_one(self, item: dict) -> dict:
+        started = time.perf_counter()
+        record = {"id": item["id"], "query": item["query"], "result": None, "usage": {}, "error": item.get("error")}
+        if record["error"]:
+            record["latency_s"] = 0.0
+            return record
+        try:
+            route = self.router(item["query"]) if self.router else None
+            if self.router:
+                record["route"] = route
+            result = self._crew(route).kickoff(inputs={"query": item["query"]})
+            record["result"] = str(getattr(result, "raw", result))
+            record["usage"] = token_usage(result)
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+        record["latency_s"] = round(time.perf_counter() - started, 3)
+        return record
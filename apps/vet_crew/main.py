@@ -3,11 +3,27 @@
 # It uses a local LLM to process queries and delegate tasks to specialized veterinarians based on the pet's life stage.
 # It includes a triage veterinarian who assesses the initial query and delegates to either a pediatric or adult/geriatric specialist.
 # It also includes a web search tool to gather additional information when needed.
+#
+# Usage:
+#   python main.py                                   # run the example query
+#   python main.py --batch queries.jsonl --workers 4 # triage a queue of queries, results as JSONL on stdout
+#   cat queries.jsonl | python main.py --batch - --output results.jsonl
+
+import argparse
+import sys
+from pathlib import Path
 
 from crewai import Agent, Task, Crew, Process
-from langchain_ollama import ChatOllama
 from crewai.tools import BaseTool
-from ddgs import DDGS
+from ollama_utils import WebSearch, get_chat_model
+from batch import DEFAULT_WORKERS, BatchRunner, read_queries
+from pretriage import KITTEN, PreTriage
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+SEARCH_CACHE_PATH = PROJECT_ROOT / "data" / "web-search.sqlite"
+
+# Shared, cached search service (repeated and concurrent identical queries hit DuckDuckGo once)
+web_search = WebSearch(cache_path=SEARCH_CACHE_PATH)
 
 # Tool for web search related to veterinary information
 class SearchTools(BaseTool):
@@ -15,75 +31,123 @@ class SearchTools(BaseTool):
     description: str = "A tool to search the web for veterinary information. Use it to find potential causes for symptoms."
 
     def _run(self, query: str) -> str:
-        print(f"--- TOOL: Searching for '{query}' ---")
-        with DDGS() as ddgs:
-            results = [r for r in ddgs.text(query, max_results=5)]
+        print(f"--- TOOL: Searching for '{query}' ---", file=sys.stderr)
+        results = web_search.search(query, max_results=5)
         return str(results) if results else "No results found."
 
-# --- Instantiate the tool ---
-search_tool = SearchTools()
-
-# Initialize the local LLM with Ollama provider
-ollama_model = ChatOllama(model="qwen3:latest")
-
-# Define the veterinary agents
-triage_vet = Agent(
-    role='Triage Veterinarian',
-    goal="Analyze the initial pet health query, determine the cat's life stage (kitten, adult, or senior), and delegate to the appropriate specialist.",
-    backstory="You are an experienced vet who is the first point of contact at a busy clinic. Your strength is quickly assessing a situation and getting the case to the right expert.",
-    verbose=True,
-    allow_delegation=True,
-    llm=ollama_model
-)
-
-kitten_vet = Agent(
-    role='Pediatric Feline Veterinarian',
-    goal='Diagnose and provide initial advice for health issues in kittens (cats under 1 year old).',
-    backstory='You are a world-renowned specialist in kitten health, known for your ability to spot subtle signs of developmental or infectious diseases in young cats.',
-    verbose=True,
-    allow_delegation=False,
-    tools=[search_tool],
-    llm=ollama_model
-)
-
-adult_senior_vet = Agent(
-    role='Adult and Geriatric Feline Veterinarian',
-    goal='Diagnose and provide initial advice for health issues in adult and senior cats (1 year and older).',
-    backstory='You have decades of experience treating adult and senior cats, with deep knowledge of age-related diseases like kidney failure, hyperthyroidism, and dental disease.',
-    verbose=True,
-    allow_delegation=False,
-    tools=[search_tool],
-    llm=ollama_model
-)
-
-# Define the diagnostic tasks for the crew
-triage_task = Task(
-    description="Analyze the user's query: '{query}'. Your first job is to determine the cat's life stage from the query. Based on the age, you MUST delegate the diagnostic task to either the 'Pediatric Feline Veterinarian' or the 'Adult and Geriatric Feline Veterinarian'. Do not try to diagnose yourself.",
-    expected_output="A delegation action to the correct specialist with all the necessary context from the query.",
-    agent=triage_vet
-)
-
-diagnostic_task = Task(
-    description="A pet owner is concerned about their cat. The Triage Vet has passed this case to you. Analyze the full context of the query and provide a differential diagnosis. What are the most likely causes of the symptoms described? Use your search tool if needed. Conclude with clear advice on whether this is an emergency and what the owner's next steps should be.",
-    expected_output="A detailed report with 2-3 likely diagnoses, an explanation for each, and clear, actionable advice for the pet owner.",
-)
-
-# Assemble and run the crew
-crew = Crew(
-    agents=[triage_vet, kitten_vet, adult_senior_vet],
-    tasks=[triage_task, diagnostic_task],
-    process=Process.hierarchical,
-    manager_llm=ollama_model
-)
+# Initialize the local LLM with Ollama provider (a shared client: every crew reuses its connections)
+ollama_model = get_chat_model("qwen3:latest")
+
+def build_crew(life_stage=None, verbose=True) -> Crew:
+    """
+    Builds the agents, tasks and crew.
+    With a `life_stage` already known from pre-triage, the query goes straight to that specialist
+    in a sequential crew; otherwise the hierarchical crew lets the triage vet decide.
+    Batch workers each build their own crews, so concurrent kickoffs never share agent or task state.
+    """
+    search_tool = SearchTools()
+
+    # Define the veterinary agents
+    triage_vet = Agent(
+        role='Triage Veterinarian',
+        goal="Analyze the initial pet health query, determine the cat's life stage (kitten, adult, or senior), and delegate to the appropriate specialist.",
+        backstory="You are an experienced vet who is the first point of contact at a busy clinic. Your strength is quickly assessing a situation and getting the case to the right expert.",
+        verbose=verbose,
+        allow_delegation=True,
+        llm=ollama_model
+    )
+
+    kitten_vet = Agent(
+        role='Pediatric Feline Veterinarian',
+        goal='Diagnose and provide initial advice for health issues in kittens (cats under 1 year old).',
+        backstory='You are a world-renowned specialist in kitten health, known for your ability to spot subtle signs of developmental or infectious diseases in young cats.',
+        verbose=verbose,
+        allow_delegation=False,
+        tools=[search_tool],
+        llm=ollama_model
+    )
+
+    adult_senior_vet = Agent(
+        role='Adult and Geriatric Feline Veterinarian',
+        goal='Diagnose and provide initial advice for health issues in adult and senior cats (1 year and older).',
+        backstory='You have decades of experience treating adult and senior cats, with deep knowledge of age-related diseases like kidney failure, hyperthyroidism, and dental disease.',
+        verbose=verbose,
+        allow_delegation=False,
+        tools=[search_tool],
+        llm=ollama_model
+    )
+
+    if life_stage:
+        # Fast path: no manager LLM, no triage delegation
+        specialist = kitten_vet if life_stage == KITTEN else adult_senior_vet
+        direct_task = Task(
+            description="A pet owner is concerned about their cat: '{query}'. Analyze the full context of the query and provide a differential diagnosis. What are the most likely causes of the symptoms described? Use your search tool if needed. Conclude with clear advice on whether this is an emergency and what the owner's next steps should be.",
+            expected_output="A detailed report with 2-3 likely diagnoses, an explanation for each, and clear, actionable advice for the pet owner.",
+            agent=specialist
+        )
+        return Crew(agents=[specialist], tasks=[direct_task], process=Process.sequential, verbose=verbose)
+
+    # Define the diagnostic tasks for the crew
+    triage_task = Task(
+        description="Analyze the user's query: '{query}'. Your first job is to determine the cat's life stage from the query. Based on the age, you MUST delegate the diagnostic task to either the 'Pediatric Feline Veterinarian' or the 'Adult and Geriatric Feline Veterinarian'. Do not try to diagnose yourself.",
+        expected_output="A delegation action to the correct specialist with all the necessary context from the query.",
+        agent=triage_vet
+    )
+
+    diagnostic_task = Task(
+        description="A pet owner is concerned about their cat. The Triage Vet has passed this case to you. Analyze the full context of the query and provide a differential diagnosis. What are the most likely causes of the symptoms described? Use your search tool if needed. Conclude with clear advice on whether this is an emergency and what the owner's next steps should be.",
+        expected_output="A detailed report with 2-3 likely diagnoses, an explanation for each, and clear, actionable advice for the pet owner.",
+    )
+
+    # Assemble the crew
+    return Crew(
+        agents=[triage_vet, kitten_vet, adult_senior_vet],
+        tasks=[triage_task, diagnostic_task],
+        process=Process.hierarchical,
+        manager_llm=ollama_model,
+        verbose=verbose
+    )
+
+def run_batch(source: str, output: str, workers: int):
+    """Triage every query in the JSONL file `source` ("-" for stdin), writing JSONL results to `output`."""
+    pretriage = PreTriage()
+    runner = BatchRunner(lambda life_stage: build_crew(life_stage, verbose=False), workers=workers,
+                         router=lambda query: pretriage(query).life_stage)
+    infile = sys.stdin if source == "-" else open(source, encoding="utf-8")
+    outfile = sys.stdout if output == "-" else open(output, "w", encoding="utf-8")
+    try:
+        runner.run(read_queries(infile), outfile)
+    finally:
+        if infile is not sys.stdin:
+            infile.close()
+        if outfile is not sys.stdout:
+            outfile.close()
+    print(pretriage.summary(), file=sys.stderr)
 
 def main():
+    parser = argparse.ArgumentParser(description="Veterinary triage crew")
+    parser.add_argument("--batch", metavar="FILE", help="JSONL file of queries to triage ('-' for stdin)")
+    parser.add_argument("--output", default="-", help="Where to write JSONL results in batch mode (default: stdout)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Crews running at the same time")
+    args = parser.parse_args()
+
+    if args.batch:
+        run_batch(args.batch, args.output, args.workers)
+        return
+
     print("--- Starting the Veterinary Crew ---")
     user_query = "My 9-month-old cat, Whiskers, has been very lethargic and hasn't eaten anything for a day. What could be wrong?"
-    result = crew.kickoff(inputs={'query': user_query})
-    
+    pretriage = PreTriage()
+    decision = pretriage(user_query)
+    if decision.life_stage:
+        print(f"⚡ Pre-triage: {decision.reason}, sending the case straight to the specialist")
+    else:
+        print(f"🤔 Pre-triage: {decision.reason}, using the LLM triage")
+    result = build_crew(decision.life_stage).kickoff(inputs={'query': user_query})
+
     print("\n--- Crew Finished ---")
     print("\nFinal Diagnostic Report:")
     print(result)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,112 @@
+# pretriage.py
+# Rule-based pre-triage for the veterinary crew.
+# Most queries state the cat's age outright ("9-month-old", "aged 12", "3yo") or its life stage
+# ("my kitten", "senior cat"), so the kitten vs adult decision can be read off the text without
+# asking the manager LLM and the triage vet. Only queries where the age is missing or
+# contradictory fall back to the LLM triage. Hit and fallback counts are kept for reporting.
+
+import re
+import threading
+from dataclasses import dataclass
+
+KITTEN = "kitten"
+ADULT = "adult"
+KITTEN_MAX_MONTHS = 12
+
+_NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "thirteen": 13, "fourteen": 14,
+    "fifteen": 15, "sixteen": 16, "seventeen": 17, "eighteen": 18, "nineteen": 19, "twenty": 20,
+}
+_MONTHS_PER_UNIT = {"y": 12, "m": 1, "w": 12 / 52, "d": 12 / 365}
+_NUMBER = r"(?:\d+(?:\.\d+)?|" + "|".join(_NUMBER_WORDS) + r")"
+_UNIT = r"(?:years?|yrs?|months?|mos?|weeks?|wks?|days?)"
+# "a"/"an" only count as one when a unit follows: "a year old", but not "aged a lot"
+_AMOUNT = rf"(?:{_NUMBER}|an?(?=[\s-]+{_UNIT}\b))"
+# One age, possibly in several units: "2 years", "1 year and 3 months", "2 years, 6 months"
+_DURATION = rf"{_AMOUNT}[\s-]*{_UNIT}(?:(?:\s*,\s*|\s+and\s+|[\s-]+){_NUMBER}[\s-]*{_UNIT})*"
+_DURATION_PART = re.compile(rf"({_AMOUNT})[\s-]*({_UNIT})", re.IGNORECASE)
+
+_AGE_PATTERNS = [
+    # "9-month-old", "2 years old", "three year old", "1 year and 3 months old"
+    re.compile(rf"\b(?P<duration>{_DURATION})[\s-]*old\b", re.IGNORECASE),
+    # "aged 12", "age 3 years", "age 2 years 6 months"
+    re.compile(rf"\baged?\s*(?:of\s+)?(?:(?P<duration>{_DURATION})\b|(?P<years>{_NUMBER})\b)", re.IGNORECASE),
+    # "3yo", "3 y/o"
+    re.compile(rf"\b(?P<years>{_NUMBER})\s*(?:y/o|yo)\b", re.IGNORECASE),
+]
+_KITTEN_WORDS = re.compile(r"\b(?:my|our|a|the|new|young)\s+(?:\w+\s+)?kitten\b", re.IGNORECASE)
+_SENIOR_WORDS = re.compile(r"\b(?:senior|elderly|geriatric)\b", re.IGNORECASE)
+
+
+@dataclass
+class Decision:
+    life_stage: str | None  # KITTEN, ADULT, or None when the LLM triage has to decide
+    reason: str
+
+
+def parse_ages_in_months(text: str) -> list[float]:
+    """All ages stated in `text`, converted to months; an age given in several units is summed."""
+    ages = []
+    for pattern in _AGE_PATTERNS:
+        for match in pattern.finditer(text):
+            if match.groupdict().get("duration"):
+                ages.append(sum(_to_number(amount) * _MONTHS_PER_UNIT["y" if unit[0] in "yY" else unit[0].lower()]
+                                for amount, unit in _DURATION_PART.findall(match.group("duration"))))
+            else:
+                ages.append(_to_number(match.group("years")) * _MONTHS_PER_UNIT["y"])
+    return ages
+
+
+def _to_number(amount: str) -> float:
+    amount = amount.lower()
+    if amount in ("a", "an"):
+        return 1.0
+    return float(_NUMBER_WORDS.get(amount, amount))
+
+
+def classify(text: str) -> Decision:
+    """Reads the life stage off the query, or returns `life_stage=None` if it is missing or contradictory."""
+    stages = {KITTEN if months < KITTEN_MAX_MONTHS else ADULT for months in parse_ages_in_months(text)}
+    if _KITTEN_WORDS.search(text):
+        stages.add(KITTEN)
+    if _SENIOR_WORDS.search(text):
+        stages.add(ADULT)
+    if len(stages) == 1:
+        stage = stages.pop()
+        return Decision(stage, f"stated age/life stage ({stage})")
+    if not stages:
+        return Decision(None, "no age in the query")
+    return Decision(None, "contradictory ages in the query")
+
+
+class PreTriage:
+    """Classifies queries and counts how often the rule-based fast path decides."""
+
+    def __init__(self):
+        self.hits = {KITTEN: 0, ADULT: 0}
+        self.fallbacks = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, text: str) -> Decision:
+        decision = classify(text)
+        with self._lock:
+            if decision.life_stage:
+                self.hits[decision.life_stage] += 1
+            else:
+                self.fallbacks += 1
+        return decision
+
+    @property
+    def total(self) -> int:
+        return sum(self.hits.values()) + self.fallbacks
+
+    @property
+    def hit_rate(self) -> float:
+        return sum(self.hits.values()) / self.total if self.total else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"🩺 Pre-triage fast path: {sum(self.hits.values())}/{self.total} queries ({self.hit_rate:.0%}) "
+            f"| kitten {self.hits[KITTEN]}, adult {self.hits[ADULT]}, LLM triage {self.fallbacks}"
+        )
@@ -0,0 +1,86 @@
+import io
+import json
+import threading
+import time
+
+from batch import BatchRunner, read_queries
+
+
+class FakeUsage:
+    def model_dump(self):
+        return {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}
+
+
+class FakeResult:
+    def __init__(self, raw):
+        self.raw = raw
+        self.token_usage = FakeUsage()
+
+
+class FakeCrew:
+    created = []
+
+    def __init__(self, route=None):
+        self.route = route
+        self.thread = threading.get_ident()
+        FakeCrew.created.append(self)
+
+    def kickoff(self, inputs):
+        assert threading.get_ident() == self.thread
+        if inputs["query"] == "boom":
+            raise RuntimeError("crew failed")
+        time.sleep(0.1)
+        return FakeResult(f"report for {inputs['query']}" + (f" by {self.route}" if self.route else ""))
+
+
+def test_read_queries_accepts_json_and_plain_lines():
+    lines = ['{"id": "a", "query": "kitten sneezing"}', "", "senior cat not eating"]
+    assert list(read_queries(lines)) == [
+        {"id": "a", "query": "kitten sneezing"},
+        {"id": 3, "query": "senior cat not eating"},
+    ]
+
+
+def test_malformed_lines_become_error_records_without_stopping_the_batch():
+    lines = ['{"query": "kitten sneezing"', '{"id": "b", "text": "no query"}', "senior cat not eating"]
+    queries = list(read_queries(lines))
+    assert [(q["id"], q["query"]) for q in queries] == [(1, None), (2, None), (3, "senior cat not eating")]
+    assert queries[0]["error"].startswith("JSONDecodeError")
+
+    output = io.StringIO()
+    records = BatchRunner(FakeCrew, workers=2, log=io.StringIO()).run(iter(queries), output)
+    by_id = {r["id"]: r for r in records}
+    assert len(output.getvalue().splitlines()) == 3
+    assert by_id[2]["error"].startswith("ValueError") and by_id[2]["result"] is None
+    assert by_id[3]["result"] == "report for senior cat not eating" and by_id[3]["error"] is None
+
+
+def test_batch_runner_runs_concurrently_with_one_crew_per_worker():
+    FakeCrew.created = []
+    queries = [{"id": i, "query": f"q{i}"} for i in range(8)] + [{"id": 8, "query": "boom"}]
+    output = io.StringIO()
+    started = time.perf_counter()
+    records = BatchRunner(FakeCrew, workers=4, log=io.StringIO()).run(iter(queries), output)
+    assert time.perf_counter() - started < 0.6
+    assert len(FakeCrew.created) <= 4
+
+    lines = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert len(lines) == len(records) == 9
+    by_id = {r["id"]: r for r in lines}
+    assert by_id[0]["result"] == "report for q0"
+    assert by_id[0]["usage"]["total_tokens"] == 15
+    assert by_id[0]["latency_s"] >= 0.1
+    assert "crew failed" in by_id[8]["error"]
+
+
+def test_batch_runner_routes_queries_to_per_route_crews():
+    FakeCrew.created = []
+    queries = [{"id": i, "query": q} for i, q in enumerate(["kitten a", "adult b", "kitten c", "unknown"])]
+    router = lambda query: query.split()[0] if query != "unknown" else None
+    log = io.StringIO()
+    records = BatchRunner(FakeCrew, workers=1, log=log, router=router).run(iter(queries), io.StringIO())
+    by_id = {r["id"]: r for r in records}
+    assert by_id[0]["route"] == "kitten" and by_id[0]["result"] == "report for kitten a by kitten"
+    assert by_id[3]["route"] is None and by_id[3]["result"] == "report for unknown"
+    assert sorted(str(c.route) for c in FakeCrew.created) == ["None", "adult", "kitten"]
+    assert "kitten 2" in log.getvalue() and "llm-triage 1" in log.getvalue()
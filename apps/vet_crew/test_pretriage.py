@@ -0,0 +1,40 @@
+import pytest
+
+from pretriage import ADULT, KITTEN, PreTriage, classify, parse_ages_in_months
+
+
+@pytest.mark.parametrize("query, stage", [
+    ("My 9-month-old cat, Whiskers, has been very lethargic", KITTEN),
+    ("My cat is 12 years old and drinks a lot of water", ADULT),
+    ("Our new kitten keeps sneezing", KITTEN),
+    ("My senior cat stopped grooming", ADULT),
+    ("She is a 3yo tabby with diarrhea", ADULT),
+    ("Rescued a six week old stray, it won't eat", KITTEN),
+    ("My cat is vomiting", None),
+    ("My 8 week old kitten and my 10 year old cat both sneeze", None),
+    ("My 1 year and 3 months old cat is limping", ADULT),
+    ("She is 2 years 6 months old and sneezes", ADULT),
+    ("He is age 1 year, 2 months and won't eat", ADULT),
+    ("A year old cat with fleas", ADULT),
+    ("My cat has aged a lot this winter", None),
+    ("At what age a cat stops growing?", None),
+    ("My cat has had diarrhea for 2 weeks, she is old now", None),
+])
+def test_classify(query, stage):
+    assert classify(query).life_stage == stage
+
+
+def test_parse_ages_in_months():
+    assert parse_ages_in_months("a 2 year old and a 3-month-old") == [24, 3]
+    assert parse_ages_in_months("1 year and 3 months old") == [15]
+    assert parse_ages_in_months("aged 2") == [24]
+    assert parse_ages_in_months("she has aged a lot") == []
+
+
+def test_pretriage_counts_hits_and_fallbacks():
+    pretriage = PreTriage()
+    for query in ["my kitten sneezes", "my senior cat limps", "my cat limps"]:
+        pretriage(query)
+    assert pretriage.hits == {KITTEN: 1, ADULT: 1}
+    assert pretriage.fallbacks == 1
+    assert "2/3" in pretriage.summary()
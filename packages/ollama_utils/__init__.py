@@ -1,19 +1,174 @@
 from langchain_ollama.chat_models import ChatOllama
 from langchain_ollama.embeddings import OllamaEmbeddings
+import asyncio
+import json
+import os
 import sys
+import threading
+import weakref
+
+import httpx
+from ollama import AsyncClient, Client
+
+from .checkpoint import SQLiteCheckpointSaver
+from .embedding_cache import CachedOllamaEmbeddings, EmbeddingCache
+from .fake_ollama import FakeOllama, Rule, hash_embedding
+from .json_stream import IncrementalJSONParser, JSONStream, parse_partial_json, stream_json
+from .search import WebSearch, normalize_query
+from .streaming import StreamResult, astream_to_console, stream_to_console
+from .tools import ParallelToolExecutor
+from .tracing import TRACE_PATH, Span, TracedAsyncClient, TracedClient, Tracer, TracingCallbackHandler
 
 LLM_MODEL = "llama3:latest"
 EMBEDDING_MODEL = "nomic-embed-text"
-OLLAMA_BASE_URL = "http://localhost:11434"
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+# How long pre-warmed models stay loaded in Ollama after their last request.
+DEFAULT_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+# Keep-alive connection pool shared by every client talking to the same Ollama server.
+HTTP_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=300)
+
+# Spans of every model call, embedding request, graph node and tool run (see tracing.py).
+tracer = Tracer(TRACE_PATH)
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of Ollama clients.
+    Chat and embedding models are memoized per (model, base_url, options), and every model
+    pointing at the same server shares one sync HTTP connection pool and, per event loop, one
+    async pool (keep-alive connections belong to the loop that opened them, and scripts may call
+    `asyncio.run` several times).
+    Chat models report to `tracer` through its callback handler, and the shared clients record
+    every embedding request.
+    """
+
+    def __init__(self):
+        self._models = {}
+        self._clients = {}
+        # base_url -> {event loop: TracedAsyncClient}; a closed loop's client goes with the loop
+        self._async_clients = {}
+        self._lock = threading.Lock()
+
+    def chat(self, model=LLM_MODEL, base_url=OLLAMA_BASE_URL, **options) -> ChatOllama:
+        return self._get("chat", ChatOllama, model, base_url, options)
+
+    def embeddings(self, model=EMBEDDING_MODEL, base_url=OLLAMA_BASE_URL, **options) -> OllamaEmbeddings:
+        return self._get("embeddings", OllamaEmbeddings, model, base_url, options)
+
+    def clients(self, base_url=OLLAMA_BASE_URL) -> tuple[Client, "_LoopAsyncClient"]:
+        """
+        Returns the shared (sync, async) Ollama clients for `base_url`. The async one hands every
+        call to the client of the event loop it runs on (see `async_client`).
+        """
+        with self._lock:
+            if base_url not in self._clients:
+                self._clients[base_url] = (
+                    TracedClient(tracer, host=base_url, limits=HTTP_LIMITS),
+                    _LoopAsyncClient(self, base_url),
+                )
+            return self._clients[base_url]
+
+    def async_client(self, base_url=OLLAMA_BASE_URL) -> AsyncClient:
+        """The async Ollama client for `base_url` on the running event loop, created on first use."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            per_loop = self._async_clients.setdefault(base_url, weakref.WeakKeyDictionary())
+            client = per_loop.get(loop)
+            if client is None:
+                client = per_loop[loop] = TracedAsyncClient(tracer, host=base_url, limits=HTTP_LIMITS)
+            return client
+
+    def prewarm(self, models, base_url=OLLAMA_BASE_URL, keep_alive=DEFAULT_KEEP_ALIVE, wait=False):
+        """
+        Loads `models` into Ollama's memory (an empty generate request, or a one-word embedding
+        for embedding models) so the first real call doesn't pay the model load time.
+        Runs in a background thread unless `wait` is True; failures are reported, not raised.
+        """
+        client, _ = self.clients(base_url)
+
+        def warm():
+            for model in models:
+                try:
+                    if "embed" in model:
+                        client.embed(model=model, input="warm-up", keep_alive=keep_alive)
+                    else:
+                        client.generate(model=model, prompt="", keep_alive=keep_alive)
+                except Exception as e:
+                    print(f"⚠️ Could not pre-warm {model}: {e}")
+
+        thread = threading.Thread(target=warm, name="ollama-prewarm", daemon=True)
+        thread.start()
+        if wait:
+            thread.join()
+        return thread
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+            self._clients.clear()
+            self._async_clients.clear()
+
+    def _get(self, kind, cls, model, base_url, options):
+        key = (kind, model, base_url, json.dumps(options, sort_keys=True, default=str))
+        with self._lock:
+            instance = self._models.get(key)
+        if instance is not None:
+            return instance
+        if kind == "chat":
+            options = {"callbacks": [tracer.handler], **options}
+        instance = cls(model=model, base_url=base_url, **options)
+        tracer.serve_metrics_from_env()
+        sync_client, async_client = self.clients(base_url)
+        instance._client = sync_client
+        instance._async_client = async_client
+        with self._lock:
+            return self._models.setdefault(key, instance)
+
+
+class _LoopAsyncClient:
+    """Set as a model's `_async_client`: forwards each call to the running loop's client."""
+
+    def __init__(self, registry: ModelRegistry, base_url: str):
+        self._registry = registry
+        self._base_url = base_url
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)  # copy/pickle protocol lookups, made outside any event loop
+        return getattr(self._registry.async_client(self._base_url), name)
+
+
+registry = ModelRegistry()
+
+
+def get_chat_model(model=LLM_MODEL, base_url=OLLAMA_BASE_URL, **options) -> ChatOllama:
+    """Returns the shared `ChatOllama` for this model, server and options (e.g. `temperature`, `format`)."""
+    return registry.chat(model, base_url, **options)
+
+
+def get_embeddings_model(model=EMBEDDING_MODEL, base_url=OLLAMA_BASE_URL, **options) -> OllamaEmbeddings:
+    """Returns the shared `OllamaEmbeddings` for this model, server and options."""
+    return registry.embeddings(model, base_url, **options)
+
+
+def prewarm_models(*models, base_url=OLLAMA_BASE_URL, keep_alive=DEFAULT_KEEP_ALIVE, wait=False):
+    """Loads the given models into Ollama in the background; see `ModelRegistry.prewarm`."""
+    return registry.prewarm(models, base_url, keep_alive, wait)
+
 
-def get_ollama_models(llm_model=LLM_MODEL, embedding_model=EMBEDDING_MODEL, base_url=OLLAMA_BASE_URL):
+def get_ollama_models(llm_model=LLM_MODEL, embedding_model=EMBEDDING_MODEL, base_url=OLLAMA_BASE_URL, embedding_cache_path=None):
     """
     Initialize and return Ollama LLM and Embeddings objects.
+    Both come from the shared `registry`, so repeated calls reuse the same clients and connections.
+    If `embedding_cache_path` is given, the embeddings are wrapped in a `CachedOllamaEmbeddings`
+    backed by a SQLite file at that path, so texts that were already embedded are not sent to Ollama again.
     Raises SystemExit if Ollama is not available.
     """
     try:
-        llm = ChatOllama(model=llm_model, base_url=base_url)
-        embeddings = OllamaEmbeddings(model=embedding_model, base_url=base_url)
+        llm = get_chat_model(llm_model, base_url)
+        embeddings = get_embeddings_model(embedding_model, base_url)
+        if embedding_cache_path:
+            embeddings = CachedOllamaEmbeddings(embeddings, EmbeddingCache(embedding_cache_path))
         return llm, embeddings
     except Exception as e:
         print(f"❌ Error connecting to Ollama: {e}")
@@ -0,0 +1,11 @@
+import pytest
+
+from . import registry
+
+
+@pytest.fixture(autouse=True)
+def clear_model_registry():
+    """Models are memoized process-wide; start every test with an empty registry."""
+    registry.clear()
+    yield
+    registry.clear()
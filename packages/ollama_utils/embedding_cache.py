@@ -0,0 +1,220 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+
+from langchain_core.embeddings import Embeddings
+
+DEFAULT_MEMORY_SIZE = 2048
+DEFAULT_MAX_ENTRIES = 200_000
+# Number of pending access-time updates that triggers a write from `get_many`.
+FLUSH_EVERY = 1000
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    On-disk embedding store backed by SQLite, with an in-memory LRU in front of it.
+    Vectors are stored as float32 blobs keyed by (model, base_url, sha256(text)).
+    Once the store holds more than `max_entries` vectors, the least recently used ones are evicted.
+    Access times are kept in memory and written in batches (every `FLUSH_EVERY` reads, before an
+    eviction and on `close`), and the row count is tracked by this instance rather than recounted.
+    """
+
+    def __init__(self, path, memory_size=DEFAULT_MEMORY_SIZE, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = Path(path)
+        self.memory_size = memory_size
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        # {(model, base_url, text_hash): last access time} not written to disk yet.
+        self._touched = {}
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                base_url TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (model, base_url, text_hash)
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_access ON embeddings (last_access)")
+        self._conn.commit()
+        self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def get_many(self, model: str, base_url: str, hashes: list[str]) -> dict[str, list[float]]:
+        """
+        Returns the cached vectors for the given text hashes; missing hashes are left out.
+        Access times are only written to disk in batches (see `flush`), so a read costs no write.
+        """
+        found = {}
+        missing = []
+        with self._lock:
+            now = time.time()
+            for h in hashes:
+                key = (model, base_url, h)
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[h] = self._memory[key]
+                    self._touched[key] = now
+                else:
+                    missing.append(h)
+            for start in range(0, len(missing), 500):
+                batch = missing[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND base_url = ? "
+                    f"AND text_hash IN ({','.join('?' * len(batch))})",
+                    (model, base_url, *batch),
+                ).fetchall()
+                for h, blob in rows:
+                    vector = array("f", blob).tolist()
+                    found[h] = vector
+                    self._remember((model, base_url, h), vector)
+                    self._touched[(model, base_url, h)] = now
+            if len(self._touched) >= FLUSH_EVERY:
+                self._flush()
+                self._conn.commit()
+        return found
+
+    def put_many(self, model: str, base_url: str, items: dict[str, list[float]]) -> dict[str, list[float]]:
+        """
+        Stores vectors keyed by text hash and evicts old entries if the store is over capacity.
+        Returns the vectors as they were stored, rounded to float32 like the ones `get_many` returns.
+        """
+        if not items:
+            return {}
+        now = time.time()
+        stored = {h: array("f", vector) for h, vector in items.items()}
+        rows = [(vector.tobytes(), now, model, base_url, h) for h, vector in stored.items()]
+        with self._lock:
+            inserted = self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (vector, last_access, model, base_url, text_hash) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            ).rowcount
+            self._count += inserted
+            if inserted < len(rows):
+                self._conn.executemany(
+                    "UPDATE embeddings SET vector = ?, last_access = ? WHERE model = ? AND base_url = ? AND text_hash = ?",
+                    rows,
+                )
+            stored = {h: vector.tolist() for h, vector in stored.items()}
+            for h, vector in stored.items():
+                self._touched.pop((model, base_url, h), None)
+                self._remember((model, base_url, h), vector)
+            # Pending access times must be on disk before the least recently used rows are picked.
+            self._flush()
+            self._evict()
+            self._conn.commit()
+        return stored
+
+    def flush(self):
+        """Writes the access times recorded since the last flush."""
+        with self._lock:
+            self._flush()
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            self._conn.commit()
+            self._conn.close()
+
+    def _remember(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _flush(self):
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE embeddings SET last_access = ? WHERE model = ? AND base_url = ? AND text_hash = ?",
+                [(at, *key) for key, at in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def _evict(self):
+        excess = self._count - self.max_entries
+        if excess <= 0:
+            return
+        evicted = self._conn.execute(
+            "SELECT model, base_url, text_hash FROM embeddings ORDER BY last_access ASC LIMIT ?",
+            (excess,),
+        ).fetchall()
+        self._count -= self._conn.executemany(
+            "DELETE FROM embeddings WHERE model = ? AND base_url = ? AND text_hash = ?",
+            evicted,
+        ).rowcount
+        for key in evicted:
+            self._memory.pop(tuple(key), None)
+
+
+class CachedOllamaEmbeddings(Embeddings):
+    """
+    Wraps an `OllamaEmbeddings` (or any LangChain `Embeddings`) with an `EmbeddingCache`.
+    Only texts that are not cached yet are sent to the model, and each distinct text is embedded once per call.
+    """
+
+    def __init__(self, embeddings, cache: EmbeddingCache, model: str | None = None, base_url: str | None = None):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.model = model or getattr(embeddings, "model", "")
+        self.base_url = base_url or getattr(embeddings, "base_url", "") or ""
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        hashes, cached, missing = self._lookup(texts)
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            cached.update(self._store(missing, vectors))
+        return [cached[h] for h in hashes]
+
+    def embed_query(self, text: str) -> list[float]:
+        h = text_hash(text)
+        cached = self.cache.get_many(self.model, self.base_url, [h])
+        if h in cached:
+            return cached[h]
+        vector = self.embeddings.embed_query(text)
+        return self.cache.put_many(self.model, self.base_url, {h: vector})[h]
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        hashes, cached, missing = self._lookup(texts)
+        if missing:
+            vectors = await self.embeddings.aembed_documents(list(missing.values()))
+            cached.update(self._store(missing, vectors))
+        return [cached[h] for h in hashes]
+
+    async def aembed_query(self, text: str) -> list[float]:
+        h = text_hash(text)
+        cached = self.cache.get_many(self.model, self.base_url, [h])
+        if h in cached:
+            return cached[h]
+        vector = await self.embeddings.aembed_query(text)
+        return self.cache.put_many(self.model, self.base_url, {h: vector})[h]
+
+    def _lookup(self, texts):
+        hashes = [text_hash(t) for t in texts]
+        cached = self.cache.get_many(self.model, self.base_url, list(dict.fromkeys(hashes)))
+        missing = {}
+        for h, t in zip(hashes, texts):
+            if h not in cached:
+                missing.setdefault(h, t)
+        return hashes, cached, missing
+
+    def _store(self, missing, vectors):
+        return self.cache.put_many(self.model, self.base_url, dict(zip(missing, vectors)))
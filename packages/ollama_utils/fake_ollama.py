@@ -0,0 +1,419 @@
+import argparse
+import hashlib
+import json
+import math
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Size of the deterministic embeddings (nomic-embed-text's).
+DEFAULT_DIMENSIONS = 768
+DEFAULT_REPLY = "OK"
+NS = 1_000_000_000
+WORD = re.compile(r"\w+")
+PIECE = re.compile(r"\s*\S+|\s+")
+
+
+def hash_embedding(text: str, dimensions: int = DEFAULT_DIMENSIONS) -> list[float]:
+    """
+    A deterministic unit vector for `text`: every lower-cased word is hashed to a signed
+    dimension, so texts sharing words are close and identical texts map to identical vectors.
+    """
+    vector = [0.0] * dimensions
+    for word in WORD.findall(text.lower()) or [text]:
+        digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        vector[value % dimensions] += 1.0 if value >> 63 else -1.0
+    norm = math.sqrt(sum(v * v for v in vector))
+    if not norm:
+        vector[0], norm = 1.0, 1.0
+    return [v / norm for v in vector]
+
+
+def count_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token), like the apps' own estimates."""
+    return len(text) // 4 + 1
+
+
+@dataclass
+class Rule:
+    """
+    A scripted reply: used when `match` (a regex) is found in the last message, optionally only
+    for messages with that `role` or requests for that `model`. `response` is the reply text, a
+    dict/list sent as JSON, a `{"content": ..., "tool_calls": [{"name": ..., "arguments": {...}}]}`
+    message, or a list of those `cycle`d through on successive matches.
+    """
+
+    match: str = ""
+    response: object = DEFAULT_REPLY
+    role: str | None = None
+    model: str | None = None
+    cycle: bool = False
+    _calls: int = field(default=0, repr=False)
+
+    def matches(self, model: str, message: dict) -> bool:
+        if self.model and self.model != model:
+            return False
+        if self.role and self.role != message.get("role"):
+            return False
+        return re.search(self.match, message.get("content") or "") is not None
+
+    def next_response(self):
+        if not self.cycle:
+            return self.response
+        response = self.response[self._calls % len(self.response)]
+        self._calls += 1
+        return response
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Rule":
+        return cls(**{k: data[k] for k in ("match", "response", "role", "model", "cycle") if k in data})
+
+
+@dataclass
+class RequestRecord:
+    endpoint: str
+    model: str
+    start: float  # wall-clock, comparable across processes
+    end: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    inputs: int = 0
+
+
+@dataclass
+class FakeOllamaStats:
+    llm_calls: int = 0
+    embed_requests: int = 0
+    embedded_inputs: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    model_s: float = 0.0  # time with at least one request being served
+
+    def __str__(self) -> str:
+        return (
+            f"{self.llm_calls} LLM calls ({self.prompt_tokens} prompt / {self.completion_tokens} completion tokens), "
+            f"{self.embed_requests} embedding requests ({self.embedded_inputs} texts), {self.model_s:.2f}s of model time"
+        )
+
+
+class FakeOllama:
+    """
+    A local stand-in for the Ollama server, for tests and benchmarks that must run without a GPU or
+    network. It speaks `/api/chat`, `/api/generate`, `/api/embed`, `/api/embeddings` and `/api/tags`
+    (streamed or not), answers chats from scripted `rules` (first match wins, else `default`),
+    returns `hash_embedding`s, and simulates model time: `load_s` the first time a model is used,
+    prompt evaluation at `prompt_tokens_per_s` and generation at `tokens_per_s` (instant when None).
+    The reported Ollama timings (`prompt_eval_duration`, `eval_duration`, ...) match the simulated ones.
+
+    Point the apps at it with `OLLAMA_BASE_URL=<server.url>`.
+    """
+
+    def __init__(self, rules=(), default=DEFAULT_REPLY, tokens_per_s=None, prompt_tokens_per_s=None,
+                 load_s=0.0, dimensions=DEFAULT_DIMENSIONS, host="127.0.0.1", port=0):
+        self.rules = [r if isinstance(r, Rule) else Rule.from_dict(r) for r in rules]
+        self.default = default
+        self.tokens_per_s = tokens_per_s
+        self.prompt_tokens_per_s = prompt_tokens_per_s
+        self.load_s = load_s
+        self.dimensions = dimensions
+        self.requests: list[RequestRecord] = []
+        self._loaded = set()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _handler_for(self))
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeOllama":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-ollama", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeOllama":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def script(self, rules, default=DEFAULT_REPLY):
+        """Replaces the scripted replies (e.g. between benchmark scenarios)."""
+        with self._lock:
+            self.rules = [r if isinstance(r, Rule) else Rule.from_dict(r) for r in rules]
+            self.default = default
+
+    # --- Accounting ---
+
+    def stats(self, since: float | None = None, until: float | None = None) -> FakeOllamaStats:
+        """Totals for the requests that started in [since, until] (wall-clock timestamps)."""
+        with self._lock:
+            records = [r for r in self.requests
+                       if (since is None or r.start >= since) and (until is None or r.start <= until) and r.end]
+        stats = FakeOllamaStats()
+        for record in records:
+            if record.endpoint in ("chat", "generate"):
+                stats.llm_calls += 1
+            else:
+                stats.embed_requests += 1
+                stats.embedded_inputs += record.inputs
+            stats.prompt_tokens += record.prompt_tokens
+            stats.completion_tokens += record.completion_tokens
+        # Union of the request intervals: concurrent requests count once.
+        busy_end = None
+        for record in sorted(records, key=lambda r: r.start):
+            start = record.start if busy_end is None else max(record.start, busy_end)
+            if record.end > start:
+                stats.model_s += record.end - start
+            busy_end = record.end if busy_end is None else max(busy_end, record.end)
+        return stats
+
+    def reset(self):
+        with self._lock:
+            self.requests.clear()
+            self._loaded.clear()
+
+    def _record(self, record: RequestRecord):
+        with self._lock:
+            self.requests.append(record)
+
+    # --- Replies ---
+
+    def reply(self, model: str, messages: list[dict]) -> dict:
+        """The assistant message for a chat, from the first matching rule."""
+        last = messages[-1] if messages else {}
+        with self._lock:
+            rule = next((r for r in self.rules if r.matches(model, last)), None)
+            response = rule.next_response() if rule else self.default
+        if isinstance(response, dict) and "tool_calls" in response:
+            calls = [{"function": {"name": c["name"], "arguments": c.get("arguments", {})}}
+                     for c in response["tool_calls"]]
+            return {"role": "assistant", "content": response.get("content", ""), "tool_calls": calls}
+        if not isinstance(response, str):
+            response = json.dumps(response)
+        return {"role": "assistant", "content": response}
+
+    def _load_time(self, model: str) -> float:
+        with self._lock:
+            if model in self._loaded:
+                return 0.0
+            self._loaded.add(model)
+        return self.load_s
+
+    @staticmethod
+    def _seconds(tokens: int, rate) -> float:
+        return tokens / rate if rate else 0.0
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _handler_for(fake: FakeOllama):
+    class Handler(BaseHTTPRequestHandler):
+        # Keep-alive connections, like the real server: clients reuse them across requests
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_HEAD(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def do_GET(self):
+            path = self.path.split("?")[0]
+            if path == "/":
+                self._send(b"Ollama is running", "text/plain")
+            elif path == "/api/tags":
+                with fake._lock:
+                    models = sorted(fake._loaded)
+                self._send_json({"models": [{"name": m, "model": m, "modified_at": _now(), "size": 0} for m in models]})
+            elif path == "/api/version":
+                self._send_json({"version": "0.0.0-fake"})
+            else:
+                self._send_json({"error": f"no route for {path}"}, 404)
+
+        def do_POST(self):
+            path = self.path.split("?")[0]
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                self._send_json({"error": "invalid JSON body"}, 400)
+                return
+            routes = {"/api/chat": self._chat, "/api/generate": self._generate, "/api/embed": self._embed,
+                      "/api/embeddings": self._embeddings, "/api/show": self._show}
+            route = routes.get(path)
+            if route is None:
+                self._send_json({"error": f"no route for {path}"}, 404)
+                return
+            try:
+                route(body)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # the client stopped reading (e.g. an early-stopped stream)
+
+        # --- Endpoints ---
+
+        def _chat(self, body):
+            model = body.get("model", "")
+            messages = body.get("messages") or []
+            message = fake.reply(model, messages)
+            prompt = "".join(str(m.get("content") or "") for m in messages)
+            self._complete("chat", model, prompt, message, body.get("stream", True))
+
+        def _generate(self, body):
+            model = body.get("model", "")
+            prompt = body.get("prompt") or ""
+            if not prompt:
+                # An empty prompt only loads the model (how clients pre-warm it)
+                load_s = fake._load_time(model)
+                time.sleep(load_s)
+                self._send_json({"model": model, "created_at": _now(), "response": "", "done": True,
+                                 "done_reason": "load", "load_duration": int(load_s * NS)})
+                return
+            message = fake.reply(model, [{"role": "user", "content": prompt}])
+            self._complete("generate", model, prompt, message, body.get("stream", True))
+
+        def _embed(self, body):
+            texts = body.get("input") or ""
+            texts = [texts] if isinstance(texts, str) else list(texts)
+            model, record, timings = self._embed_texts(body.get("model", ""), texts)
+            vectors = [hash_embedding(t, body.get("dimensions") or fake.dimensions) for t in texts]
+            self._finish(record)
+            self._send_json({"model": model, "embeddings": vectors, "prompt_eval_count": record.prompt_tokens, **timings})
+
+        def _embeddings(self, body):
+            prompt = body.get("prompt") or ""
+            _, record, _ = self._embed_texts(body.get("model", ""), [prompt])
+            self._finish(record)
+            self._send_json({"embedding": hash_embedding(prompt, fake.dimensions)})
+
+        def _show(self, body):
+            self._send_json({"modelfile": "", "parameters": "", "template": "{{ .Prompt }}",
+                             "details": {"family": "fake"}, "capabilities": ["completion", "tools", "embedding"]})
+
+        # --- Simulated model time ---
+
+        def _embed_texts(self, model, texts):
+            record = RequestRecord("embed", model, time.time(), inputs=len(texts),
+                                   prompt_tokens=sum(count_tokens(t) for t in texts))
+            load_s = fake._load_time(model)
+            eval_s = fake._seconds(record.prompt_tokens, fake.prompt_tokens_per_s)
+            time.sleep(load_s + eval_s)
+            timings = {"load_duration": int(load_s * NS), "total_duration": int((load_s + eval_s) * NS)}
+            return model, record, timings
+
+        def _complete(self, endpoint, model, prompt, message, stream):
+            record = RequestRecord(endpoint, model, time.time(), prompt_tokens=count_tokens(prompt))
+            content = message["content"]
+            pieces = PIECE.findall(content)
+            tool_tokens = count_tokens(json.dumps(message["tool_calls"])) if message.get("tool_calls") else 0
+            record.completion_tokens = len(pieces) + tool_tokens
+            load_s = fake._load_time(model)
+            prompt_eval_s = fake._seconds(record.prompt_tokens, fake.prompt_tokens_per_s)
+            token_s = fake._seconds(1, fake.tokens_per_s)
+            eval_s = token_s * record.completion_tokens
+            final = {
+                "done": True, "done_reason": "stop",
+                "total_duration": int((load_s + prompt_eval_s + eval_s) * NS), "load_duration": int(load_s * NS),
+                "prompt_eval_count": record.prompt_tokens, "prompt_eval_duration": int(prompt_eval_s * NS),
+                "eval_count": record.completion_tokens, "eval_duration": int(eval_s * NS),
+            }
+            time.sleep(load_s + prompt_eval_s)
+            try:
+                if not stream:
+                    time.sleep(eval_s)
+                    self._finish(record)
+                    self._send_json({**self._chunk(endpoint, model, message), **final})
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                first = {**message, "content": pieces[0] if pieces else ""}
+                time.sleep(token_s * (1 + tool_tokens))
+                self._write_line(self._chunk(endpoint, model, first, done=False))
+                for piece in pieces[1:]:
+                    time.sleep(token_s)
+                    self._write_line(self._chunk(endpoint, model, {"role": "assistant", "content": piece}, done=False))
+                self._finish(record)
+                self._write_line({**self._chunk(endpoint, model, {"role": "assistant", "content": ""}), **final})
+                self.wfile.write(b"0\r\n\r\n")
+                self.wfile.flush()
+            finally:
+                self._finish(record)
+
+        @staticmethod
+        def _chunk(endpoint, model, message, done=True):
+            chunk = {"model": model, "created_at": _now(), "done": done}
+            if endpoint == "chat":
+                chunk["message"] = message
+            else:
+                chunk["response"] = message["content"]
+            return chunk
+
+        def _finish(self, record):
+            # Recorded before the last bytes go out, so a client sees it in `stats()` once it has the reply;
+            # the `finally` above records requests cut short by a disconnect.
+            if not record.end:
+                record.end = time.time()
+                fake._record(record)
+
+        # --- HTTP plumbing ---
+
+        def _write_line(self, data):
+            line = json.dumps(data).encode() + b"\n"
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+            self.wfile.flush()
+
+        def _send(self, payload: bytes, content_type, status=200):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _send_json(self, data, status=200):
+            self._send(json.dumps(data).encode(), "application/json", status)
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a fake Ollama API with scripted replies.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--script", help='JSON file: {"rules": [{"match": ..., "response": ...}], "default": ...}')
+    parser.add_argument("--tokens-per-s", type=float, help="Generation speed (instant if not set)")
+    parser.add_argument("--prompt-tokens-per-s", type=float, help="Prompt evaluation speed (instant if not set)")
+    parser.add_argument("--load-s", type=float, default=0.0, help="Load time on a model's first request")
+    args = parser.parse_args()
+
+    script = {}
+    if args.script:
+        with open(args.script, encoding="utf-8") as f:
+            script = json.load(f)
+    fake = FakeOllama(script.get("rules", []), script.get("default", DEFAULT_REPLY), args.tokens_per_s,
+                      args.prompt_tokens_per_s, args.load_s, host=args.host, port=args.port)
+    print(f"✅ Fake Ollama listening on {fake.url} (OLLAMA_BASE_URL={fake.url})")
+    try:
+        fake._server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n👋 Stopping. {fake.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import json
+from dataclasses import dataclass
+
+from .streaming import _chunk_text
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+class IncrementalJSONParser:
+    """
+    Tolerant parser for JSON that arrives in pieces (e.g. streamed LLM output).
+    `feed()` scans only the new text, keeping the string/bracket state between calls, and
+    `value` is the best-effort parse of everything received so far: open strings and containers
+    are closed, and a dangling key or half-written literal is dropped. Leading prose and code
+    fences before the first `{` or `[` are ignored.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.done = False
+        self._start = None
+        self._scanned = 0
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        # (position, open containers) where the text before `position` is a valid prefix to close.
+        self._cuts = []
+        self._end = None
+
+    def feed(self, chunk: str):
+        """Adds `chunk` and returns the current partial value."""
+        self.text += chunk
+        self._scan()
+        return self.value
+
+    @property
+    def value(self):
+        if self._start is None:
+            return None
+        if self._end is not None:
+            return self._loads(self.text[self._start:self._end])
+        body = self.text[self._start:]
+        tail = body + ('"' if self._in_string else "")
+        for candidate in [tail + self._close(self._stack)] + [
+            body[:pos] + self._close(stack) for pos, stack in reversed(self._cuts)
+        ]:
+            value = self._loads(candidate)
+            if value is not None:
+                return value
+        return None
+
+    def complete_members(self) -> dict:
+        """Members of the top-level object whose values have been received in full."""
+        if self._start is None:
+            return {}
+        if self._end is not None:
+            value = self.value
+            return value if isinstance(value, dict) else {}
+        top = [pos for pos, stack in self._cuts if len(stack) == 1 and pos > 1]
+        if not top or self._stack[:1] != ["{"]:
+            return {}
+        value = self._loads(self.text[self._start:self._start + top[-1]] + "}")
+        return value if isinstance(value, dict) else {}
+
+    def _scan(self):
+        text = self.text
+        i = self._scanned
+        if self._start is None:
+            starts = [p for p in (text.find("{", i), text.find("[", i)) if p != -1]
+            if not starts:
+                self._scanned = len(text)
+                return
+            self._start = i = min(starts)
+        while i < len(text) and self._end is None:
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in _CLOSERS:
+                self._stack.append(ch)
+                self._cuts.append((i + 1 - self._start, tuple(self._stack)))
+            elif ch in "}]":
+                if self._stack:
+                    self._stack.pop()
+                if not self._stack:
+                    self._end = i + 1
+                    self.done = True
+            elif ch == ",":
+                self._cuts.append((i - self._start, tuple(self._stack)))
+            i += 1
+        self._scanned = i
+
+    @staticmethod
+    def _close(stack) -> str:
+        return "".join(_CLOSERS[c] for c in reversed(stack))
+
+    @staticmethod
+    def _loads(text):
+        try:
+            return json.loads(text)
+        except ValueError:
+            return None
+
+
+def parse_partial_json(text: str):
+    """Best-effort parse of a complete, truncated or slightly malformed JSON document."""
+    return IncrementalJSONParser().feed(text)
+
+
+@dataclass
+class JSONStream:
+    parser: IncrementalJSONParser
+    message: object
+    stopped_early: bool
+
+    @property
+    def value(self):
+        return self.parser.value
+
+
+def stream_json(runnable, input, stop_when=None, config=None) -> JSONStream:
+    """
+    Streams a JSON reply from `runnable` into an `IncrementalJSONParser`, stopping as soon as the
+    top-level value is closed or `stop_when(complete_members)` returns True. Stopping early closes
+    the stream, which makes Ollama stop generating. Returns the parser and the aggregated message.
+    """
+    parser = IncrementalJSONParser()
+    message = None
+    stopped_early = False
+    for chunk in runnable.stream(input, config=config):
+        message = chunk if message is None or isinstance(chunk, str) else message + chunk
+        parser.feed(_chunk_text(chunk))
+        if parser.done:
+            break
+        if stop_when and stop_when(parser.complete_members()):
+            stopped_early = True
+            break
+    return JSONStream(parser, message, stopped_early)
@@ -0,0 +1,134 @@
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+# How long cached search results stay valid, in seconds.
+DEFAULT_SEARCH_TTL = int(os.getenv("SEARCH_CACHE_TTL", str(24 * 3600)))
+
+
+def normalize_query(query: str) -> str:
+    """Case-folds the query, collapses whitespace and drops surrounding punctuation and quotes."""
+    return re.sub(r"\s+", " ", query).strip().strip("\"'?!.,;: ").casefold()
+
+
+class DDGSBackend:
+    """
+    DuckDuckGo search through `ddgs`, keeping one `DDGS` session per thread instead of opening a
+    new one per query. Rate-limit and transient errors are retried with exponential backoff.
+    """
+
+    def __init__(self, retries=3, backoff=1.0):
+        self.retries = retries
+        self.backoff = backoff
+        self._local = threading.local()
+
+    def search(self, query: str, max_results: int) -> list[dict]:
+        for attempt in range(self.retries + 1):
+            try:
+                return list(self._session().text(query, max_results=max_results) or [])
+            except Exception as e:
+                if "No results found" in str(e):
+                    return []
+                if attempt == self.retries:
+                    raise
+                delay = self.backoff * 2 ** attempt
+                print(f"⚠️ Search failed ({e}), retrying in {delay:.0f}s...")
+                time.sleep(delay)
+                self._local.session = None
+
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            from ddgs import DDGS
+
+            session = self._local.session = DDGS()
+        return session
+
+
+class WebSearch:
+    """
+    Shared web search service.
+    Queries are normalized, results are cached in SQLite for `ttl` seconds (in memory if no
+    `cache_path` is given), and concurrent identical queries share a single in-flight fetch.
+    `backend` is any object with a `search(query, max_results) -> list[dict]` method, which
+    lets tests and benchmarks swap DuckDuckGo for a local fake.
+    """
+
+    def __init__(self, backend=None, cache_path=None, ttl=DEFAULT_SEARCH_TTL):
+        self.backend = backend or DDGSBackend()
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._inflight = {}
+        self._lock = threading.Lock()
+        if cache_path:
+            os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+        self._conn = sqlite3.connect(str(cache_path or ":memory:"), check_same_thread=False)
+        if cache_path:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS search_results ("
+            "query TEXT NOT NULL, max_results INTEGER NOT NULL, results TEXT NOT NULL, "
+            "stored_at REAL NOT NULL, PRIMARY KEY (query, max_results))"
+        )
+        self._conn.commit()
+
+    def search(self, query: str, max_results: int = 5) -> list[dict]:
+        key = (normalize_query(query), max_results)
+        owner = False
+        with self._lock:
+            cached = self._get_cached(key)
+            if cached is not None:
+                self.hits += 1
+                return cached
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+            else:
+                self.misses += 1
+                future = self._inflight[key] = Future()
+                owner = True
+        if not owner:
+            return future.result()
+        try:
+            results = self.backend.search(key[0], max_results)
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO search_results VALUES (?, ?, ?, ?)",
+                    (key[0], max_results, json.dumps(results), time.time()),
+                )
+                self._conn.commit()
+            future.set_result(results)
+            return results
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    async def asearch(self, query: str, max_results: int = 5) -> list[dict]:
+        return await asyncio.to_thread(self.search, query, max_results)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM search_results")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _get_cached(self, key):
+        row = self._conn.execute(
+            "SELECT results, stored_at FROM search_results WHERE query = ? AND max_results = ?", key
+        ).fetchone()
+        if row is None or (self.ttl and time.time() - row[1] > self.ttl):
+            return None
+        return json.loads(row[0])
@@ -0,0 +1,88 @@
+import os
+import sys
+import time
+from dataclasses import dataclass
+
+# Set OLLAMA_STREAM=0 to wait for full completions instead of printing tokens as they arrive.
+STREAMING_ENABLED = os.getenv("OLLAMA_STREAM", "1") != "0"
+
+
+@dataclass
+class StreamResult:
+    text: str
+    time_to_first_token: float | None
+    total_time: float
+
+
+def _chunk_text(chunk) -> str:
+    """Returns the text of a streamed chunk: a message chunk, a plain string or a chain output dict."""
+    if isinstance(chunk, str):
+        return chunk
+    if isinstance(chunk, dict):
+        answer = chunk.get("answer")
+        return answer if isinstance(answer, str) else ""
+    content = getattr(chunk, "content", "")
+    return content if isinstance(content, str) else ""
+
+
+def _report(result: StreamResult, file):
+    ttft = f"{result.time_to_first_token:.2f}s" if result.time_to_first_token is not None else "n/a"
+    print(f"\n⏱️ Time to first token: {ttft} | Total: {result.total_time:.2f}s", file=file, flush=True)
+
+
+def stream_to_console(runnable, input, config=None, file=None, stream=None, report=True) -> StreamResult:
+    """
+    Runs `runnable` (a ChatOllama or any chain ending in one) with `.stream()`, printing the tokens
+    as they arrive, and returns the full text with the time to first token and total time.
+    With streaming disabled, falls back to `.invoke()` and prints the whole answer at once.
+    """
+    file = file or sys.stdout
+    stream = STREAMING_ENABLED if stream is None else stream
+    started = time.perf_counter()
+    first_token = None
+    parts = []
+    if stream:
+        for chunk in runnable.stream(input, config=config):
+            text = _chunk_text(chunk)
+            if not text:
+                continue
+            if first_token is None:
+                first_token = time.perf_counter() - started
+            parts.append(text)
+            print(text, end="", file=file, flush=True)
+    else:
+        text = _chunk_text(runnable.invoke(input, config=config))
+        first_token = time.perf_counter() - started
+        parts.append(text)
+        print(text, end="", file=file, flush=True)
+    result = StreamResult("".join(parts), first_token, time.perf_counter() - started)
+    if report:
+        _report(result, file)
+    return result
+
+
+async def astream_to_console(runnable, input, config=None, file=None, stream=None, report=True) -> StreamResult:
+    """Async version of `stream_to_console`, built on `.astream()` / `.ainvoke()`."""
+    file = file or sys.stdout
+    stream = STREAMING_ENABLED if stream is None else stream
+    started = time.perf_counter()
+    first_token = None
+    parts = []
+    if stream:
+        async for chunk in runnable.astream(input, config=config):
+            text = _chunk_text(chunk)
+            if not text:
+                continue
+            if first_token is None:
+                first_token = time.perf_counter() - started
+            parts.append(text)
+            print(text, end="", file=file, flush=True)
+    else:
+        text = _chunk_text(await runnable.ainvoke(input, config=config))
+        first_token = time.perf_counter() - started
+        parts.append(text)
+        print(text, end="", file=file, flush=True)
+    result = StreamResult("".join(parts), first_token, time.perf_counter() - started)
+    if report:
+        _report(result, file)
+    return result
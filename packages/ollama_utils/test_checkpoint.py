@@ -0,0 +1,71 @@
+from typing import TypedDict
+
+import pytest
+from langgraph.graph import END, StateGraph
+
+from .checkpoint import SQLiteCheckpointSaver
+
+
+class Counter:
+    """Not JSON-serializable: exercises the pickle fallback."""
+
+    def __init__(self, value=0):
+        self.value = value
+
+
+class State(TypedDict):
+    history: list
+    counter: Counter
+
+
+def build(saver, fail_at=None):
+    def step(state):
+        n = len(state["history"])
+        if n == fail_at:
+            raise RuntimeError("crash")
+        return {"history": state["history"] + [f"message {n}"], "counter": Counter(state["counter"].value + 1)}
+
+    graph = StateGraph(State)
+    graph.add_node("step", step)
+    graph.set_entry_point("step")
+    graph.add_conditional_edges("step", lambda s: END if len(s["history"]) >= 5 else "step")
+    return graph.compile(checkpointer=saver)
+
+
+def test_resume_after_crash_from_latest_checkpoint(tmp_path):
+    path = tmp_path / "checkpoints.sqlite"
+    saver = SQLiteCheckpointSaver(path)
+    config = saver.config_for("run-1")
+    with pytest.raises(RuntimeError):
+        build(saver, fail_at=3).invoke({"history": [], "counter": Counter()}, config)
+    saver.close()
+
+    reopened = SQLiteCheckpointSaver(path)
+    assert reopened.has_thread("run-1")
+    result = build(reopened).invoke(None, reopened.config_for("run-1"))
+    assert result["history"] == [f"message {i}" for i in range(5)]
+    assert result["counter"].value == 5
+
+
+def test_growing_lists_are_stored_as_an_append_only_log(tmp_path):
+    saver = SQLiteCheckpointSaver(tmp_path / "checkpoints.sqlite")
+    build(saver).invoke({"history": [], "counter": Counter()}, saver.config_for("run-1"))
+    rows = saver._conn.execute(
+        "SELECT base_version FROM blobs WHERE channel = 'history' AND type != 'empty'"
+    ).fetchall()
+    assert len(rows) > 2
+    assert sum(base is not None for (base,) in rows) >= len(rows) - 1
+    state = saver.get_tuple(saver.config_for("run-1")).checkpoint["channel_values"]
+    assert state["history"] == [f"message {i}" for i in range(5)]
+
+
+def test_replay_from_step_forks_the_run(tmp_path):
+    saver = SQLiteCheckpointSaver(tmp_path / "checkpoints.sqlite")
+    app = build(saver)
+    app.invoke({"history": [], "counter": Counter()}, saver.config_for("run-1"))
+    replay_config = saver.config_for("run-1", step=2)
+    assert app.get_state(replay_config).values["history"] == ["message 0", "message 1"]
+    result = app.invoke(None, replay_config)
+    assert result["history"] == [f"message {i}" for i in range(5)]
+    with pytest.raises(KeyError):
+        saver.config_for("run-1", step=99)
@@ -0,0 +1,117 @@
+import asyncio
+from unittest.mock import MagicMock, patch
+
+from . import get_ollama_models
+from .embedding_cache import CachedOllamaEmbeddings, EmbeddingCache, text_hash
+
+
+def fake_embeddings():
+    embeddings = MagicMock()
+    embeddings.model = "fake-embed"
+    embeddings.base_url = "http://fake-url"
+    embeddings.embed_documents.side_effect = lambda texts: [[float(len(t)), 0.5] for t in texts]
+    embeddings.embed_query.side_effect = lambda text: [float(len(text)), 0.25]
+    return embeddings
+
+
+def test_embed_documents_only_embeds_misses(tmp_path):
+    inner = fake_embeddings()
+    cached = CachedOllamaEmbeddings(inner, EmbeddingCache(tmp_path / "cache.sqlite"))
+
+    assert cached.embed_documents(["a", "bb", "a"]) == [[1.0, 0.5], [2.0, 0.5], [1.0, 0.5]]
+    inner.embed_documents.assert_called_once_with(["a", "bb"])
+
+    assert cached.embed_documents(["bb", "ccc"]) == [[2.0, 0.5], [3.0, 0.5]]
+    inner.embed_documents.assert_called_with(["ccc"])
+
+
+def test_vectors_persist_across_instances(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    CachedOllamaEmbeddings(fake_embeddings(), EmbeddingCache(path)).embed_query("hello")
+
+    inner = fake_embeddings()
+    assert CachedOllamaEmbeddings(inner, EmbeddingCache(path)).embed_query("hello") == [5.0, 0.25]
+    inner.embed_query.assert_not_called()
+
+
+def test_cache_is_keyed_by_model_and_base_url(tmp_path):
+    cache = EmbeddingCache(tmp_path / "cache.sqlite")
+    cache.put_many("model-a", "http://one", {text_hash("x"): [1.0]})
+    assert cache.get_many("model-a", "http://one", [text_hash("x")]) == {text_hash("x"): [1.0]}
+    assert cache.get_many("model-b", "http://one", [text_hash("x")]) == {}
+    assert cache.get_many("model-a", "http://two", [text_hash("x")]) == {}
+
+
+def test_eviction_keeps_most_recently_used(tmp_path):
+    cache = EmbeddingCache(tmp_path / "cache.sqlite", memory_size=0, max_entries=2)
+    cache.put_many("m", "u", {"a": [1.0]})
+    cache.put_many("m", "u", {"b": [2.0]})
+    cache.get_many("m", "u", ["a"])
+    cache.put_many("m", "u", {"c": [3.0]})
+    assert len(cache) == 2
+    assert set(cache.get_many("m", "u", ["a", "b", "c"])) == {"a", "c"}
+
+
+def test_memory_hits_count_as_recent_use(tmp_path):
+    cache = EmbeddingCache(tmp_path / "cache.sqlite", max_entries=2)
+    cache.put_many("m", "u", {"a": [1.0]})
+    cache.put_many("m", "u", {"b": [2.0]})
+    cache.get_many("m", "u", ["a"])
+    cache.put_many("m", "u", {"c": [3.0]})
+    assert set(cache._memory) == {("m", "u", "a"), ("m", "u", "c")}
+    assert set(EmbeddingCache(tmp_path / "cache.sqlite", memory_size=0).get_many("m", "u", ["a", "b", "c"])) == {"a", "c"}
+
+
+def test_reads_do_not_write_until_flushed(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    cache = EmbeddingCache(path, memory_size=0)
+    cache.put_many("m", "u", {"a": [1.0], "b": [2.0]})
+    writes = cache._conn.total_changes
+    cache.get_many("m", "u", ["a", "b"])
+    assert cache._conn.total_changes == writes
+    cache.close()
+    assert cache._touched == {}
+
+    reopened = EmbeddingCache(path, max_entries=3)
+    assert len(reopened) == 2
+    reopened.put_many("m", "u", {"a": [1.5]})
+    assert len(reopened) == 2
+
+
+def test_memory_and_disk_return_the_same_float32_vectors(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    cached = CachedOllamaEmbeddings(fake_embeddings(), EmbeddingCache(path))
+    first = cached.embed_documents(["a", "third"])
+    assert first == cached.embed_documents(["a", "third"])
+    assert first == CachedOllamaEmbeddings(fake_embeddings(), EmbeddingCache(path, memory_size=0)).embed_documents(["a", "third"])
+
+    cache = EmbeddingCache(path)
+    cache.put_many("m", "u", {"x": [0.1]})
+    assert cache.get_many("m", "u", ["x"])["x"] == EmbeddingCache(path, memory_size=0).get_many("m", "u", ["x"])["x"] != [0.1]
+
+
+def test_memory_front_is_bounded(tmp_path):
+    cache = EmbeddingCache(tmp_path / "cache.sqlite", memory_size=1)
+    cache.put_many("m", "u", {"a": [1.0], "b": [2.0]})
+    assert list(cache._memory) == [("m", "u", "b")]
+
+
+def test_async_embeddings_use_cache(tmp_path):
+    inner = fake_embeddings()
+
+    async def aembed_documents(texts):
+        return [[float(len(t))] for t in texts]
+
+    inner.aembed_documents.side_effect = aembed_documents
+    cached = CachedOllamaEmbeddings(inner, EmbeddingCache(tmp_path / "cache.sqlite"))
+    assert asyncio.run(cached.aembed_documents(["a", "bb"])) == [[1.0], [2.0]]
+    assert asyncio.run(cached.aembed_documents(["a", "bb"])) == [[1.0], [2.0]]
+    assert inner.aembed_documents.call_count == 1
+
+
+@patch("ollama_utils.ChatOllama")
+@patch("ollama_utils.OllamaEmbeddings")
+def test_get_ollama_models_with_cache(mock_embeddings, mock_llm, tmp_path):
+    _, embeddings = get_ollama_models("custom-llm", "custom-embed", "http://fake-url", embedding_cache_path=tmp_path / "cache.sqlite")
+    assert isinstance(embeddings, CachedOllamaEmbeddings)
+    assert embeddings.embeddings is mock_embeddings.return_value
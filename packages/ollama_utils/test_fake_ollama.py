@@ -0,0 +1,67 @@
+import asyncio
+import time
+
+import pytest
+from langchain_core.tools import tool
+
+from . import get_chat_model, get_embeddings_model, stream_json
+from .fake_ollama import FakeOllama, Rule, hash_embedding
+
+
+@tool
+def search_web(query: str) -> str:
+    """Search the web for information."""
+    return "[]"
+
+
+@pytest.fixture
+def fake():
+    with FakeOllama([
+        Rule("weather", {"tool_calls": [{"name": "search_web", "arguments": {"query": "weather"}}]}),
+        Rule("grade", {"score": 7, "found_solution": False}),
+        Rule("variant", ["first", "second"], cycle=True),
+    ], default="Hello from the fake") as server:
+        yield server
+
+
+def test_chat_models_talk_to_the_fake_server(fake):
+    llm = get_chat_model("llama3:latest", fake.url)
+    assert llm.invoke("hi").content == "Hello from the fake"
+    assert [llm.invoke("variant").content for _ in range(3)] == ["first", "second", "first"]
+    assert stream_json(llm, "grade this").value == {"score": 7, "found_solution": False}
+
+    [call] = llm.bind_tools([search_web]).invoke("what's the weather?").tool_calls
+    assert call["name"] == "search_web" and call["args"] == {"query": "weather"}
+
+
+def test_simulated_model_time_is_reported_like_ollama():
+    with FakeOllama(default="one two three four", tokens_per_s=100, prompt_tokens_per_s=1000) as fake:
+        llm = get_chat_model("llama3:latest", fake.url)
+        started = time.perf_counter()
+        message = llm.invoke("x" * 396)  # 100 prompt tokens
+        assert 0.13 < time.perf_counter() - started < 0.5
+        assert message.response_metadata["prompt_eval_count"] == 100
+        assert message.response_metadata["prompt_eval_duration"] == 100_000_000
+        assert message.response_metadata["eval_count"] == 4
+        assert message.response_metadata["eval_duration"] == 40_000_000
+
+
+def test_concurrent_requests_count_once_towards_model_time():
+    async def ask(llm):
+        return await asyncio.gather(*(llm.ainvoke(f"question {i}") for i in range(4)))
+
+    with FakeOllama(default="a b c d e", tokens_per_s=50) as fake:
+        asyncio.run(ask(get_chat_model("llama3:latest", fake.url)))
+        stats = fake.stats()
+    assert stats.llm_calls == 4 and stats.completion_tokens == 20
+    assert 0.1 < stats.model_s < 0.3  # 4 x 0.1s of generation, overlapping
+
+
+def test_embeddings_are_deterministic_and_word_based(fake):
+    embeddings = get_embeddings_model("nomic-embed-text", fake.url)
+    first, same, related, other = embeddings.embed_documents(
+        ["load the documents", "load the documents", "documents are loaded", "zebra"])
+    assert first == same == hash_embedding("load the documents")
+    similarity = lambda a, b: sum(x * y for x, y in zip(a, b))
+    assert similarity(first, related) > similarity(first, other)
+    assert fake.stats().embedded_inputs == 4
@@ -0,0 +1,43 @@
+import json
+
+from langchain_core.language_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+from .json_stream import IncrementalJSONParser, parse_partial_json, stream_json
+
+
+def test_parse_partial_json_closes_open_strings_and_containers():
+    assert parse_partial_json('{"a": "hel') == {"a": "hel"}
+    assert parse_partial_json('{"a": [1, 2, {"b": tr') == {"a": [1, 2, {}]}
+    assert parse_partial_json('{"a": 1, "b":') == {"a": 1}
+    assert parse_partial_json('{"a": 1, "b') == {"a": 1}
+    assert parse_partial_json('Sure! ```json\n{"a": {"b": "c"}}\n```') == {"a": {"b": "c"}}
+    assert parse_partial_json("no json here") is None
+
+
+def test_incremental_feed_matches_full_parse():
+    document = {"thought": "say \"hi\", then {stop}", "plan": ["[x] a", "b"], "action": "finish", "n": 1.5}
+    text = json.dumps(document)
+    parser = IncrementalJSONParser()
+    for i in range(0, len(text), 3):
+        partial = parser.feed(text[i:i + 3])
+        assert partial is None or isinstance(partial, dict)
+    assert parser.done
+    assert parser.value == document
+
+
+def test_complete_members_only_reports_finished_values():
+    parser = IncrementalJSONParser()
+    parser.feed('{"action": "web_search", "action_input": {"query": "cat')
+    assert parser.complete_members() == {"action": "web_search"}
+    parser.feed(' food"}, "final')
+    assert parser.complete_members() == {"action": "web_search", "action_input": {"query": "cat food"}}
+
+
+def test_stream_json_stops_when_condition_is_met():
+    reply = json.dumps({"action": "search", "action_input": {"q": "x"}, "extra": "a long tail " * 20})
+    llm = GenericFakeChatModel(messages=iter([AIMessage(content=reply)]))
+    result = stream_json(llm, "hi", stop_when=lambda members: "action_input" in members)
+    assert result.stopped_early
+    assert result.value["action_input"] == {"q": "x"}
+    assert len(result.message.content) < len(reply)
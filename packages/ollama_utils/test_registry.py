@@ -0,0 +1,61 @@
+import asyncio
+from unittest.mock import MagicMock, patch
+
+from . import FakeOllama, ModelRegistry, get_chat_model, get_embeddings_model, get_ollama_models, hash_embedding
+
+
+def test_chat_models_are_memoized_per_model_and_options():
+    first = get_chat_model("llama3:latest", "http://fake-url", temperature=0)
+    assert get_chat_model("llama3:latest", "http://fake-url", temperature=0) is first
+    assert get_chat_model("llama3:latest", "http://fake-url", temperature=1) is not first
+    assert get_chat_model("qwen3:latest", "http://fake-url", temperature=0) is not first
+
+
+def test_models_on_the_same_server_share_http_clients():
+    llm = get_chat_model("llama3:latest", "http://fake-url")
+    other = get_chat_model("qwen3:latest", "http://fake-url", format="json")
+    embeddings = get_embeddings_model("nomic-embed-text", "http://fake-url")
+    assert llm._client is other._client is embeddings._client
+    assert llm._async_client is other._async_client is embeddings._async_client
+    assert get_chat_model("llama3:latest", "http://other-url")._client is not llm._client
+
+
+def test_unhashable_options_are_supported():
+    schema = {"type": "object", "properties": {"action": {"type": "string"}}}
+    assert get_chat_model("llama3:latest", "http://fake-url", format=schema) is get_chat_model(
+        "llama3:latest", "http://fake-url", format=dict(schema)
+    )
+
+
+def test_get_ollama_models_reuses_registry():
+    llm, embeddings = get_ollama_models("custom-llm", "custom-embed", "http://fake-url")
+    assert get_ollama_models("custom-llm", "custom-embed", "http://fake-url") == (llm, embeddings)
+
+
+def test_prewarm_loads_chat_and_embedding_models():
+    registry = ModelRegistry()
+    client = MagicMock()
+    with patch.object(registry, "clients", return_value=(client, MagicMock())):
+        registry.prewarm(["llama3:latest", "nomic-embed-text"], keep_alive="10m", wait=True)
+    client.generate.assert_called_once_with(model="llama3:latest", prompt="", keep_alive="10m")
+    client.embed.assert_called_once_with(model="nomic-embed-text", input="warm-up", keep_alive="10m")
+
+
+def test_prewarm_failures_do_not_raise(capsys):
+    registry = ModelRegistry()
+    client = MagicMock()
+    client.generate.side_effect = ConnectionError("offline")
+    with patch.object(registry, "clients", return_value=(client, MagicMock())):
+        registry.prewarm(["llama3:latest"], wait=True)
+    assert "Could not pre-warm llama3:latest" in capsys.readouterr().out
+
+
+def test_async_clients_survive_several_event_loops():
+    # FakeOllama keeps connections alive, so a client shared across loops would reuse a dead one
+    with FakeOllama() as fake:
+        embeddings = get_embeddings_model("nomic-embed-text", fake.url)
+        chat = get_chat_model("llama3:latest", fake.url)
+        for _ in range(2):
+            assert asyncio.run(embeddings.aembed_query("load the documents")) == hash_embedding("load the documents")
+            assert asyncio.run(chat.ainvoke("hi")).content
+        assert embeddings.embed_query("sync still works") == hash_embedding("sync still works")
@@ -0,0 +1,72 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from .search import WebSearch, normalize_query
+
+
+class FakeBackend:
+    def __init__(self, delay=0.0, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.queries = []
+        self._lock = threading.Lock()
+
+    def search(self, query, max_results):
+        with self._lock:
+            self.queries.append(query)
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("rate limited")
+        return [{"title": query, "href": f"https://example.com/{i}"} for i in range(max_results)]
+
+
+def test_normalize_query():
+    assert normalize_query("  What is   LATS? ") == "what is lats"
+    assert normalize_query('"what is lats"') == "what is lats"
+
+
+def test_search_caches_normalized_queries_on_disk(tmp_path):
+    backend = FakeBackend()
+    path = tmp_path / "search.sqlite"
+    search = WebSearch(backend, cache_path=path)
+    first = search.search("What is LATS?", max_results=2)
+    assert search.search("what is lats", max_results=2) == first
+    assert backend.queries == ["what is lats"]
+    search.close()
+
+    reopened = WebSearch(backend, cache_path=path)
+    assert reopened.search("WHAT IS LATS", max_results=2) == first
+    assert len(backend.queries) == 1
+    assert reopened.hits == 1
+
+
+def test_expired_entries_are_fetched_again():
+    backend = FakeBackend()
+    search = WebSearch(backend, ttl=0.05)
+    search.search("query")
+    time.sleep(0.1)
+    search.search("query")
+    assert len(backend.queries) == 2
+
+
+def test_concurrent_identical_queries_share_one_fetch():
+    backend = FakeBackend(delay=0.2)
+    search = WebSearch(backend)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda q: search.search(q), ["Cat lethargy"] * 4 + ["cat  lethargy?"] * 4))
+    assert backend.queries == ["cat lethargy"]
+    assert all(r == results[0] for r in results)
+    assert search.misses == 1 and search.coalesced + search.hits == 7
+
+
+def test_failures_are_raised_and_not_cached():
+    backend = FakeBackend(fail=True)
+    search = WebSearch(backend)
+    with pytest.raises(RuntimeError):
+        search.search("query")
+    backend.fail = False
+    assert search.search("query", max_results=1)
+    assert len(backend.queries) == 2
@@ -0,0 +1,41 @@
+import asyncio
+import io
+
+from langchain_core.language_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.output_parsers import StrOutputParser
+
+from .streaming import astream_to_console, stream_to_console
+
+
+def fake_llm(text="Hello streaming world"):
+    return GenericFakeChatModel(messages=iter([AIMessage(content=text)]))
+
+
+def test_stream_to_console_prints_tokens_and_reports_timing():
+    out = io.StringIO()
+    result = stream_to_console(fake_llm(), "hi", file=out)
+    assert result.text == "Hello streaming world"
+    assert result.time_to_first_token is not None
+    assert result.time_to_first_token <= result.total_time
+    assert out.getvalue().startswith("Hello streaming world")
+    assert "Time to first token" in out.getvalue()
+
+
+def test_stream_to_console_accepts_string_chains():
+    out = io.StringIO()
+    result = stream_to_console(fake_llm() | StrOutputParser(), "hi", file=out, report=False)
+    assert result.text == "Hello streaming world"
+    assert out.getvalue() == "Hello streaming world"
+
+
+def test_stream_to_console_without_streaming_invokes():
+    out = io.StringIO()
+    result = stream_to_console(fake_llm("all at once"), "hi", file=out, stream=False, report=False)
+    assert result.text == "all at once"
+
+
+def test_astream_to_console():
+    out = io.StringIO()
+    result = asyncio.run(astream_to_console(fake_llm(), "hi", file=out, report=False))
+    assert result.text == "Hello streaming world"
@@ -0,0 +1,59 @@
+import asyncio
+import time
+
+from langchain_core.tools import tool
+
+from .tools import ParallelToolExecutor
+
+
+@tool
+def slow_echo(text: str) -> str:
+    """Echoes the text after a short pause."""
+    time.sleep(0.2)
+    return text
+
+
+@tool
+async def async_echo(text: str) -> str:
+    """Echoes the text after a short async pause."""
+    await asyncio.sleep(0.2)
+    return text.upper()
+
+
+@tool
+def failing(text: str) -> str:
+    """Always fails."""
+    raise ValueError("boom")
+
+
+def calls(*specs):
+    return [{"name": name, "args": {"text": text}, "id": f"call_{i}"} for i, (name, text) in enumerate(specs)]
+
+
+def test_run_executes_calls_concurrently_and_in_order():
+    executor = ParallelToolExecutor([slow_echo, async_echo])
+    started = time.perf_counter()
+    messages = executor.run(calls(("slow_echo", "a"), ("async_echo", "b"), ("slow_echo", "c")))
+    assert time.perf_counter() - started < 0.5
+    assert [m.content for m in messages] == ["a", "B", "c"]
+    assert [m.tool_call_id for m in messages] == ["call_0", "call_1", "call_2"]
+
+
+def test_arun_executes_calls_concurrently_and_in_order():
+    executor = ParallelToolExecutor([slow_echo, async_echo])
+    started = time.perf_counter()
+    messages = asyncio.run(executor.arun(calls(("async_echo", "x"), ("slow_echo", "y"), ("async_echo", "z"))))
+    assert time.perf_counter() - started < 0.5
+    assert [m.content for m in messages] == ["X", "y", "Z"]
+
+
+def test_errors_unknown_tools_and_timeouts_become_error_messages():
+    executor = ParallelToolExecutor([slow_echo, failing], timeout={"slow_echo": 0.05})
+    for messages in (
+        executor.run(calls(("failing", "a"), ("missing", "b"), ("slow_echo", "c"))),
+        asyncio.run(executor.arun(calls(("failing", "a"), ("missing", "b"), ("slow_echo", "c")))),
+    ):
+        assert [m.status for m in messages] == ["error", "error", "error"]
+        assert "boom" in messages[0].content
+        assert "not found" in messages[1].content
+        assert "timed out" in messages[2].content
@@ -0,0 +1,114 @@
+import json
+from typing import TypedDict
+
+import httpx
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.tools import tool
+from langgraph.graph import END, StateGraph
+
+from . import get_chat_model, get_embeddings_model, tracer
+from .tools import ParallelToolExecutor
+from .tracing import TracedClient, Tracer
+
+OLLAMA_METADATA = {
+    "model": "llama3:latest",
+    "load_duration": 100_000_000,
+    "prompt_eval_count": 50,
+    "prompt_eval_duration": 250_000_000,
+    "eval_count": 20,
+    "eval_duration": 500_000_000,
+}
+
+
+@tool
+def lookup(text: str) -> str:
+    """Looks the text up."""
+    return text.upper()
+
+
+class State(TypedDict):
+    answer: str
+
+
+def fake_model():
+    return GenericFakeChatModel(messages=iter([AIMessage(content="hello world", response_metadata=OLLAMA_METADATA)]))
+
+
+def test_llm_spans_carry_ollama_timings(tmp_path):
+    local = Tracer(tmp_path / "trace.jsonl")
+    fake_model().invoke("hi", {"callbacks": [local.handler]})
+
+    [line] = (tmp_path / "trace.jsonl").read_text().splitlines()
+    span = json.loads(line)
+    assert span["kind"] == "llm" and span["status"] == "ok"
+    attributes = span["attributes"]
+    assert attributes["prompt_tokens"] == 50 and attributes["completion_tokens"] == 20
+    assert attributes["prompt_eval_s"] == 0.25 and attributes["eval_s"] == 0.5
+    assert attributes["tokens_per_s"] == 40
+    assert attributes["ttft_s"] == 0.35  # not streamed: load + prompt eval
+
+    metrics = local.prometheus()
+    assert 'ollama_llm_completion_tokens_total{model="?"} 20' in metrics
+    assert "# TYPE ollama_llm_ttft_seconds summary" in metrics
+
+
+def test_streamed_calls_measure_time_to_first_token():
+    local = Tracer()
+    spans = []
+    local.record = spans.append
+    list(fake_model().stream("hi", {"callbacks": [local.handler]}))
+    [span] = spans
+    assert 0 <= span.attributes["ttft_s"] <= span.duration_s
+
+
+def test_graph_nodes_and_tools_get_spans_linked_to_their_parents():
+    local = Tracer()
+    spans = []
+    local.record = spans.append
+    executor = ParallelToolExecutor([lookup])
+    model = fake_model()
+
+    def answer(state):
+        model.invoke("hi")
+        [message] = executor.run([{"name": "lookup", "args": {"text": "cats"}, "id": "call_0"}])
+        return {"answer": message.content}
+
+    workflow = StateGraph(State)
+    workflow.add_node("answer", answer)
+    workflow.set_entry_point("answer")
+    workflow.add_edge("answer", END)
+    assert workflow.compile().invoke({"answer": ""}, {"callbacks": [local.handler]})["answer"] == "CATS"
+
+    by_kind = {span.kind: span for span in spans}
+    assert set(by_kind) == {"node", "llm", "tool"}
+    assert by_kind["node"].name == "answer" and by_kind["tool"].name == "lookup"
+    assert by_kind["llm"].attributes["node"] == "answer"
+    assert by_kind["tool"].parent_id == by_kind["llm"].parent_id
+    assert 'agent_span_total{kind="tool",name="lookup",status="ok"}' in _aggregated(spans).prometheus()
+
+
+def test_registry_models_are_traced():
+    llm = get_chat_model("llama3:latest", "http://fake-url")
+    assert llm.callbacks == [tracer.handler]
+    assert isinstance(get_embeddings_model("nomic-embed-text", "http://fake-url")._client, TracedClient)
+
+
+def test_embed_requests_are_recorded():
+    def respond(request):
+        return httpx.Response(200, json={"model": "nomic-embed-text", "embeddings": [[0.1], [0.2]],
+                                         "prompt_eval_count": 8, "total_duration": 40_000_000})
+
+    local = Tracer()
+    client = TracedClient(local, host="http://fake-url", transport=httpx.MockTransport(respond))
+    client.embed(model="nomic-embed-text", input=["a", "b"])
+    metrics = local.prometheus()
+    assert 'ollama_embed_inputs_total{model="nomic-embed-text"} 2' in metrics
+    assert 'ollama_embed_prompt_tokens_total{model="nomic-embed-text"} 8' in metrics
+
+
+def _aggregated(spans) -> Tracer:
+    local = Tracer()
+    for span in spans:
+        local.record(span)
+    return local
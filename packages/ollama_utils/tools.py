@@ -0,0 +1,91 @@
+import asyncio
+import contextvars
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.messages import ToolMessage
+
+# Seconds a single tool call may run before it is reported as timed out.
+DEFAULT_TOOL_TIMEOUT = float(os.getenv("TOOL_TIMEOUT", "30"))
+
+
+class ParallelToolExecutor:
+    """
+    Runs every tool call of an AIMessage at the same time and returns one `ToolMessage` per
+    `tool_call_id`, in the order of the calls. Async tools are awaited together with
+    `asyncio.gather`; sync tools run on a shared thread pool. `timeout` is either a number of
+    seconds for every tool or a `{tool_name: seconds}` dict (missing names use the default).
+    Unknown tools, errors and timeouts become error `ToolMessage`s instead of raising.
+    """
+
+    def __init__(self, tools, timeout=DEFAULT_TOOL_TIMEOUT, max_workers=8):
+        self.tools = {t.name: t for t in tools}
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+
+    def timeout_for(self, name: str) -> float:
+        if isinstance(self.timeout, dict):
+            return self.timeout.get(name, DEFAULT_TOOL_TIMEOUT)
+        return self.timeout
+
+    def run(self, tool_calls) -> list[ToolMessage]:
+        """Executes `tool_calls` concurrently from synchronous code."""
+        started = time.monotonic()
+        futures = []
+        for call in tool_calls:
+            tool = self.tools.get(call["name"])
+            if tool is None:
+                futures.append(None)
+            elif getattr(tool, "coroutine", None) is not None:
+                futures.append(self._submit(asyncio.run, tool.ainvoke(call["args"])))
+            else:
+                futures.append(self._submit(tool.invoke, call["args"]))
+        messages = []
+        for call, future in zip(tool_calls, futures):
+            try:
+                if future is None:
+                    raise KeyError(call["name"])
+                remaining = max(0.0, started + self.timeout_for(call["name"]) - time.monotonic())
+                messages.append(self._message(call, future.result(timeout=remaining)))
+            except Exception as e:
+                messages.append(self._error(call, e))
+        return messages
+
+    async def arun(self, tool_calls) -> list[ToolMessage]:
+        """Executes `tool_calls` concurrently from async code."""
+        return list(await asyncio.gather(*(self._acall(call) for call in tool_calls)))
+
+    async def _acall(self, call) -> ToolMessage:
+        try:
+            output = await asyncio.wait_for(self._call(call), timeout=self.timeout_for(call["name"]))
+        except Exception as e:
+            return self._error(call, e)
+        return self._message(call, output)
+
+    async def _call(self, call):
+        tool = self.tools.get(call["name"])
+        if tool is None:
+            raise KeyError(call["name"])
+        if getattr(tool, "coroutine", None) is not None:
+            return await tool.ainvoke(call["args"])
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, contextvars.copy_context().run, tool.invoke, call["args"])
+
+    def _submit(self, fn, *args):
+        # Runs in the caller's context, so the tool run is traced as a child of the calling graph node
+        return self._pool.submit(contextvars.copy_context().run, fn, *args)
+
+    def _message(self, call, output) -> ToolMessage:
+        return ToolMessage(content=str(output), tool_call_id=call.get("id") or "", name=call["name"])
+
+    def _error(self, call, error) -> ToolMessage:
+        name = call["name"]
+        if name not in self.tools:
+            content = f"Error: Tool '{name}' not found. Available tools are: {list(self.tools)}"
+        elif isinstance(error, TimeoutError):
+            content = f"Error: Tool '{name}' timed out after {self.timeout_for(name)}s."
+        else:
+            content = f"Error executing tool {name}: {error}"
+        print(f"--- {content} ---")
+        return ToolMessage(content=content, tool_call_id=call.get("id") or "", name=name, status="error")
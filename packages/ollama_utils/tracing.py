@@ -0,0 +1,326 @@
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from ollama import AsyncClient, Client
+
+# Set OLLAMA_TRACE_PATH to append every finished span to that JSONL file.
+TRACE_PATH = os.getenv("OLLAMA_TRACE_PATH")
+# Set OLLAMA_METRICS_PORT to serve the Prometheus metrics from the first process that creates a model.
+METRICS_PORT = os.getenv("OLLAMA_METRICS_PORT")
+NS = 1e9  # Ollama reports durations in nanoseconds
+
+
+@dataclass
+class Span:
+    kind: str  # "llm", "embedding", "node" or "tool"
+    name: str
+    span_id: str
+    parent_id: str | None = None
+    start: float = 0.0  # wall-clock timestamp
+    duration_s: float | None = None
+    status: str = "ok"
+    attributes: dict = field(default_factory=dict)
+
+
+class Tracer:
+    """
+    Collects spans for model calls, embedding requests, LangGraph nodes and tools.
+    Finished spans are aggregated into Prometheus metrics (`prometheus()`) and, with an
+    `export_path`, appended to a JSONL file. `handler` is the LangChain callback handler
+    that feeds it; the shared model registry attaches it to every chat model.
+    """
+
+    def __init__(self, export_path=None):
+        self.export_path = Path(export_path) if export_path else None
+        self.handler = TracingCallbackHandler(self)
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._metrics_server = None
+
+    def record(self, span: Span):
+        with self._lock:
+            self._aggregate(span)
+            if self.export_path:
+                self.export_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.export_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(asdict(span), default=str) + "\n")
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+
+    # --- Metrics ---
+
+    def _inc(self, name, labels, value=1.0):
+        key = (name, tuple(sorted(labels.items())))
+        self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def _aggregate(self, span: Span):
+        a = span.attributes
+        if span.kind == "llm":
+            labels = {"model": a.get("model", "?")}
+            self._inc("ollama_llm_requests_total", {**labels, "status": span.status})
+            if span.duration_s is not None:
+                self._inc("ollama_llm_duration_seconds_sum", labels, span.duration_s)
+                self._inc("ollama_llm_duration_seconds_count", labels)
+            for attribute, metric in (("prompt_tokens", "ollama_llm_prompt_tokens_total"),
+                                      ("completion_tokens", "ollama_llm_completion_tokens_total"),
+                                      ("prompt_eval_s", "ollama_llm_prompt_eval_seconds_total"),
+                                      ("eval_s", "ollama_llm_eval_seconds_total"),
+                                      ("load_s", "ollama_llm_load_seconds_total"),
+                                      ("retries", "ollama_llm_retries_total")):
+                if a.get(attribute):
+                    self._inc(metric, labels, a[attribute])
+            if a.get("ttft_s") is not None:
+                self._inc("ollama_llm_ttft_seconds_sum", labels, a["ttft_s"])
+                self._inc("ollama_llm_ttft_seconds_count", labels)
+        elif span.kind == "embedding":
+            labels = {"model": a.get("model", "?")}
+            self._inc("ollama_embed_requests_total", {**labels, "status": span.status})
+            self._inc("ollama_embed_inputs_total", labels, a.get("inputs", 0))
+            if a.get("prompt_tokens"):
+                self._inc("ollama_embed_prompt_tokens_total", labels, a["prompt_tokens"])
+            if span.duration_s is not None:
+                self._inc("ollama_embed_duration_seconds_sum", labels, span.duration_s)
+                self._inc("ollama_embed_duration_seconds_count", labels)
+        else:
+            labels = {"kind": span.kind, "name": span.name}
+            self._inc("agent_span_total", {**labels, "status": span.status})
+            if span.duration_s is not None:
+                self._inc("agent_span_duration_seconds_sum", labels, span.duration_s)
+                self._inc("agent_span_duration_seconds_count", labels)
+
+    def prometheus(self) -> str:
+        """The aggregated metrics in the Prometheus text exposition format."""
+        with self._lock:
+            items = sorted(self._counters.items())
+        lines = []
+        typed = set()
+        for (name, labels), value in items:
+            family = name.removesuffix("_sum").removesuffix("_count")
+            if family not in typed:
+                typed.add(family)
+                kind = "summary" if name.endswith(("_sum", "_count")) else "counter"
+                lines.append(f"# TYPE {family} {kind}")
+            label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+            lines.append(f"{name}{{{label_text}}} {value:g}" if label_text else f"{name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def serve_metrics(self, port: int, host="127.0.0.1") -> ThreadingHTTPServer:
+        """Serves `GET /metrics` from a background thread."""
+        tracer = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = tracer.prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, name="ollama-metrics", daemon=True).start()
+        self._metrics_server = server
+        return server
+
+    def serve_metrics_from_env(self):
+        """Starts the metrics endpoint once if OLLAMA_METRICS_PORT is set; a busy port is reported, not raised."""
+        if not METRICS_PORT or self._metrics_server is not None:
+            return
+        try:
+            self.serve_metrics(int(METRICS_PORT))
+        except OSError as e:
+            print(f"⚠️ Could not serve metrics on port {METRICS_PORT}: {e}")
+            self._metrics_server = False
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def ollama_timings(info: dict) -> dict:
+    """Token counts and durations (in seconds) from Ollama's response metadata."""
+    timings = {}
+    if info.get("prompt_eval_count") is not None:
+        timings["prompt_tokens"] = info["prompt_eval_count"]
+    if info.get("eval_count") is not None:
+        timings["completion_tokens"] = info["eval_count"]
+    for key, name in (("prompt_eval_duration", "prompt_eval_s"), ("eval_duration", "eval_s"),
+                      ("load_duration", "load_s"), ("total_duration", "server_total_s")):
+        if info.get(key):
+            timings[name] = info[key] / NS
+    if timings.get("completion_tokens") and timings.get("eval_s"):
+        timings["tokens_per_s"] = timings["completion_tokens"] / timings["eval_s"]
+    if timings.get("prompt_tokens") and timings.get("prompt_eval_s"):
+        timings["prompt_tokens_per_s"] = timings["prompt_tokens"] / timings["prompt_eval_s"]
+    return timings
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """
+    Turns LangChain callbacks into `Span`s: one per chat model call (with Ollama's prompt-eval and
+    generation timings, tokens/sec, time to first token and retries), per LangGraph node and per tool.
+    Pass it in a graph's config (`{"callbacks": [tracer.handler]}`) to get node and tool spans.
+    """
+
+    # Called inline (not in an executor) for async runs too, so timings stay exact.
+    run_inline = True
+
+    def __init__(self, tracer: Tracer):
+        self.tracer = tracer
+        self._open = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id: UUID, parent_run_id: UUID | None, kind: str, name: str, **attributes):
+        span = Span(kind, name, str(run_id), str(parent_run_id) if parent_run_id else None, time.time(),
+                    attributes=attributes)
+        with self._lock:
+            self._open[run_id] = (span, time.perf_counter())
+
+    def _end(self, run_id: UUID, status="ok", **attributes):
+        with self._lock:
+            entry = self._open.pop(run_id, None)
+        if entry is None:
+            return
+        span, started = entry
+        span.duration_s = time.perf_counter() - started
+        span.status = status
+        span.attributes.update(attributes)
+        if "first_token" in span.attributes:
+            span.attributes["ttft_s"] = span.attributes.pop("first_token") - started
+        self.tracer.record(span)
+
+    # --- Chat models ---
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        metadata = metadata or {}
+        model = metadata.get("ls_model_name") or (serialized or {}).get("kwargs", {}).get("model", "?")
+        self._start(run_id, parent_run_id, "llm", model, model=model, retries=0,
+                    node=metadata.get("langgraph_node"))
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        metadata = metadata or {}
+        model = metadata.get("ls_model_name") or (serialized or {}).get("kwargs", {}).get("model", "?")
+        self._start(run_id, parent_run_id, "llm", model, model=model, retries=0)
+
+    def on_llm_new_token(self, token, *, run_id, **kwargs):
+        with self._lock:
+            entry = self._open.get(run_id)
+            if entry and token and "first_token" not in entry[0].attributes:
+                entry[0].attributes["first_token"] = time.perf_counter()
+
+    def on_retry(self, retry_state, *, run_id, **kwargs):
+        with self._lock:
+            entry = self._open.get(run_id)
+            if entry:
+                entry[0].attributes["retries"] = entry[0].attributes.get("retries", 0) + 1
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        info = {}
+        generations = response.generations[0] if response.generations else []
+        if generations:
+            generation = generations[0]
+            info.update(generation.generation_info or {})
+            message = getattr(generation, "message", None)
+            if message is not None:
+                info.update(message.response_metadata or {})
+        timings = ollama_timings(info)
+        with self._lock:
+            entry = self._open.get(run_id)
+            streamed = entry is not None and "first_token" in entry[0].attributes
+        if not streamed and "prompt_eval_s" in timings:
+            # Not streamed: Ollama's own time to the first token is loading plus prompt evaluation
+            timings["ttft_s"] = timings.get("load_s", 0.0) + timings["prompt_eval_s"]
+        self._end(run_id, **timings)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, status="error", error=f"{type(error).__name__}: {error}")
+
+    # --- LangGraph nodes ---
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, metadata=None, name=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        # Only the node's own run; runnables inside the node inherit the metadata under other names
+        if node and name == node:
+            self._start(run_id, parent_run_id, "node", node, step=(metadata or {}).get("langgraph_step"))
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, status="error", error=f"{type(error).__name__}: {error}")
+
+    # --- Tools ---
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, "tool", (serialized or {}).get("name") or kwargs.get("name") or "?")
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, status="error", error=f"{type(error).__name__}: {error}")
+
+
+class _EmbedTracing:
+    """Records a span for each `embed` request (embedding models don't emit LangChain callbacks)."""
+
+    tracer: Tracer
+
+    def _span(self, model, inputs, started, wall_start, response=None, error=None):
+        attributes = {"model": model, "inputs": 1 if isinstance(inputs, str) else len(inputs)}
+        if response is not None:
+            info = {k: getattr(response, k, None) for k in ("prompt_eval_count", "load_duration", "total_duration")}
+            attributes.update(ollama_timings(info))
+        span = Span("embedding", model, f"embed-{time.perf_counter_ns()}", start=wall_start,
+                    duration_s=time.perf_counter() - started, status="error" if error else "ok",
+                    attributes=attributes)
+        if error:
+            span.attributes["error"] = f"{type(error).__name__}: {error}"
+        self.tracer.record(span)
+
+
+class TracedClient(_EmbedTracing, Client):
+    def __init__(self, tracer: Tracer, **kwargs):
+        super().__init__(**kwargs)
+        self.tracer = tracer
+
+    def embed(self, model="", input="", **kwargs):
+        started, wall_start = time.perf_counter(), time.time()
+        try:
+            response = super().embed(model=model, input=input, **kwargs)
+        except Exception as e:
+            self._span(model, input, started, wall_start, error=e)
+            raise
+        self._span(model, input, started, wall_start, response)
+        return response
+
+
+class TracedAsyncClient(_EmbedTracing, AsyncClient):
+    def __init__(self, tracer: Tracer, **kwargs):
+        super().__init__(**kwargs)
+        self.tracer = tracer
+
+    async def embed(self, model="", input="", **kwargs):
+        started, wall_start = time.perf_counter(), time.time()
+        try:
+            response = await super().embed(model=model, input=input, **kwargs)
+        except Exception as e:
+            self._span(model, input, started, wall_start, error=e)
+            raise
+        self._span(model, input, started, wall_start, response)
+        return response